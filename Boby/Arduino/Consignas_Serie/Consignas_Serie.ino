@@ -0,0 +1,180 @@
+#include <Servo.h>
+#include <util/crc16.h>
+
+// Recibe consignas de servo por serie en tramas binarias (ver boby_serie.py):
+//   0xA5 0x5A | seq u16 | periodo u8 | n u8 | n x (izq u16, der u16) | crc u16
+// Ángulos absolutos en cuartos de grado, little-endian, CRC de _crc_ccitt_update
+// sobre seq..consignas. Responde a cada trama válida con
+//   0xA6 | seq u16 | estado u8 | libres u8
+// y reproduce las consignas cada `periodo` ms desde un buffer circular. Una
+// trama rechazada (cabecera imposible o CRC erróneo) se vuelve a analizar a
+// partir del byte siguiente a su sincronismo, como AnalizadorTramas.
+
+Servo piernaIzquierda;
+Servo piernaDerecha;
+
+const int CENTRO_IZQ = 95;
+const int CENTRO_DER = 95;
+const long PULSO_MIN = 544;
+const long PULSO_MAX = 2400;
+
+const long BAUDIOS = 115200;
+const uint8_t SINCRONISMO_1 = 0xA5;
+const uint8_t SINCRONISMO_2 = 0x5A;
+const uint8_t RESPUESTA = 0xA6;
+const uint8_t MAX_CONSIGNAS = 16;
+const uint8_t CABECERA = 4;  // seq (2), periodo (1), n (1)
+
+const uint8_t ESTADO_ACEPTADA = 0;
+const uint8_t ESTADO_HUECO = 1;
+const uint8_t ESTADO_LLENO = 2;
+
+// Buffer circular de consignas (capacidad potencia de 2)
+const uint8_t CAPACIDAD = 64;
+uint16_t bufferIzq[CAPACIDAD];
+uint16_t bufferDer[CAPACIDAD];
+uint8_t cabeza = 0;  // Siguiente hueco libre
+uint8_t cola = 0;    // Siguiente consigna a reproducir
+uint8_t ocupacion = 0;
+
+// Estado del analizador
+enum Fase { ESPERA_1, ESPERA_2, CUERPO };
+Fase fase = ESPERA_1;
+uint8_t trama[CABECERA + 4 * MAX_CONSIGNAS + 2];
+uint8_t recibidos = 0;
+uint8_t longitud = 0;  // Bytes de cuerpo esperados (cabecera + consignas + crc)
+
+// Bytes de una trama rechazada pendientes de volver a analizar
+uint8_t reanalisis[sizeof(trama)];
+uint8_t nReanalisis = 0;
+uint8_t iReanalisis = 0;
+
+uint16_t esperado = 0;
+bool primera = true;
+uint8_t periodo = 20;
+unsigned long siguiente;
+
+int pulso(uint16_t cuartos) {
+  if (cuartos > 720) cuartos = 720;
+  return PULSO_MIN + (long)cuartos * (PULSO_MAX - PULSO_MIN) / 720;
+}
+
+uint16_t leer16(const uint8_t *p) {
+  return p[0] | ((uint16_t)p[1] << 8);
+}
+
+void responder(uint16_t seq, uint8_t estado) {
+  uint8_t respuesta[5] = {RESPUESTA, (uint8_t)seq, (uint8_t)(seq >> 8), estado,
+                          (uint8_t)(CAPACIDAD - ocupacion)};
+  Serial.write(respuesta, sizeof(respuesta));
+}
+
+bool procesarTrama() {
+  uint8_t n = trama[3];
+  uint16_t crc = 0xFFFF;
+  for (uint8_t i = 0; i < CABECERA + 4 * n; i++) {
+    crc = _crc_ccitt_update(crc, trama[i]);
+  }
+  if (crc != leer16(&trama[CABECERA + 4 * n])) {
+    return false;  // Sin respuesta: el host la cuenta como perdida
+  }
+
+  uint16_t seq = leer16(trama);
+  uint8_t estado = (primera || seq == esperado) ? ESTADO_ACEPTADA : ESTADO_HUECO;
+  primera = false;
+  esperado = seq + 1;
+
+  if (ocupacion + n > CAPACIDAD) {
+    estado = ESTADO_LLENO;
+  } else {
+    periodo = trama[2];
+    for (uint8_t i = 0; i < n; i++) {
+      bufferIzq[cabeza] = leer16(&trama[CABECERA + 4 * i]);
+      bufferDer[cabeza] = leer16(&trama[CABECERA + 4 * i + 2]);
+      cabeza = (cabeza + 1) & (CAPACIDAD - 1);
+    }
+    ocupacion += n;
+  }
+  responder(seq, estado);
+  return true;
+}
+
+// Descarta el sincronismo de la trama en curso y deja su cuerpo para reanalizar
+void rechazar() {
+  fase = ESPERA_1;
+  if (iReanalisis < nReanalisis) {
+    // La trama salió entera de un reanálisis que aún no ha terminado: basta retroceder
+    iReanalisis -= recibidos;
+  } else {
+    memcpy(reanalisis, trama, recibidos);
+    nReanalisis = recibidos;
+    iReanalisis = 0;
+  }
+}
+
+void analizar(uint8_t byte) {
+  switch (fase) {
+    case ESPERA_1:
+      if (byte == SINCRONISMO_1) fase = ESPERA_2;
+      break;
+    case ESPERA_2:
+      fase = (byte == SINCRONISMO_2) ? CUERPO : (byte == SINCRONISMO_1 ? ESPERA_2 : ESPERA_1);
+      recibidos = 0;
+      longitud = CABECERA;
+      break;
+    case CUERPO:
+      trama[recibidos++] = byte;
+      if (recibidos == CABECERA) {
+        uint8_t n = trama[3];
+        if (n == 0 || n > MAX_CONSIGNAS) {
+          rechazar();  // Cabecera imposible: resincronizar
+          break;
+        }
+        longitud = CABECERA + 4 * n + 2;
+      }
+      if (recibidos == longitud) {
+        if (procesarTrama()) {
+          fase = ESPERA_1;
+        } else {
+          rechazar();
+        }
+      }
+      break;
+  }
+}
+
+void recibir(uint8_t byte) {
+  analizar(byte);
+  // Cada rechazo salta al menos el sincronismo, así que el bucle termina
+  while (iReanalisis < nReanalisis) {
+    analizar(reanalisis[iReanalisis++]);
+  }
+}
+
+void setup() {
+  Serial.begin(BAUDIOS);
+  piernaIzquierda.attach(10);
+  piernaDerecha.attach(11);
+  piernaIzquierda.write(CENTRO_IZQ);
+  piernaDerecha.write(CENTRO_DER);
+  siguiente = millis();
+}
+
+void loop() {
+  while (Serial.available() > 0) {
+    recibir(Serial.read());
+  }
+
+  // Reproducir al ritmo de `periodo`; sin consignas se mantiene la última
+  if ((long)(millis() - siguiente) >= 0) {
+    siguiente += periodo;
+    if (ocupacion > 0) {
+      piernaIzquierda.writeMicroseconds(pulso(bufferIzq[cola]));
+      piernaDerecha.writeMicroseconds(pulso(bufferDer[cola]));
+      cola = (cola + 1) & (CAPACIDAD - 1);
+      ocupacion--;
+    } else {
+      siguiente = millis() + periodo;  // No acumular retraso mientras no llegan consignas
+    }
+  }
+}
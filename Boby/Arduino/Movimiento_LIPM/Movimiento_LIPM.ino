@@ -0,0 +1,48 @@
+#include <Servo.h>
+#include <avr/pgmspace.h>
+#include "tabla_lipm.h"  // Generada con boby_tabla.py
+
+Servo piernaIzquierda;
+Servo piernaDerecha;
+
+const int CENTRO_IZQ = 95;
+const int CENTRO_DER = 95;
+
+// Pulsos por defecto de la librería Servo para 0 y 180 grados (µs)
+const long PULSO_MIN = 544;
+const long PULSO_MAX = 2400;
+
+unsigned long siguiente;  // Instante (millis) de la próxima entrada
+int indice = 0;
+
+// Ángulo en cuartos de grado -> pulso en µs, solo con enteros
+int pulso(int cuartos) {
+  cuartos = constrain(cuartos, 0, 720);
+  return PULSO_MIN + (long)cuartos * (PULSO_MAX - PULSO_MIN) / 720;
+}
+
+void setup() {
+  piernaIzquierda.attach(10);
+  piernaDerecha.attach(11);
+  piernaIzquierda.write(CENTRO_IZQ);
+  piernaDerecha.write(CENTRO_DER);
+  delay(1000);
+  siguiente = millis();
+}
+
+void loop() {
+  int8_t izq = (int8_t)pgm_read_byte(&TABLA_LIPM[indice][0]);
+  int8_t der = (int8_t)pgm_read_byte(&TABLA_LIPM[indice][1]);
+
+  piernaIzquierda.writeMicroseconds(pulso(4 * CENTRO_IZQ + izq));
+  piernaDerecha.writeMicroseconds(pulso(4 * CENTRO_DER + der));
+
+  if (++indice == TABLA_LIPM_N) {
+    indice = 0;
+  }
+
+  // Ritmo fijo con millis(): el tiempo de escritura no se acumula como con delay()
+  siguiente += TABLA_LIPM_PERIODO_MS;
+  while ((long)(millis() - siguiente) < 0) {
+  }
+}
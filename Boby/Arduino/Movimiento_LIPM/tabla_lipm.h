@@ -0,0 +1,65 @@
+// Generado por boby_tabla.py; no editar a mano.
+// Sagital: altura 1.2 m, v0 0.3 m/s, paso 4 m; ciclo simulado 5096 ms
+// Desviaciones de CENTRO_IZQ / CENTRO_DER en cuartos de grado.
+#ifndef TABLA_LIPM_H
+#define TABLA_LIPM_H
+
+#include <avr/pgmspace.h>
+
+#define TABLA_LIPM_N 50
+#define TABLA_LIPM_PERIODO_MS 20
+
+const int8_t TABLA_LIPM[TABLA_LIPM_N][2] PROGMEM = {
+  { -60,  -60},
+  { -52,  -52},
+  { -44,  -44},
+  { -35,  -35},
+  { -28,  -28},
+  { -21,  -21},
+  { -16,  -16},
+  { -12,  -12},
+  {  -9,   -9},
+  {  -6,   -6},
+  {  -4,   -4},
+  {  -2,   -2},
+  {  -1,   -1},
+  {   1,    1},
+  {   2,    2},
+  {   4,    4},
+  {   6,    6},
+  {   9,    9},
+  {  12,   12},
+  {  16,   16},
+  {  21,   21},
+  {  28,   28},
+  {  35,   35},
+  {  44,   44},
+  {  52,   52},
+  {  60,   60},
+  {  52,   52},
+  {  44,   44},
+  {  35,   35},
+  {  28,   28},
+  {  21,   21},
+  {  16,   16},
+  {  12,   12},
+  {   9,    9},
+  {   6,    6},
+  {   4,    4},
+  {   2,    2},
+  {   1,    1},
+  {  -1,   -1},
+  {  -2,   -2},
+  {  -4,   -4},
+  {  -6,   -6},
+  {  -9,   -9},
+  { -12,  -12},
+  { -16,  -16},
+  { -21,  -21},
+  { -28,  -28},
+  { -35,  -35},
+  { -44,  -44},
+  { -52,  -52},
+};
+
+#endif
@@ -11,29 +11,47 @@ cálculos de energía orbital, trazado de trayectorias y más.
 - Frontal = YZ
 - Y representado como eje x en matplotlib
 - Z representado como eje y en matplotlib
+- matplotlib solo se importa al crear un LIPMVisualizer: el simulador puede
+  usarse en procesos sin ventana
 """
 
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import matplotlib.patches as patches
-import matplotlib.gridspec as gridspec
 import numpy as np
 from time import sleep
 import math
 import argparse
+import json
+import sys
+from collections import namedtuple
+
+from integradores import INTEGRADORES, IntegradorRK4, crear_integrador
+from lipm_historial import HistorialLIPM
+from trayectoria import codigo_pie
 
 # Constantes físicas y de simulación
 MAX_TIME = 50  # Tiempo máximo de simulación (s)
 HEIGHT = 1.2  # Altura del péndulo (m)
 G = 9.8  # Aceleración de la gravedad (m/s²)
 TIME_DELTA = 0.02  # Incremento de tiempo (s)
+ZMP_Y = [0.4, 0.8, 0.4, 0.8, 0.4, 0.8, 0.4]  # Posiciones ZMP ajustadas a mano (m)
+ZMP_TIME_CHANGE = [0.4, 1, 2, 3.5, 4, 7.4, 10.0]  # Tiempos de cambio ajustados a mano (s)
+Y_DOT_0 = 0.3  # Velocidad inicial en Y (m/s)
 MASS = 1.0  # Masa del péndulo (kg)
+HEADROOM = 0.5  # Margen relativo al reescalar los ejes
+REPLAY_WINDOW = 10.0  # Segundos de historial visibles al reproducir una grabación
+SUMMARY_FRAMES = 25  # Frames entre actualizaciones del recuadro de instrumentación
+FOOT_WIDTH = 0.1  # Ancho dibujado de cada pie (m); la silueta de Pie.stl se escala a este ancho
+FOOT_POINTS = 16  # Vértices máximos de la silueta del pie
+
+# Fase de apoyo: instante de inicio, ZMP activo, estado relativo inicial y pie
+SupportPhase = namedtuple('SupportPhase', ['t_start', 'zmp', 'y_0_rel', 'y_dot_0', 'foot'])
 
 
 class LIPMSimulator:
     """Simulador del modelo de péndulo invertido lineal (LIPM) en 2D."""
 
-    def __init__(self, height=HEIGHT, g=G, max_time=MAX_TIME):
+    def __init__(self, height=HEIGHT, g=G, max_time=MAX_TIME, history_capacity=None, ring_history=False,
+                 y_dot_0=Y_DOT_0, zmp_y=None, zmp_time_change=None, placement=None,
+                 integrator=None, height_profile=None, dt=TIME_DELTA):
         """
         Inicializa el simulador LIPM.
 
@@ -41,54 +59,152 @@ class LIPMSimulator:
             height: Altura del péndulo (m)
             g: Aceleración de la gravedad (m/s²)
             max_time: Tiempo máximo de simulación (s)
+            history_capacity: Muestras preasignadas en el historial
+                (por defecto, las necesarias para llegar a max_time)
+            ring_history: Conservar solo las últimas history_capacity muestras
+            y_dot_0: Velocidad inicial en Y (m/s)
+            zmp_y: Posiciones ZMP (por defecto, las ajustadas a mano)
+            zmp_time_change: Tiempos de cambio ZMP, uno por posición; el
+                último solo marca el final de la planificación
+            placement: Instancia de colocacion_pasos.ColocacionFrontal; si se
+                indica, cada nuevo ZMP y su tiempo de cambio se eligen en línea
+                a partir del estado y zmp_y/zmp_time_change solo dan el inicio
+            integrator: Integrador numérico de cada paso (ver integradores.py);
+                por defecto, la matriz de transición Φ(dt)
+            height_profile: Instancia de integradores.PerfilAltura con la altura
+                en función del tiempo; sin integrador indicado se usa RK4. El
+                modo por eventos (advance_to_event) supone altura constante
+            dt: Incremento de tiempo de cada update() (s)
         """
+        self.placement = placement
+        self.height_profile = height_profile
+        if integrator is None and height_profile is not None:
+            integrator = IntegradorRK4()
+        self.integrator = integrator
+        if height_profile is not None:
+            height = height_profile.altura(0)
+
         # Configuración ZMP (Zero Moment Point)
-        self.zmp_y = [0.4, 0.8, 0.4, 0.8, 0.4, 0.8, 0.4]  # Posiciones ZMP
-        self.zmp_time_change = [0.4, 1, 2, 3.5, 4, 7.4, 10.0]  # Tiempos de cambio ZMP
+        if zmp_y is None:
+            zmp_y = ZMP_Y if placement is None else [0.4]
+        if zmp_time_change is None:
+            zmp_time_change = ZMP_TIME_CHANGE if placement is None else [placement.duracion_paso]
+        self.zmp_y = list(zmp_y)  # Posiciones ZMP
+        self.zmp_time_change = list(zmp_time_change)  # Tiempos de cambio ZMP
+
+        # Argumentos para repetir la simulación desde el inicio (ver initial_arguments)
+        self._initial_arguments = {
+            'y_dot_0': y_dot_0, 'zmp_y': list(zmp_y), 'zmp_time_change': list(zmp_time_change),
+            'placement': placement, 'integrator': integrator, 'height_profile': height_profile, 'dt': dt,
+        }
 
         # Estado inicial
         self.zmp_idx = 0
         self.height = height
         self.g = g
         self.T_c = math.sqrt(height / g)  # Constante de tiempo del LIPM
+        self.dt = dt  # Incremento de tiempo de cada update() (s)
+        self._transition_key = None  # (T_c, dt) de la matriz de transición cacheada
+        self._transition = None
+        self.max_time = max_time
         self.t_abs = self.t_rel = 0
         self.foot = "LF"  # Left foot (pie izquierdo)
 
         # Condiciones iniciales
-        self.y_dot_0 = 0.3  # Velocidad inicial en Y
+        self.y_dot_0 = y_dot_0  # Velocidad inicial en Y
         self.y_0_rel = 0.0  # Posición inicial relativa en Y
+        self.y_t_rel = self.y_0_rel
+        self.y_dot_t = self.y_dot_0
+        self.y_ddot_t = self.y_t_rel / self.T_c ** 2
+        self.y_abs = self.zmp_y[0] + self.y_t_rel
+        self.orbital_energy = self.calculate_orbital_energy(self.y_t_rel, self.y_dot_t)
+
+        # Fases de apoyo recorridas (una entrada por cambio de ZMP)
+        self.phases = [SupportPhase(0, self.zmp_y[0], self.y_0_rel, self.y_dot_0, self.foot)]
 
-        # Historiales para visualización
-        self.history_t = []
-        self.history_y = []
-        self.history_y_dot = []
-        self.history_zmp = []
+        # Historial preasignado para visualización
+        if history_capacity is None:
+            history_capacity = int(max_time / dt) + 2
+        self.history = HistorialLIPM(('t', 'y', 'y_dot', 'zmp', 'energy'),
+                                     capacidad=history_capacity, circular=ring_history)
         self.foot_positions = []
-        self.energy_history = []
+
+        # Grabación opcional de la trayectoria (ver trayectoria.EscritorTrayectoria)
+        self.recorder = None
+
+        # Temporizadores por fase opcionales (ver instrumentacion.Instrumentacion)
+        self.instrumentation = None
 
         print(f"Simulador LIPM inicializado. T_c={self.T_c:.2f}s")
         print(f"ZMP inicial: {self.zmp_idx}, Pie: {self.foot}")
 
-    def calculate_position(self):
-        """Calcula la posición del péndulo en el tiempo actual."""
-        # Ecuación del LIPM para la posición
-        y_rel = (self.y_0_rel * math.cosh(self.t_rel / self.T_c)) + \
-                (self.T_c * self.y_dot_0 * math.sinh(self.t_rel / self.T_c))
-        return y_rel
-
-    def calculate_velocity(self):
-        """Calcula la velocidad del péndulo en el tiempo actual."""
-        # Ecuación del LIPM para la velocidad
-        y_dot = (self.y_0_rel * math.sinh(self.t_rel / self.T_c) / self.T_c) + \
-                (self.y_dot_0 * math.cosh(self.t_rel / self.T_c))
-        return y_dot
-
-    def calculate_acceleration(self):
-        """Calcula la aceleración del péndulo en el tiempo actual."""
-        # Ecuación del LIPM para la aceleración
-        y_ddot = (self.y_0_rel / (self.T_c ** 2) * math.cosh(self.t_rel / self.T_c)) + \
-                 (self.y_dot_0 / self.T_c * math.sinh(self.t_rel / self.T_c))
-        return y_ddot
+    @property
+    def history_t(self):
+        """Vista de los tiempos almacenados."""
+        return self.history['t']
+
+    @property
+    def history_y(self):
+        """Vista de las posiciones absolutas almacenadas."""
+        return self.history['y']
+
+    @property
+    def history_y_dot(self):
+        """Vista de las velocidades almacenadas."""
+        return self.history['y_dot']
+
+    @property
+    def history_zmp(self):
+        """Vista de los ZMP activos almacenados."""
+        return self.history['zmp']
+
+    @property
+    def energy_history(self):
+        """Vista de las energías orbitales almacenadas."""
+        return self.history['energy']
+
+    def propagate(self, y_0, y_dot_0, t):
+        """
+        Propaga un estado relativo un tiempo t con la solución cerrada del LIPM.
+
+        Args:
+            y_0: Posición inicial relativa al ZMP (m)
+            y_dot_0: Velocidad inicial (m/s)
+            t: Tiempo transcurrido (s)
+
+        Returns:
+            Tupla (posición relativa, velocidad)
+        """
+        c = math.cosh(t / self.T_c)
+        s = math.sinh(t / self.T_c)
+        return y_0 * c + self.T_c * y_dot_0 * s, y_0 * s / self.T_c + y_dot_0 * c
+
+    def transition(self, dt):
+        """
+        Coeficientes de la matriz de transición Φ(dt) = [[c, T_c·s], [s/T_c, c]].
+
+        Se recalculan solo si cambia T_c o dt, así que con paso fijo cada
+        tic se reduce a multiplicaciones y sumas.
+
+        Args:
+            dt: Incremento de tiempo (s)
+
+        Returns:
+            Tupla (c, T_c·s, s/T_c) con c = cosh(dt/T_c) y s = sinh(dt/T_c)
+        """
+        key = (self.T_c, dt)
+        if key != self._transition_key:
+            c = math.cosh(dt / self.T_c)
+            s = math.sinh(dt / self.T_c)
+            self._transition = (c, self.T_c * s, s / self.T_c)
+            self._transition_key = key
+        return self._transition
+
+    def omega2(self, t):
+        """Calcula ω²(t) = (g + z̈)/z que usan los integradores numéricos."""
+        if self.height_profile is not None:
+            return self.height_profile.omega2(t, self.g)
+        return self.g / self.height
 
     def calculate_orbital_energy(self, y, y_dot):
         """
@@ -101,59 +217,170 @@ class LIPMSimulator:
 
     def update(self):
         """Actualiza el estado del simulador para el siguiente paso de tiempo."""
-        # Incrementar tiempo
-        self.t_rel += TIME_DELTA
-        self.t_abs += TIME_DELTA
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            t_phase = instrumentation.reloj()
+
+        if self.integrator is None:
+            # Calcular el nuevo estado con la matriz de transición cacheada
+            c, ts, s_t = self.transition(self.dt)
+            self.y_t_rel, self.y_dot_t = c * self.y_t_rel + ts * self.y_dot_t, s_t * self.y_t_rel + c * self.y_dot_t
+        else:
+            self.y_t_rel, self.y_dot_t = self.integrator.avanzar(self.y_t_rel, self.y_dot_t, self.t_abs,
+                                                                 self.dt, self.omega2)
+            if self.height_profile is not None:
+                # T_c y la energía orbital siguen a la altura actual
+                self.height = self.height_profile.altura(self.t_abs + self.dt)
+                self.T_c = math.sqrt(self.height / self.g)
 
-        # Calcular el nuevo estado
-        self.y_t_rel = self.calculate_position()
-        self.y_dot_t = self.calculate_velocity()
-        self.y_ddot_t = self.calculate_acceleration()
+        # Incrementar tiempo
+        self.t_rel += self.dt
+        self.t_abs += self.dt
+        # En el LIPM la aceleración es proporcional a la posición: ÿ = y / T_c²
+        self.y_ddot_t = self.y_t_rel / self.T_c ** 2
 
         # Calcular posición y velocidad absolutas
         self.y_abs = self.zmp_y[self.zmp_idx] + self.y_t_rel
 
         # Calcular energía orbital
         self.orbital_energy = self.calculate_orbital_energy(self.y_t_rel, self.y_dot_t)
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('fisica', t_phase)
+
+        # Guardar historial para visualización
+        self.history.agregar(self.t_abs, self.y_abs, self.y_dot_t,
+                             self.zmp_y[self.zmp_idx], self.orbital_energy)
+        if self.recorder is not None:
+            self.recorder.agregar(self.t_abs, self.y_abs, self.y_dot_t, self.y_ddot_t,
+                                  self.zmp_y[self.zmp_idx], codigo_pie(self.foot), self.orbital_energy)
+        if instrumentation is not None:
+            instrumentation.medir('historial', t_phase)
+            instrumentation.contar('pasos')
+
+        # Verificar cambio de ZMP (con colocación en línea siempre hay un paso más)
+        if self.t_abs > self.zmp_time_change[self.zmp_idx] and \
+                (self.placement is not None or self.zmp_idx < len(self.zmp_time_change) - 1):
+            self.switch_support()
+            if instrumentation is not None:
+                instrumentation.contar('cambios_zmp')
+            print(f"Cambio ZMP: {self.zmp_idx}, Pie: {self.foot}")
 
-        # Guardar historiales para visualización
-        self.history_t.append(self.t_abs)
-        self.history_y.append(self.y_abs)
-        self.history_y_dot.append(self.y_dot_t)
-        self.history_zmp.append(self.zmp_y[self.zmp_idx])
-        self.energy_history.append(self.orbital_energy)
+        # Verificar fin de simulación
+        if self.t_abs > self.max_time:
+            return False
 
-        # Verificar cambio de ZMP
-        if self.t_abs > self.zmp_time_change[self.zmp_idx] and self.zmp_idx < len(self.zmp_time_change) - 1:
-            # Registrar posición del pie
-            self.foot_positions.append((self.t_abs, self.zmp_y[self.zmp_idx], self.foot))
+        return True
 
-            # Cambiar índice ZMP
-            self.zmp_idx += 1
+    def switch_support(self):
+        """Cambia al siguiente ZMP alternando el pie y conservando la velocidad."""
+        if self.placement is not None and self.zmp_idx + 1 >= len(self.zmp_y):
+            # Colocación en línea: el siguiente pie sale del estado actual (O(1)).
+            # RF está hacia +y respecto a LF, como en la planificación por defecto
+            side = 1 if self.foot == "LF" else -1
+            zmp = self.placement.siguiente_zmp(self.T_c, self.zmp_y[self.zmp_idx],
+                                               self.y_t_rel, self.y_dot_t, side)
+            self.zmp_y.append(zmp)
+            self.zmp_time_change.append(self.placement.siguiente_cambio(self.t_abs))
 
-            # Alternar pie
-            self.foot = "RF" if self.foot == "LF" else "LF"
+        # Registrar posición del pie
+        self.foot_positions.append((self.t_abs, self.zmp_y[self.zmp_idx], self.foot))
 
-            print(f"Cambio ZMP: {self.zmp_idx}, Pie: {self.foot}")
+        # Cambiar índice ZMP
+        self.zmp_idx += 1
 
-            # Reiniciar tiempo relativo
-            self.t_rel = 0
+        # Alternar pie
+        self.foot = "RF" if self.foot == "LF" else "LF"
 
-            # Conservar velocidad
-            self.y_dot_0 = self.y_dot_t
+        # Reiniciar tiempo relativo
+        self.t_rel = 0
 
-            # Calcular nueva posición inicial relativa
-            self.y_t_rel -= (self.zmp_y[self.zmp_idx] - self.zmp_y[self.zmp_idx - 1])
-            self.y_0_rel = self.y_t_rel
+        # Conservar velocidad
+        self.y_dot_0 = self.y_dot_t
 
-        # Verificar fin de simulación
-        if self.t_abs > MAX_TIME:
+        # Calcular nueva posición inicial relativa
+        self.y_t_rel -= (self.zmp_y[self.zmp_idx] - self.zmp_y[self.zmp_idx - 1])
+        self.y_0_rel = self.y_t_rel
+        self.phases.append(SupportPhase(self.t_abs, self.zmp_y[self.zmp_idx],
+                                        self.y_0_rel, self.y_dot_0, self.foot))
+
+    def advance_to_event(self, max_time=None):
+        """
+        Avanza directamente hasta el siguiente cambio de ZMP sin pasos de dt.
+
+        El cambio es temporal, así que ocurre exactamente en zmp_time_change
+        en lugar de hasta un dt más tarde.
+
+        Args:
+            max_time: Tiempo absoluto máximo (por defecto el del simulador)
+
+        Returns:
+            True si se produjo un cambio de ZMP
+        """
+        max_time = self.max_time if max_time is None else max_time
+        if self.t_abs >= max_time:
             return False
 
-        return True
+        has_switch = self.placement is not None or self.zmp_idx < len(self.zmp_time_change) - 1
+        t_event = max(self.zmp_time_change[self.zmp_idx], self.t_abs) if has_switch else max_time
+        if t_event > max_time:
+            t_event = max_time
+            has_switch = False
 
-    def get_display_data(self):
-        """Retorna los datos para visualización."""
+        self.t_rel += t_event - self.t_abs
+        self.t_abs = t_event
+        self.y_t_rel, self.y_dot_t = self.propagate(self.y_0_rel, self.y_dot_0, self.t_rel)
+        if has_switch:
+            self.switch_support()
+        return has_switch
+
+    def simulate_events(self, max_time=None):
+        """
+        Recorre todas las fases de apoyo saltando de evento en evento.
+
+        Cada fase cuesta O(1); el muestreo de la trayectoria es una etapa
+        aparte y opcional (ver sample_phases).
+
+        Args:
+            max_time: Tiempo absoluto máximo (por defecto el del simulador)
+
+        Returns:
+            Lista de SupportPhase recorridas
+        """
+        while self.advance_to_event(max_time):
+            pass
+        return self.phases
+
+    def initial_arguments(self):
+        """
+        Argumentos de LIPMSimulator (además de height, g y max_time) que
+        repiten esta simulación desde el inicio: planificación inicial,
+        colocación, integrador, perfil de altura y dt.
+        """
+        return dict(self._initial_arguments)
+
+    def recording_parameters(self):
+        """Parámetros del modelo y de la planificación para la cabecera de una grabación."""
+        return {
+            'plano': 'frontal',
+            'altura': self.height,
+            'gravedad': self.g,
+            'dt': self.dt,
+            'velocidad_inicial': self.phases[0].y_dot_0,
+            'zmp': self.zmp_y,
+            'cambios': self.zmp_time_change,
+        }
+
+    def get_display_data(self, copy=False):
+        """
+        Retorna los datos para visualización.
+
+        Args:
+            copy: Si es True, el historial se copia en lugar de devolver vistas
+                (para publicarlo desde el hilo de física, ver lipm_tiempo_real)
+        """
+        records = self.history.vista()
+        if copy:
+            records = records.copy()
         return {
             't': self.t_abs,
             'y': self.y_abs,
@@ -162,19 +389,123 @@ class LIPMSimulator:
             'zmp': self.zmp_y[self.zmp_idx],
             'foot': self.foot,
             'orbital_energy': self.orbital_energy,
-            'history_t': self.history_t,
-            'history_y': self.history_y,
-            'history_y_dot': self.history_y_dot,
-            'history_zmp': self.history_zmp,
-            'foot_positions': self.foot_positions,
-            'energy_history': self.energy_history
+            'history_t': records['t'],
+            'history_y': records['y'],
+            'history_y_dot': records['y_dot'],
+            'history_zmp': records['zmp'],
+            'history_total': self.history.total,
+            'foot_positions': list(self.foot_positions) if copy else self.foot_positions,
+            'energy_history': records['energy']
         }
 
 
+def sample_phases(phases, T_c, times):
+    """
+    Evalúa la trayectoria en instantes arbitrarios a partir de las fases de apoyo.
+
+    Args:
+        phases: Lista de SupportPhase ordenadas por tiempo
+        T_c: Constante de tiempo del LIPM (s)
+        times: Instantes absolutos a muestrear
+
+    Returns:
+        Tupla de arrays (posición absoluta, velocidad, zmp activo)
+    """
+    times = np.asarray(times, dtype=float)
+    starts = np.array([phase.t_start for phase in phases])
+    # Fase activa en cada instante (el cambio pertenece a la nueva fase)
+    idx = np.clip(np.searchsorted(starts, times, side='right') - 1, 0, len(phases) - 1)
+
+    zmp = np.array([phase.zmp for phase in phases])[idx]
+    y_0 = np.array([phase.y_0_rel for phase in phases])[idx]
+    y_dot_0 = np.array([phase.y_dot_0 for phase in phases])[idx]
+
+    tau = (times - starts[idx]) / T_c
+    c = np.cosh(tau)
+    s = np.sinh(tau)
+    return zmp + y_0 * c + T_c * y_dot_0 * s, y_0 * s / T_c + y_dot_0 * c, zmp
+
+
+class RecordingPlayback:
+    """
+    Reproduce una trayectoria grabada (trayectoria.LectorTrayectoria) con la
+    interfaz de LIPMSimulator que usa LIPMVisualizer (get_display_data, height).
+
+    Solo se leen del fichero la fila del instante actual y las muestras de
+    la ventana visible, localizadas por búsqueda binaria.
+    """
+
+    def __init__(self, reader, window=REPLAY_WINDOW):
+        """
+        Inicializa la reproducción.
+
+        Args:
+            reader: LectorTrayectoria abierto
+            window: Segundos de historial visibles
+        """
+        self.reader = reader
+        self.window = window
+        self.height = reader.parametros['altura']
+        self.g = reader.parametros['gravedad']
+        self.t = reader.t_min
+
+    def seek(self, t):
+        """Salta al instante t."""
+        self.t = min(max(t, self.reader.t_min), self.reader.t_max)
+
+    def get_display_data(self):
+        """Retorna los datos para visualización en el instante actual."""
+        index = max(self.reader.indice_tiempo(self.t, 'right') - 1, 0)
+        row = self.reader.fila(index)
+        t = float(row['t'])
+        visible = self.reader.ventana(t - self.window, t)
+        return {
+            't': t,
+            'y': float(row['posicion']),
+            'y_dot': float(row['velocidad']),
+            'y_ddot': float(row['aceleracion']),
+            'zmp': float(row['zmp']),
+            'foot': "RF" if row['pie'] == 1 else "LF",
+            'orbital_energy': float(row['energia_orbital']),
+            'history_t': visible['t'],
+            'history_y': visible['posicion'],
+            'history_y_dot': visible['velocidad'],
+            'history_zmp': visible['zmp'],
+            'history_total': index + 1,
+            'foot_positions': [],
+            'energy_history': visible['energia_orbital']
+        }
+
+
+def foot_outline(width=FOOT_WIDTH):
+    """
+    Silueta frontal del pie de Boby (proyección XZ de Pie.stl), para dibujarlo.
+
+    La silueta se escala a `width` manteniendo sus proporciones, se centra
+    en Y = 0 y queda bajo el suelo (Z <= 0), donde antes estaba el
+    rectángulo. Si no puede leerse el STL se devuelve ese rectángulo.
+
+    Args:
+        width: Ancho del pie dibujado (m)
+
+    Returns:
+        np.ndarray: Vértices del pie derecho (k, 2); el izquierdo es su reflejo
+    """
+    try:
+        from stl_malla import cargar_pieza
+
+        outline = cargar_pieza('Pie').contorno('xz', FOOT_POINTS)
+    except (OSError, ValueError):
+        outline = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 0.5], [0.0, 0.5]])
+    outline = outline - [(outline[:, 0].min() + outline[:, 0].max()) / 2, outline[:, 1].max()]
+    return outline * (width / np.ptp(outline[:, 0]))
+
+
 class LIPMVisualizer:
     """Visualizador para el simulador LIPM."""
 
-    def __init__(self, simulator, save_animation=False, interval=50):
+    def __init__(self, simulator, save_animation=False, interval=50, blit=True,
+                 animate=True, figsize=(14, 10), dpi=None, decoupled=False, instrumentation=None):
         """
         Inicializa el visualizador.
 
@@ -182,13 +513,46 @@ class LIPMVisualizer:
             simulator: Instancia del simulador LIPMSimulator
             save_animation: Si es True, guarda la animación como un archivo GIF
             interval: Intervalo de tiempo entre cuadros de animación (ms)
+            blit: Si es True, solo se redibujan los artistas dinámicos y la
+                figura completa únicamente cuando hay que reescalar un eje
+            animate: Si es False, no se crea la FuncAnimation (render manual)
+            decoupled: Si es True, la física avanza en su propio hilo a ritmo
+                real y cada frame dibuja la última instantánea publicada
+            figsize: Tamaño de la figura (pulgadas)
+            dpi: Resolución de la figura (por defecto la de matplotlib)
+            instrumentation: Instancia de instrumentacion.Instrumentacion; si
+                se indica, los tiempos por fase se muestran sobre la animación
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as patches
+        import matplotlib.gridspec as gridspec
+        from matplotlib.animation import FuncAnimation
+        from matplotlib.transforms import Affine2D
+
         self.simulator = simulator
         self.save_animation = save_animation
         self.interval = interval
+        self.blit = blit
+        self.instrumentation = instrumentation
+
+        # Bucle de física en segundo plano (modo desacoplado)
+        self.loop = None
+        if decoupled:
+            from lipm_tiempo_real import BucleFisica
+
+            self.loop = BucleFisica(self.simulator.update,
+                                    lambda: self.simulator.get_display_data(copy=True),
+                                    dt=self.simulator.dt)
+
+        # Extremos acumulados de cada serie y muestras ya procesadas
+        self.extents = {}
+        self.samples_seen = 0
+
+        # Buffer reutilizable con la altura constante de la trayectoria del CoM
+        self.com_height = np.empty(0)
 
         # Configurar figura y subplots
-        self.fig = plt.figure(figsize=(14, 10))
+        self.fig = plt.figure(figsize=figsize, dpi=dpi)
         self.gs = gridspec.GridSpec(3, 2, height_ratios=[3, 1, 1])
 
         # Subplot principal: Visualización del péndulo
@@ -206,15 +570,30 @@ class LIPMVisualizer:
         self.ln_com_trajectory, = self.ax_pendulum.plot([], [], 'b--', linewidth=1, label='Trayectoria CoM')
         self.ln_zmp, = self.ax_pendulum.plot([], [], 'gx', markersize=8, label='ZMP')
 
-        # Pies (representados como rectángulos)
-        self.left_foot = patches.Rectangle((0, -0.05), 0.1, 0.05, fc='blue', alpha=0.7)
-        self.right_foot = patches.Rectangle((0, -0.05), 0.1, 0.05, fc='red', alpha=0.7)
+        # Pies con la silueta de Pie.stl (el izquierdo reflejado). Los vértices no
+        # cambian: cada frame solo se actualiza la traslación de su transformación
+        right_shape = foot_outline()
+        self.left_offset = Affine2D()
+        self.right_offset = Affine2D()
+        self.left_foot = patches.Polygon(right_shape * [-1, 1], closed=True, fc='blue', alpha=0.7,
+                                         transform=self.left_offset + self.ax_pendulum.transData)
+        self.right_foot = patches.Polygon(right_shape, closed=True, fc='red', alpha=0.7,
+                                          transform=self.right_offset + self.ax_pendulum.transData)
         self.ax_pendulum.add_patch(self.left_foot)
         self.ax_pendulum.add_patch(self.right_foot)
 
-        # Texto para mostrar información
-        self.text_info = self.ax_pendulum.text(0.02, self.simulator.height * 0.9, '',
-                                               fontsize=10, transform=self.ax_pendulum.transAxes)
+        # Texto para mostrar información (dentro de los ejes para poder hacer blit)
+        self.text_info = self.ax_pendulum.text(0.02, 0.95, '', fontsize=10, verticalalignment='top',
+                                               transform=self.ax_pendulum.transAxes)
+
+        # Recuadro con los tiempos por fase (solo con instrumentación)
+        self.text_instrumentation = None
+        if self.instrumentation is not None:
+            self.text_instrumentation = self.ax_pendulum.text(
+                0.98, 0.95, '', fontsize=7, family='monospace', transform=self.ax_pendulum.transAxes,
+                horizontalalignment='right', verticalalignment='top',
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.7)
+            )
 
         # Subplot: Trayectoria de posición y ZMP
         self.ax_position = plt.subplot(self.gs[1, 0])
@@ -257,11 +636,13 @@ class LIPMVisualizer:
         plt.tight_layout()
 
         # Crear animación
-        self.ani = FuncAnimation(
-            self.fig, self.update, frames=self.frames_generator,
-            interval=self.interval, init_func=self.init_animation,
-            blit=False, save_count=MAX_TIME * 50
-        )
+        self.ani = None
+        if animate:
+            self.ani = FuncAnimation(
+                self.fig, self.update, frames=self.frames_generator,
+                interval=self.interval, init_func=self.init_animation,
+                blit=self.blit, save_count=MAX_TIME * 50
+            )
 
     def init_animation(self):
         """Inicializa la animación."""
@@ -269,42 +650,57 @@ class LIPMVisualizer:
         self.ln_mass.set_data([], [])
         self.ln_com_trajectory.set_data([], [])
         self.ln_zmp.set_data([], [])
-        self.left_foot.set_xy((0, -0.05))
-        self.right_foot.set_xy((0, -0.05))
+        self.left_offset.clear()
+        self.right_offset.clear()
         self.text_info.set_text('')
         self.ln_pos_y.set_data([], [])
         self.ln_pos_zmp.set_data([], [])
         self.ln_vel_y.set_data([], [])
         self.ln_phase.set_data([], [])
         self.ln_energy.set_data([], [])
-        return (self.ln_pendulum, self.ln_mass, self.ln_com_trajectory, self.ln_zmp,
-                self.text_info, self.ln_pos_y, self.ln_pos_zmp, self.ln_vel_y,
-                self.ln_phase, self.ln_energy)
+        if self.text_instrumentation is not None:
+            self.text_instrumentation.set_text('')
+        return self.animated_artists()
 
     def update(self, i):
         """Actualiza la animación para el frame i."""
-        # Obtener datos actuales
-        data = self.simulator.get_display_data()
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.frame()
+            if instrumentation.contadores['frames'] % SUMMARY_FRAMES == 0:
+                self.text_instrumentation.set_text(instrumentation.texto())
+            instrumentation.informar_si_toca()
+            t_phase = instrumentation.reloj()
+
+        # Obtener datos actuales (última instantánea en modo desacoplado)
+        data = self.simulator.get_display_data() if self.loop is None else self.loop.ultima()
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('instantanea', t_phase)
 
         # Actualizar péndulo
         self.ln_pendulum.set_data([data['zmp'], data['y']], [0, self.simulator.height])
         self.ln_mass.set_data([data['y']], [self.simulator.height])
 
         # Actualizar trayectoria de CoM
-        self.ln_com_trajectory.set_data(data['history_y'], [self.simulator.height] * len(data['history_y']))
+        n = len(data['history_y'])
+        if len(self.com_height) < n:
+            self.com_height = np.full(max(2 * n, 1024), float(self.simulator.height))
+        self.ln_com_trajectory.set_data(data['history_y'], self.com_height[:n])
 
         # Actualizar ZMP
         self.ln_zmp.set_data([data['zmp']], [0])
 
         # Actualizar pies
         if data['foot'] == "LF":
-            self.left_foot.set_xy((data['zmp'] - 0.05, -0.05))
+            self.left_offset.clear().translate(data['zmp'], 0)
             self.left_foot.set_alpha(1.0)
             self.right_foot.set_alpha(0.3)
         else:
-            self.right_foot.set_xy((data['zmp'] - 0.05, -0.05))
+            self.right_offset.clear().translate(data['zmp'], 0)
             self.right_foot.set_alpha(1.0)
             self.left_foot.set_alpha(0.3)
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('set_data_pendulo', t_phase)
 
         # Actualizar texto de información
         info_text = (
@@ -317,35 +713,132 @@ class LIPMVisualizer:
             f"Energía Orbital: {data['orbital_energy']:.4f}"
         )
         self.text_info.set_text(info_text)
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('texto', t_phase)
 
         # Actualizar gráficas de posición y ZMP
         self.ln_pos_y.set_data(data['history_t'], data['history_y'])
         self.ln_pos_zmp.set_data(data['history_t'], data['history_zmp'])
-        self.ax_position.relim()
-        self.ax_position.autoscale_view()
 
         # Actualizar gráfica de velocidad
         self.ln_vel_y.set_data(data['history_t'], data['history_y_dot'])
-        self.ax_velocity.relim()
-        self.ax_velocity.autoscale_view()
 
         # Actualizar retrato de fase
         self.ln_phase.set_data(data['history_y'], data['history_y_dot'])
-        self.ax_phase.relim()
-        self.ax_phase.autoscale_view()
 
         # Actualizar gráfica de energía orbital
         self.ln_energy.set_data(data['history_t'], data['energy_history'])
-        self.ax_energy.relim()
-        self.ax_energy.autoscale_view()
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('set_data_historial', t_phase)
+
+        # Reescalar solo si algún dato sale de los límites actuales
+        self.update_extents(data)
+        ext = self.extents
+        rescaled = False
+        if ext:
+            rescaled = self.expand_limits(self.ax_position, ext['t'], (min(ext['y'][0], ext['zmp'][0]),
+                                                                       max(ext['y'][1], ext['zmp'][1])))
+            rescaled |= self.expand_limits(self.ax_velocity, ext['t'], ext['y_dot'])
+            rescaled |= self.expand_limits(self.ax_phase, ext['y'], ext['y_dot'])
+            rescaled |= self.expand_limits(self.ax_energy, ext['t'], ext['energy'])
+        if instrumentation is not None:
+            t_phase = instrumentation.medir('autoescalado', t_phase)
+        if rescaled and self.blit:
+            # Redibujo completo: el fondo guardado para el blit queda obsoleto
+            self.fig.canvas.draw()
+            if instrumentation is not None:
+                instrumentation.medir('redibujo', t_phase)
+                instrumentation.contar('redibujos')
+
+        return self.animated_artists()
+
+    def animated_artists(self):
+        """Devuelve los artistas que cambian en cada frame."""
+        artists = (self.ln_pendulum, self.ln_mass, self.ln_com_trajectory, self.ln_zmp,
+                   self.left_foot, self.right_foot, self.text_info, self.ln_pos_y,
+                   self.ln_pos_zmp, self.ln_vel_y, self.ln_phase, self.ln_energy)
+        if self.text_instrumentation is not None:
+            artists += (self.text_instrumentation,)
+        return artists
+
+    def update_extents(self, data):
+        """Actualiza los extremos acumulados con las muestras nuevas del historial."""
+        new = min(data['history_total'] - self.samples_seen, len(data['history_t']))
+        if new <= 0:
+            return
+        self.samples_seen = data['history_total']
+        series = {'t': data['history_t'], 'y': data['history_y'], 'y_dot': data['history_y_dot'],
+                  'zmp': data['history_zmp'], 'energy': data['energy_history']}
+        for name, values in series.items():
+            recent = values[-new:]
+            low, high = float(recent.min()), float(recent.max())
+            if name in self.extents:
+                low = min(low, self.extents[name][0])
+                high = max(high, self.extents[name][1])
+            self.extents[name] = (low, high)
+
+    @staticmethod
+    def expand_limits(ax, x_range, y_range):
+        """
+        Amplía los límites de un eje si los datos se salen de ellos.
 
-        return (self.ln_pendulum, self.ln_mass, self.ln_com_trajectory, self.ln_zmp,
-                self.text_info, self.ln_pos_y, self.ln_pos_zmp, self.ln_vel_y,
-                self.ln_phase, self.ln_energy)
+        Solo se amplía la dirección desbordada, y con un margen HEADROOM
+        proporcional al rango resultante, de modo que los reescalados son
+        poco frecuentes incluso cuando los datos crecen sin límite.
+
+        Returns:
+            True si se han cambiado los límites
+        """
+        def expanded(current, wanted):
+            low, high = current
+            if low <= wanted[0] and wanted[1] <= high:
+                return None
+            low, high = min(low, wanted[0]), max(high, wanted[1])
+            margin = HEADROOM * max(high - low, 1e-3)
+            if wanted[0] < current[0]:
+                low -= margin
+            if wanted[1] > current[1]:
+                high += margin
+            return low, high
+
+        new_x = expanded(ax.get_xlim(), x_range)
+        new_y = expanded(ax.get_ylim(), y_range)
+        if new_x is not None:
+            ax.set_xlim(*new_x)
+        if new_y is not None:
+            ax.set_ylim(*new_y)
+        return new_x is not None or new_y is not None
+
+    def fit_limits(self, data):
+        """Ajusta los límites de las gráficas temporales a los datos visibles."""
+        def span(*series):
+            low = min(float(np.min(values)) for values in series)
+            high = max(float(np.max(values)) for values in series)
+            margin = 0.05 * max(high - low, 1e-3)
+            return low - margin, high + margin
+
+        if not len(data['history_t']):
+            return
+        t_range = span(data['history_t'])
+        self.ax_position.set_xlim(*t_range)
+        self.ax_position.set_ylim(*span(data['history_y'], data['history_zmp']))
+        self.ax_velocity.set_xlim(*t_range)
+        self.ax_velocity.set_ylim(*span(data['history_y_dot']))
+        self.ax_phase.set_xlim(*span(data['history_y']))
+        self.ax_phase.set_ylim(*span(data['history_y_dot']))
+        self.ax_energy.set_xlim(*t_range)
+        self.ax_energy.set_ylim(*span(data['energy_history']))
 
     def frames_generator(self):
         """Generador de frames para la animación."""
         while True:
+            if self.loop is not None:
+                # La física avanza en su hilo; se dibuja hasta su último estado
+                finished = self.loop.terminado
+                yield 1
+                if finished:
+                    break
+                continue
             # Actualizar simulador
             if not self.simulator.update():
                 break
@@ -353,16 +846,99 @@ class LIPMVisualizer:
 
     def show(self):
         """Muestra la animación."""
-        plt.show()
+        import matplotlib.pyplot as plt
+
+        if self.loop is not None:
+            self.loop.iniciar()
+        try:
+            plt.show()
+        finally:
+            if self.loop is not None:
+                self.loop.detener()
+
+    def save(self, filename='lipm_animation.gif', fps=30, dpi=100, size=None, workers=None):
+        """
+        Guarda la animación con el exportador paralelo de lipm_export.
 
-    def save(self, filename='lipm_animation.gif'):
-        """Guarda la animación como un archivo GIF."""
+        La trayectoria se recalcula una vez desde el estado inicial, con la
+        planificación y el dt del simulador, y los frames se renderizan sin
+        ventana, en paralelo y con memoria acotada.
+
+        Args:
+            filename: Fichero de salida (.gif, .rgba o patrón .png con %d)
+            fps: Frames por segundo del resultado
+            dpi: Resolución de render
+            size: Tamaño (ancho, alto) en píxeles; por defecto el de la figura
+            workers: Procesos de render (por defecto, todos los núcleos)
+        """
         if self.save_animation:
+            from lipm_export import export_animation
+
             print(f"Guardando animación como {filename}...")
-            self.ani.save(filename, writer='pillow', fps=30)
+            export_animation(filename, height=self.simulator.height, g=self.simulator.g,
+                             max_time=self.simulator.max_time, fps=fps, dpi=dpi,
+                             size=size, workers=workers, schedule=self.simulator.initial_arguments())
             print(f"Animación guardada correctamente.")
 
 
+def replay(filename, window=REPLAY_WINDOW):
+    """
+    Muestra una trayectoria grabada sin volver a simular.
+
+    Un slider permite saltar a cualquier instante; las flechas avanzan o
+    retroceden un décimo de la ventana, Inicio/Fin van a los extremos y la
+    barra espaciadora reproduce o detiene.
+
+    Args:
+        filename: Fichero de trayectoria (ver trayectoria.py)
+        window: Segundos de historial visibles
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import Slider
+    from trayectoria import LectorTrayectoria
+
+    with LectorTrayectoria(filename) as reader:
+        if not len(reader):
+            sys.exit(f"{filename}: la grabación no tiene muestras (¿se cerró antes del primer paso?)")
+        playback = RecordingPlayback(reader, window)
+        visualizer = LIPMVisualizer(playback, blit=False, animate=False)
+        visualizer.init_animation()
+        visualizer.fig.subplots_adjust(bottom=0.1)
+        slider_ax = visualizer.fig.add_axes([0.2, 0.02, 0.6, 0.02])
+        slider = Slider(slider_ax, 'Tiempo (s)', reader.t_min, max(reader.t_max, reader.t_min + 1e-6),
+                        valinit=reader.t_min)
+        state = {'playing': False}
+
+        def show_instant(t):
+            playback.seek(t)
+            visualizer.update(0)
+            visualizer.fit_limits(playback.get_display_data())
+            visualizer.fig.canvas.draw_idle()
+
+        def on_key(event):
+            jump = 0.1 * window
+            targets = {'right': playback.t + jump, 'left': playback.t - jump,
+                       'home': reader.t_min, 'end': reader.t_max}
+            if event.key == ' ':
+                state['playing'] = not state['playing']
+            elif event.key in targets:
+                slider.set_val(min(max(targets[event.key], reader.t_min), reader.t_max))
+
+        def advance():
+            if state['playing']:
+                if playback.t >= reader.t_max:
+                    state['playing'] = False
+                slider.set_val(min(playback.t + reader.parametros['dt'], reader.t_max))
+
+        slider.on_changed(show_instant)
+        visualizer.fig.canvas.mpl_connect('key_press_event', on_key)
+        timer = visualizer.fig.canvas.new_timer(interval=int(reader.parametros['dt'] * 1000))
+        timer.add_callback(advance)
+        timer.start()
+        show_instant(reader.t_min)
+        plt.show()
+
+
 def parse_arguments():
     """Parsea argumentos de línea de comando."""
     parser = argparse.ArgumentParser(description='Simulador de Péndulo Invertido Lineal en 2D')
@@ -370,40 +946,154 @@ def parse_arguments():
                         help='Altura del péndulo (m)')
     parser.add_argument('--g', type=float, default=G,
                         help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--boby', action='store_true',
+                        help='Usar la altura del CoM de Boby calculada de sus STL (propiedades_masa.py) '
+                             'y escalar la planificación por semejanza')
     parser.add_argument('--max_time', type=float, default=MAX_TIME,
                         help='Tiempo máximo de simulación (s)')
     parser.add_argument('--save', action='store_true',
                         help='Guardar animación como GIF')
     parser.add_argument('--interval', type=int, default=50,
                         help='Intervalo entre frames de animación (ms)')
+    parser.add_argument('--no_blit', action='store_true',
+                        help='Redibujar la figura completa en cada frame')
+    parser.add_argument('--output', default='lipm_animation.gif',
+                        help='Fichero de salida con --save (.gif, .rgba o patrón .png con %%d)')
+    parser.add_argument('--fps', type=int, default=30,
+                        help='Frames por segundo de la animación guardada')
+    parser.add_argument('--dpi', type=int, default=100,
+                        help='Resolución de la animación guardada')
+    parser.add_argument('--size', type=str, default=None,
+                        help='Tamaño en píxeles de la animación guardada (ANCHOxALTO)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos de render para --save (por defecto, todos los núcleos)')
+    parser.add_argument('--decoupled', action='store_true',
+                        help='Avanzar la física en un hilo propio a ritmo real')
+    parser.add_argument('--record', default=None,
+                        help='Fichero donde grabar la trayectoria (formato de trayectoria.py)')
+    parser.add_argument('--replay', default=None,
+                        help='Reproducir una trayectoria grabada con --record')
+    parser.add_argument('--profile', action='store_true',
+                        help='Medir el tiempo de cada fase del bucle y mostrar un resumen')
+    parser.add_argument('--schedule', default=None,
+                        help='Planificación JSON (zmp_y, zmp_time_change, y_dot_0, dt) de optimizador_frontal.py')
+    parser.add_argument('--integrator', choices=list(INTEGRADORES), default=None,
+                        help='Integrador numérico (por defecto, la solución cerrada)')
     return parser.parse_args()
 
 
+def load_schedule(filename):
+    """
+    Carga una planificación de pasos guardada en JSON.
+
+    Args:
+        filename: Fichero generado por optimizador_frontal.py --output
+
+    Returns:
+        Diccionario de argumentos para LIPMSimulator (zmp_y, zmp_time_change,
+        y_dot_0 y dt; los tiempos de cambio se colocan sobre la rejilla de dt)
+    """
+    with open(filename) as f:
+        schedule = json.load(f)
+    return {key: schedule[key] for key in ('zmp_y', 'zmp_time_change', 'y_dot_0', 'dt') if key in schedule}
+
+
+def scale_schedule(schedule, ratio):
+    """
+    Escala una planificación a otra altura del péndulo por semejanza.
+
+    Con posiciones multiplicadas por ratio y tiempos por sqrt(ratio) la
+    ecuación ÿ = y / T_c² no cambia, así que la trayectoria es la misma en
+    unidades de altura y de T_c. El paso de tiempo se escala igual y cada
+    cambio se coloca medio paso antes del paso en el que cae, para que ocurra
+    en el mismo update() sin depender del redondeo de t_abs.
+
+    Args:
+        schedule: Argumentos de planificación para LIPMSimulator (los que
+            falten toman los valores por defecto)
+        ratio: Altura nueva / altura de la planificación
+
+    Returns:
+        Diccionario de argumentos para LIPMSimulator (zmp_y,
+        zmp_time_change, y_dot_0 y dt)
+    """
+    time_ratio = math.sqrt(ratio)
+    base_dt = schedule.get('dt', TIME_DELTA)
+    dt = base_dt * time_ratio
+    # Paso en el que cae cada cambio (el primero con t >= cambio)
+    steps = [math.ceil(t / base_dt - 1e-9) for t in schedule.get('zmp_time_change', ZMP_TIME_CHANGE)]
+    return {
+        'zmp_y': [zmp * ratio for zmp in schedule.get('zmp_y', ZMP_Y)],
+        'zmp_time_change': [(step - 0.5) * dt for step in steps],
+        'y_dot_0': schedule.get('y_dot_0', Y_DOT_0) * time_ratio,
+        'dt': dt,
+    }
+
+
 def main():
     """Función principal."""
     # Parsear argumentos
     args = parse_arguments()
+    schedule = load_schedule(args.schedule) if args.schedule else {}
+    if args.boby:
+        from propiedades_masa import parametros_lipm
+
+        # La planificación está pensada para --height: se lleva a la altura de Boby
+        height, _ = parametros_lipm(args.g)
+        schedule = scale_schedule(schedule, height / args.height)
+        args.max_time *= math.sqrt(height / args.height)
+        args.height = height
+
+    # Reproducir una grabación sin simular
+    if args.replay:
+        replay(args.replay)
+        return
+
+    # Guardar animación sin ventana si se especificó
+    if args.save:
+        from lipm_export import export_animation, parse_size
+
+        export_animation(args.output, height=args.height, g=args.g, max_time=args.max_time,
+                         fps=args.fps, dpi=args.dpi, size=parse_size(args.size),
+                         workers=args.workers, schedule=schedule)
+        return
 
     # Crear simulador
     simulator = LIPMSimulator(
         height=args.height,
         g=args.g,
-        max_time=args.max_time
+        max_time=args.max_time,
+        integrator=crear_integrador(args.integrator) if args.integrator else None,
+        **schedule
     )
 
+    if args.record:
+        from trayectoria import EscritorTrayectoria
+
+        simulator.recorder = EscritorTrayectoria(args.record, simulator.recording_parameters())
+
+    instrumentation = None
+    if args.profile:
+        from instrumentacion import Instrumentacion
+
+        instrumentation = Instrumentacion(periodo_resumen=5.0, intervalo_frame=args.interval / 1000)
+        simulator.instrumentation = instrumentation
+
     # Crear visualizador
     visualizer = LIPMVisualizer(
         simulator=simulator,
-        save_animation=args.save,
-        interval=args.interval
+        interval=args.interval,
+        blit=not args.no_blit,
+        decoupled=args.decoupled,
+        instrumentation=instrumentation
     )
 
     # Mostrar animación
-    visualizer.show()
-
-    # Guardar animación si se especificó
-    if args.save:
-        visualizer.save()
+    try:
+        visualizer.show()
+    finally:
+        if simulator.recorder is not None:
+            simulator.recorder.cerrar()
 
 
 if __name__ == "__main__":
@@ -2,16 +2,28 @@
 """
 Simulador 2D Avanzado del Modelo de Péndulo Invertido Lineal (LIPM)
 Con múltiples gráficos, animación mejorada, controles interactivos y análisis de estabilidad.
+
+El modelo y el simulador no dependen de matplotlib: se importa solo al crear
+un VisualizadorLIPM, así que el módulo puede cargarse en procesos sin ventana.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from matplotlib.widgets import Button, Slider
+import argparse
+import copy
 import math
+import sys
+from collections import namedtuple
 from enum import Enum
 import time
 
+from integradores import INTEGRADORES, IntegradorRK4, crear_integrador
+from lipm_historial import HistorialLIPM, VentanaMinMax
+from trayectoria import SIN_PIE, energia_orbital
+
+FRAMES_RESUMEN = 25  # Frames entre actualizaciones del recuadro de instrumentación
+ZMP_X = [0, 4, 8, 12, 16, 20, 24]  # Posiciones de los ZMP por defecto (m)
+ZMP_X_CHANGE = [2, 6, 10, 14, 18, 22]  # Puntos de cambio por defecto, a mitad de paso (m)
+
 
 class EstadoSimulacion(Enum):
     """Enumeración para los posibles estados de la simulación."""
@@ -20,6 +32,10 @@ class EstadoSimulacion(Enum):
     DETENIDO = 3
 
 
+# Fase de apoyo: instante de inicio, ZMP activo y estado relativo inicial
+FaseApoyo = namedtuple('FaseApoyo', ['t_inicio', 'zmp', 'x_0_rel', 'x_dot_0'])
+
+
 class ModeloLIPM:
     """
     Modelo matemático del Péndulo Invertido Lineal (LIPM).
@@ -38,6 +54,9 @@ class ModeloLIPM:
         self.gravedad = gravedad
         # Constante de tiempo del péndulo invertido
         self.T_c = math.sqrt(self.altura / self.gravedad)
+        # Matriz de transición cacheada para un dt fijo
+        self._clave_transicion = None
+        self._transicion = None
 
     def actualizar_parametros(self, altura=None, gravedad=None):
         """Actualiza los parámetros físicos del modelo."""
@@ -46,10 +65,47 @@ class ModeloLIPM:
         if gravedad is not None:
             self.gravedad = gravedad
         self.T_c = math.sqrt(self.altura / self.gravedad)
+        self._clave_transicion = None
+
+    def transicion(self, dt):
+        """
+        Coeficientes de la matriz de transición Φ(dt) = [[c, T_c·s], [s/T_c, c]].
+
+        Se calculan una vez por cada par (T_c, dt) y se reutilizan en todos
+        los pasos siguientes; cambiar los parámetros del modelo los invalida.
+
+        Args:
+            dt (float): Incremento de tiempo
+
+        Returns:
+            tuple: (c, T_c·s, s/T_c) con c = cosh(dt/T_c) y s = sinh(dt/T_c)
+        """
+        clave = (self.T_c, dt)
+        if clave != self._clave_transicion:
+            c = math.cosh(dt / self.T_c)
+            s = math.sinh(dt / self.T_c)
+            self._transicion = (c, self.T_c * s, s / self.T_c)
+            self._clave_transicion = clave
+        return self._transicion
+
+    def avanzar_estado(self, x, x_dot, dt):
+        """
+        Avanza un estado relativo un dt con la matriz de transición cacheada.
+
+        Args:
+            x (float): Posición actual relativa al ZMP
+            x_dot (float): Velocidad actual
+            dt (float): Incremento de tiempo
+
+        Returns:
+            tuple: (posición relativa, velocidad) tras dt
+        """
+        c, ts, s_t = self.transicion(dt)
+        return c * x + ts * x_dot, s_t * x + c * x_dot
 
-    def calcular_posicion(self, x_0, x_dot_0, t):
+    def calcular_estado(self, x_0, x_dot_0, t):
         """
-        Calcula la posición del péndulo en el tiempo t.
+        Calcula posición y velocidad en el tiempo t con un único par cosh/sinh.
 
         Args:
             x_0 (float): Posición inicial relativa al ZMP
@@ -57,25 +113,49 @@ class ModeloLIPM:
             t (float): Tiempo transcurrido
 
         Returns:
-            float: Posición relativa en el tiempo t
+            tuple: (posición relativa, velocidad)
         """
-        return (x_0 * math.cosh(t / self.T_c)) + \
-            self.T_c * x_dot_0 * math.sinh(t / self.T_c)
+        c = math.cosh(t / self.T_c)
+        s = math.sinh(t / self.T_c)
+        return x_0 * c + self.T_c * x_dot_0 * s, x_0 * s / self.T_c + x_dot_0 * c
 
-    def calcular_velocidad(self, x_0, x_dot_0, t):
+    def tiempo_hasta_posicion(self, x_0, x_dot_0, x_objetivo):
         """
-        Calcula la velocidad del péndulo en el tiempo t.
+        Resuelve analíticamente el primer instante en que el péndulo alcanza
+        una posición relativa dada.
+
+        La solución x(t) = a·e^(t/T_c) + b·e^(-t/T_c) convierte la condición
+        x(t) = x_objetivo en una ecuación de segundo grado en u = e^(t/T_c).
 
         Args:
             x_0 (float): Posición inicial relativa al ZMP
             x_dot_0 (float): Velocidad inicial
-            t (float): Tiempo transcurrido
+            x_objetivo (float): Posición relativa a alcanzar
 
         Returns:
-            float: Velocidad en el tiempo t
+            float: Tiempo hasta el cruce, o None si nunca se alcanza
         """
-        return (x_0 * math.sinh(t / self.T_c) / self.T_c) + \
-            x_dot_0 * math.cosh(t / self.T_c)
+        if x_0 >= x_objetivo:
+            return 0.0
+
+        a = 0.5 * (x_0 + self.T_c * x_dot_0)
+        b = 0.5 * (x_0 - self.T_c * x_dot_0)
+
+        # a·u² - x_objetivo·u + b = 0, con u >= 1
+        discriminante = x_objetivo ** 2 - 4 * a * b
+        if discriminante < 0:
+            return None
+        if a == 0:
+            raices = [b / x_objetivo] if x_objetivo != 0 else []
+        else:
+            # Forma numéricamente estable de las dos raíces
+            q = 0.5 * (x_objetivo + math.copysign(math.sqrt(discriminante), x_objetivo))
+            raices = [q / a, b / q] if q != 0 else [0.0]
+
+        validas = [u for u in raices if u >= 1]
+        if not validas:
+            return None
+        return self.T_c * math.log(min(validas))
 
     def calcular_energia(self, x, x_dot):
         """
@@ -101,47 +181,168 @@ class SimuladorLIPM:
     y almacena el historial de estados.
     """
 
-    def __init__(self, modelo, dt=0.02):
+    def __init__(self, modelo, dt=0.02, capacidad_historial=4096, historial_circular=False,
+                 x_dot_0=0.3, zmp_x=None, zmp_x_change=None, colocacion=None,
+                 integrador=None, perfil_altura=None):
         """
         Inicializa el simulador.
 
         Args:
             modelo (ModeloLIPM): Modelo físico a utilizar
             dt (float): Incremento de tiempo por paso (en segundos)
+            capacidad_historial (int): Muestras preasignadas en el historial
+            historial_circular (bool): Conservar solo las últimas muestras
+            x_dot_0 (float): Velocidad inicial (en m/s)
+            zmp_x (list): Posiciones de los ZMP (por defecto, pasos de 4 m)
+            zmp_x_change (list): Puntos de cambio de ZMP (por defecto, a mitad de paso)
+            colocacion (ColocacionSagital): Si se indica, cada nuevo ZMP y su
+                umbral de cambio se eligen en línea a partir del estado (ver
+                colocacion_pasos.py); zmp_x y zmp_x_change solo dan el inicio
+            integrador (Integrador): Integrador numérico de cada paso (ver
+                integradores.py); por defecto, la matriz de transición Φ(dt)
+            perfil_altura (PerfilAltura): Altura del CoM en función del tiempo;
+                sin integrador indicado se usa RK4. El modo por eventos
+                (avanzar_hasta_evento) supone altura constante. La altura
+                del perfil se aplica a una copia del modelo (self.modelo),
+                así que el modelo recibido no cambia
         """
+        if perfil_altura is not None:
+            modelo = copy.copy(modelo)
         self.modelo = modelo
         self.dt = dt
+        self.capacidad_historial = capacidad_historial
+        self.historial_circular = historial_circular
+        self.colocacion = colocacion
+        self.perfil_altura = perfil_altura
+        if integrador is None and perfil_altura is not None:
+            integrador = IntegradorRK4()
+        self.integrador = integrador
+        if perfil_altura is not None:
+            modelo.actualizar_parametros(altura=perfil_altura.altura(0))
 
         # Puntos de momento cero (ZMP)
-        self.zmp_x = [0, 4, 8, 12, 16, 20, 24]  # Posiciones de los ZMP
-        self.zmp_x_change = [2, 6, 10, 14, 18, 22]  # Puntos de cambio de ZMP
+        if zmp_x is None:
+            zmp_x = ZMP_X if colocacion is None else [0]
+        if zmp_x_change is None:
+            zmp_x_change = ZMP_X_CHANGE if colocacion is None else [colocacion.siguiente_umbral(zmp_x[0])]
+        # Planificación inicial (en modo en línea las listas crecen con cada paso)
+        self.zmp_x_inicial, self.zmp_x_change_inicial = list(zmp_x), list(zmp_x_change)
+        self.zmp_x = list(zmp_x)  # Posiciones de los ZMP
+        self.zmp_x_change = list(zmp_x_change)  # Puntos de cambio de ZMP
         self.zmp_idx = 0  # Índice del ZMP actual
 
         # Estado actual
         self.t_abs = 0  # Tiempo absoluto
         self.t_rel = 0  # Tiempo relativo al último cambio de ZMP
-        self.x_dot_0 = 0.3  # Velocidad inicial
+        self.x_dot_inicial = x_dot_0
+        self.x_dot_0 = x_dot_0  # Velocidad inicial
         self.x_0_rel = 0  # Posición inicial relativa al ZMP actual
         self.estado = EstadoSimulacion.EJECUTANDO
 
-        # Historiales
-        self.historial_tiempo = []
-        self.historial_posicion = []
-        self.historial_velocidad = []
-        self.historial_energia = []
-        self.historial_zmp = []
+        # Fases de apoyo recorridas (una entrada por cambio de ZMP o de altura)
+        self.fases = [FaseApoyo(0, self.zmp_x[0], self.x_0_rel, self.x_dot_0)]
+
+        # Historial preasignado (tiempo, posición, velocidad, energía, zmp)
+        self.historial = HistorialLIPM(
+            ('tiempo', 'posicion', 'velocidad', 'energia', 'zmp'),
+            capacidad=capacidad_historial, circular=historial_circular
+        )
 
         # Estados adicionales para cálculos
-        self.x_t_rel = 0  # Posición relativa actual
-        self.x_dot_t = 0  # Velocidad actual
+        self.x_t_rel = self.x_0_rel  # Posición relativa actual
+        self.x_dot_t = self.x_dot_0  # Velocidad actual
+
+        # Grabación opcional de la trayectoria (ver trayectoria.EscritorTrayectoria)
+        self.grabador = None
+        self.desfase_grabacion = 0  # Tiempo grabado antes del último reinicio
+
+        # Temporizadores por fase opcionales (ver instrumentacion.Instrumentacion)
+        self.instrumentacion = None
 
         # Tiempo de la última actualización (para pausas)
         self.ultimo_tiempo_real = time.time()
         self.tiempo_pausado = 0
 
+    @property
+    def historial_tiempo(self):
+        """Vista de los tiempos almacenados."""
+        return self.historial['tiempo']
+
+    @property
+    def historial_posicion(self):
+        """Vista de las posiciones absolutas almacenadas."""
+        return self.historial['posicion']
+
+    @property
+    def historial_velocidad(self):
+        """Vista de las velocidades almacenadas."""
+        return self.historial['velocidad']
+
+    @property
+    def historial_energia(self):
+        """Vista de las energías totales almacenadas."""
+        return self.historial['energia']
+
+    @property
+    def historial_zmp(self):
+        """Vista de los ZMP activos almacenados."""
+        return self.historial['zmp']
+
     def reiniciar(self):
         """Reinicia la simulación a su estado inicial."""
-        self.__init__(self.modelo, self.dt)
+        # La grabación continúa tras el reinicio con tiempos crecientes
+        grabador, desfase = self.grabador, self.desfase_grabacion + self.t_abs
+        instrumentacion = self.instrumentacion
+        self.__init__(self.modelo, self.dt, self.capacidad_historial, self.historial_circular,
+                      self.x_dot_inicial, self.zmp_x_inicial, self.zmp_x_change_inicial, self.colocacion,
+                      self.integrador, self.perfil_altura)
+        self.grabador, self.desfase_grabacion = grabador, desfase
+        self.instrumentacion = instrumentacion
+
+    def omega2(self, t):
+        """
+        Calcula ω²(t) = (g + z̈)/z que usan los integradores numéricos.
+
+        Args:
+            t (float): Tiempo absoluto
+
+        Returns:
+            float: ω² en 1/s²
+        """
+        if self.perfil_altura is not None:
+            return self.perfil_altura.omega2(t, self.modelo.gravedad)
+        return self.modelo.gravedad / self.modelo.altura
+
+    def cambiar_altura(self, altura):
+        """
+        Cambia la altura del modelo a mitad de fase sin saltos.
+
+        El estado actual pasa a ser el inicial de la fase, de modo que la
+        solución cerrada con la nueva T_c continúa desde donde está el CoM
+        en lugar de reevaluarse desde el x_0_rel de antes del cambio. Por lo
+        mismo se abre una fase nueva en self.fases; muestrear_fases usa la
+        T_c actual del modelo, así que solo es exacto desde este cambio.
+
+        Args:
+            altura (float): Nueva altura del centro de masa (m)
+        """
+        self.modelo.actualizar_parametros(altura=altura)
+        self.x_0_rel, self.x_dot_0 = self.x_t_rel, self.x_dot_t
+        self.t_rel = 0
+        # El ZMP activo es el de la última fase (también con la simulación detenida)
+        self.fases.append(FaseApoyo(self.t_abs, self.fases[-1].zmp, self.x_0_rel, self.x_dot_0))
+
+    def parametros_grabacion(self):
+        """Parámetros del modelo y de la planificación para la cabecera de una grabación."""
+        return {
+            'plano': 'sagital',
+            'altura': self.modelo.altura,
+            'gravedad': self.modelo.gravedad,
+            'dt': self.dt,
+            'velocidad_inicial': self.x_dot_inicial,
+            'zmp': self.zmp_x,
+            'cambios': self.zmp_x_change,
+        }
 
     def pausar_reanudar(self):
         """Alterna entre pausa y ejecución."""
@@ -166,64 +367,219 @@ class SimuladorLIPM:
         if self.estado != EstadoSimulacion.EJECUTANDO:
             return self.zmp_x[self.zmp_idx] + self.x_t_rel, self.zmp_x[self.zmp_idx]
 
+        instrumentacion = self.instrumentacion
+        if instrumentacion is not None:
+            t_medida = instrumentacion.reloj()
+
+        if self.integrador is None:
+            # Calcular nuevo estado (solo multiplicaciones y sumas con Φ(dt) cacheada)
+            self.x_t_rel, self.x_dot_t = self.modelo.avanzar_estado(self.x_t_rel, self.x_dot_t, self.dt)
+        else:
+            self.x_t_rel, self.x_dot_t = self.integrador.avanzar(self.x_t_rel, self.x_dot_t, self.t_abs,
+                                                                 self.dt, self.omega2)
+            if self.perfil_altura is not None:
+                # T_c y la energía del modelo siguen a la altura actual
+                self.modelo.actualizar_parametros(altura=self.perfil_altura.altura(self.t_abs + self.dt))
+
         # Actualizar tiempos
         self.t_rel += self.dt
         self.t_abs += self.dt
 
-        # Calcular nuevo estado
-        self.x_t_rel = self.modelo.calcular_posicion(self.x_0_rel, self.x_dot_0, self.t_rel)
-        self.x_dot_t = self.modelo.calcular_velocidad(self.x_0_rel, self.x_dot_0, self.t_rel)
-
         # Calcular posición absoluta
         posicion_actual = self.zmp_x[self.zmp_idx] + self.x_t_rel
 
         # Calcular energías
         energia_pot, energia_cin, energia_total = self.modelo.calcular_energia(self.x_t_rel, self.x_dot_t)
-
-        # Almacenar historiales
-        self.historial_tiempo.append(self.t_abs)
-        self.historial_posicion.append(posicion_actual)
-        self.historial_velocidad.append(self.x_dot_t)
-        self.historial_energia.append(energia_total)
-        self.historial_zmp.append(self.zmp_x[self.zmp_idx])
+        if instrumentacion is not None:
+            t_medida = instrumentacion.medir('fisica', t_medida)
+
+        # Almacenar historial
+        self.historial.agregar(self.t_abs, posicion_actual, self.x_dot_t,
+                               energia_total, self.zmp_x[self.zmp_idx])
+        if self.grabador is not None:
+            self.grabador.agregar(
+                self.desfase_grabacion + self.t_abs, posicion_actual, self.x_dot_t,
+                self.x_t_rel / self.modelo.T_c ** 2, self.zmp_x[self.zmp_idx], SIN_PIE,
+                energia_orbital(self.modelo.altura, self.modelo.gravedad, self.x_t_rel, self.x_dot_t)
+            )
+        if instrumentacion is not None:
+            instrumentacion.medir('historial', t_medida)
+            instrumentacion.contar('pasos')
 
         # Lógica de cambio de ZMP
         if self.zmp_idx < len(self.zmp_x_change) and posicion_actual > self.zmp_x_change[self.zmp_idx]:
-            self.zmp_idx += 1
-            if self.zmp_idx >= len(self.zmp_x):
-                # Límite alcanzado
-                self.estado = EstadoSimulacion.DETENIDO
+            if instrumentacion is not None:
+                instrumentacion.contar('cambios_zmp')
+            if not self._cambiar_zmp():
                 return posicion_actual, self.zmp_x[self.zmp_idx - 1]
 
-            # Actualizar estado para el nuevo ZMP
-            self.t_rel = 0
-            self.x_dot_0 = self.x_dot_t
-            # La posición relativa se ajusta con respecto al nuevo ZMP
-            self.x_t_rel -= (self.zmp_x[self.zmp_idx] - self.zmp_x[self.zmp_idx - 1])
-            self.x_0_rel = self.x_t_rel
-
         return posicion_actual, self.zmp_x[self.zmp_idx]
 
+    def _cambiar_zmp(self):
+        """
+        Pasa al siguiente ZMP conservando la velocidad actual.
+
+        Returns:
+            bool: False si no quedan más ZMP y la simulación se detiene
+        """
+        if self.colocacion is not None and self.zmp_idx + 1 >= len(self.zmp_x):
+            # Colocación en línea: el siguiente pie sale del estado actual (O(1))
+            zmp = self.colocacion.siguiente_zmp(self.modelo.T_c, self.zmp_x[self.zmp_idx],
+                                                self.x_t_rel, self.x_dot_t)
+            self.zmp_x.append(zmp)
+            self.zmp_x_change.append(self.colocacion.siguiente_umbral(zmp))
+        self.zmp_idx += 1
+        if self.zmp_idx >= len(self.zmp_x):
+            # Límite alcanzado
+            self.estado = EstadoSimulacion.DETENIDO
+            return False
+
+        # Actualizar estado para el nuevo ZMP
+        self.t_rel = 0
+        self.x_dot_0 = self.x_dot_t
+        # La posición relativa se ajusta con respecto al nuevo ZMP
+        self.x_t_rel -= (self.zmp_x[self.zmp_idx] - self.zmp_x[self.zmp_idx - 1])
+        self.x_0_rel = self.x_t_rel
+        self.fases.append(FaseApoyo(self.t_abs, self.zmp_x[self.zmp_idx],
+                                    self.x_0_rel, self.x_dot_0))
+        return True
+
+    def avanzar_hasta_evento(self, t_max=None):
+        """
+        Avanza directamente hasta el siguiente cambio de ZMP sin pasos de dt.
+
+        El instante de cambio se obtiene resolviendo analíticamente el cruce
+        del umbral de posición, así que no hay retraso de hasta un dt.
+
+        Args:
+            t_max (float): Tiempo absoluto máximo; si el cambio ocurre después,
+                el estado se lleva hasta t_max y no se cambia de ZMP
+
+        Returns:
+            bool: True si se produjo un cambio de ZMP
+        """
+        if self.estado != EstadoSimulacion.EJECUTANDO:
+            return False
+
+        t_evento = None
+        if self.zmp_idx < len(self.zmp_x_change):
+            umbral_rel = self.zmp_x_change[self.zmp_idx] - self.zmp_x[self.zmp_idx]
+            t_evento = self.modelo.tiempo_hasta_posicion(self.x_0_rel, self.x_dot_0, umbral_rel)
+            if t_evento is not None:
+                t_evento = max(t_evento, self.t_rel)
+
+        hay_cambio = t_evento is not None and (t_max is None or self.t_abs - self.t_rel + t_evento <= t_max)
+        if hay_cambio:
+            self.t_abs += t_evento - self.t_rel
+            self.t_rel = t_evento
+        elif t_max is not None and t_max > self.t_abs:
+            self.t_rel += t_max - self.t_abs
+            self.t_abs = t_max
+        else:
+            return False
+
+        self.x_t_rel, self.x_dot_t = self.modelo.calcular_estado(self.x_0_rel, self.x_dot_0, self.t_rel)
+        return hay_cambio and self._cambiar_zmp()
+
+    def simular_eventos(self, t_max=None):
+        """
+        Recorre todas las fases de apoyo saltando de evento en evento.
+
+        Cada fase cuesta O(1) independientemente de su duración. El muestreo
+        de la trayectoria es una etapa aparte (ver muestrear_fases).
+
+        Args:
+            t_max (float): Tiempo absoluto máximo de simulación
+
+        Returns:
+            list: Lista de FaseApoyo recorridas
+        """
+        while self.avanzar_hasta_evento(t_max):
+            pass
+        return self.fases
+
+
+def muestrear_fases(modelo, fases, tiempos):
+    """
+    Evalúa la trayectoria en instantes arbitrarios a partir de las fases de apoyo.
+
+    Args:
+        modelo (ModeloLIPM): Modelo físico usado en la simulación
+        fases (list): Lista de FaseApoyo ordenadas por tiempo
+        tiempos (array): Instantes absolutos a muestrear
+
+    Returns:
+        tuple: (posiciones absolutas, velocidades, zmp activo) como arrays
+    """
+    tiempos = np.asarray(tiempos, dtype=float)
+    inicios = np.array([fase.t_inicio for fase in fases])
+    # Fase activa en cada instante (el cambio pertenece a la nueva fase)
+    idx = np.clip(np.searchsorted(inicios, tiempos, side='right') - 1, 0, len(fases) - 1)
+
+    zmp = np.array([fase.zmp for fase in fases])[idx]
+    x_0 = np.array([fase.x_0_rel for fase in fases])[idx]
+    x_dot_0 = np.array([fase.x_dot_0 for fase in fases])[idx]
+
+    t_rel = (tiempos - inicios[idx]) / modelo.T_c
+    c = np.cosh(t_rel)
+    s = np.sinh(t_rel)
+    posiciones = zmp + x_0 * c + modelo.T_c * x_dot_0 * s
+    velocidades = x_0 * s / modelo.T_c + x_dot_0 * c
+    return posiciones, velocidades, zmp
+
 
 class VisualizadorLIPM:
     """
     Gestiona la visualización gráfica y la animación del simulador LIPM.
     """
 
-    def __init__(self, simulador):
+    def __init__(self, simulador, desacoplado=False, grabacion=None, instrumentacion=None):
         """
         Inicializa el visualizador.
 
         Args:
             simulador (SimuladorLIPM): Simulador a visualizar
+            desacoplado (bool): Avanzar la física en un hilo propio a ritmo real;
+                cada frame dibuja la última instantánea publicada
+            grabacion (LectorTrayectoria): Si se indica, el visualizador
+                reproduce esa grabación en lugar de simular
+            instrumentacion (Instrumentacion): Temporizadores por fase; si se
+                indica se muestran en un recuadro sobre la animación
         """
         self.simulador = simulador
+        self.ventana = 10  # Segundos de historial visibles
+        self.instrumentacion = instrumentacion
+
+        # Modo reproducción: instante mostrado y estado del avance automático
+        self.grabacion = grabacion
+        self.reproduciendo = False
+        self.t_reproduccion = grabacion.t_min if grabacion is not None and len(grabacion) else 0
+
+        # Bucle de física en segundo plano (modo desacoplado)
+        self.bucle = None
+        if desacoplado:
+            from lipm_tiempo_real import BucleFisica
+
+            self.bucle = BucleFisica(
+                self.simulador.paso, lambda: self._instantanea(copiar=True), dt=simulador.dt,
+                en_marcha=lambda: self.simulador.estado == EstadoSimulacion.EJECUTANDO
+            )
+
+        # Mínimos y máximos de la ventana visible para el autoescalado
+        self.ventanas_minmax = {campo: VentanaMinMax()
+                                for campo in ('posicion', 'velocidad', 'energia')}
+        self._historial_visto = None
+        self._muestras_vistas = 0
+
         self.creando_widgets = True
         self.configurar_figura()
         self.creando_widgets = False
 
     def configurar_figura(self):
         """Configura la figura de matplotlib con todos los subgráficos y controles."""
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Button, Slider
+
         # Crear figura con 4 subgráficos
         self.fig = plt.figure(figsize=(12, 10))
         gs = self.fig.add_gridspec(4, 1, height_ratios=[2, 1, 1, 1], hspace=0.3)
@@ -280,20 +636,32 @@ class VisualizadorLIPM:
 
         # Botones de control
         self.ax_boton_pausa = plt.axes([0.81, 0.02, 0.1, 0.04])
-        self.boton_pausa = Button(self.ax_boton_pausa, 'Pausar')
+        self.boton_pausa = Button(self.ax_boton_pausa,
+                                  'Pausar' if self.grabacion is None else 'Reproducir')
         self.boton_pausa.on_clicked(self.accion_pausar)
 
         self.ax_boton_reiniciar = plt.axes([0.7, 0.02, 0.1, 0.04])
         self.boton_reiniciar = Button(self.ax_boton_reiniciar, 'Reiniciar')
         self.boton_reiniciar.on_clicked(self.accion_reiniciar)
 
-        # Sliders para parámetros
-        self.ax_slider_altura = plt.axes([0.25, 0.02, 0.3, 0.03])
-        self.slider_altura = Slider(
-            self.ax_slider_altura, 'Altura (m)',
-            0.5, 2.0, valinit=self.simulador.modelo.altura
-        )
-        self.slider_altura.on_changed(self.accion_cambiar_altura)
+        if self.grabacion is None:
+            # Sliders para parámetros
+            self.ax_slider_altura = plt.axes([0.25, 0.02, 0.3, 0.03])
+            self.slider_altura = Slider(
+                self.ax_slider_altura, 'Altura (m)',
+                0.5, 2.0, valinit=self.simulador.modelo.altura
+            )
+            self.slider_altura.on_changed(self.accion_cambiar_altura)
+        else:
+            # Slider y teclas para saltar a cualquier instante de la grabación
+            self.ax_slider_tiempo = plt.axes([0.25, 0.02, 0.3, 0.03])
+            self.slider_tiempo = Slider(
+                self.ax_slider_tiempo, 'Tiempo (s)',
+                self.grabacion.t_min, max(self.grabacion.t_max, self.grabacion.t_min + 1e-6),
+                valinit=self.t_reproduccion
+            )
+            self.slider_tiempo.on_changed(self.accion_mover_tiempo)
+            self.fig.canvas.mpl_connect('key_press_event', self.accion_tecla)
 
         # Etiqueta para mostrar información durante la simulación
         self.texto_info = self.ax_pendulo.text(
@@ -301,23 +669,81 @@ class VisualizadorLIPM:
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5)
         )
 
+        # Recuadro con los tiempos por fase (solo con instrumentación)
+        self.texto_instrumentacion = None
+        if self.instrumentacion is not None:
+            self.texto_instrumentacion = self.ax_pendulo.text(
+                0.98, 0.05, '', transform=self.ax_pendulo.transAxes, family='monospace',
+                fontsize=7, horizontalalignment='right', verticalalignment='bottom',
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.7)
+            )
+
+    def _aplicar(self, accion, *args, **kwargs):
+        """Ejecuta una acción sobre el simulador, entre dos tics si la física va en otro hilo."""
+        if self.bucle is None:
+            accion(*args, **kwargs)
+        else:
+            self.bucle.encolar(accion, *args, **kwargs)
+
     def accion_pausar(self, event):
         """Acción para el botón de pausar/reanudar."""
+        if self.grabacion is not None:
+            self.reproduciendo = not self.reproduciendo
+            self.boton_pausa.label.set_text('Pausar' if self.reproduciendo else 'Reproducir')
+            return
         if not self.creando_widgets:
-            self.simulador.pausar_reanudar()
-            texto = 'Reanudar' if self.simulador.estado == EstadoSimulacion.PAUSADO else 'Pausar'
-            self.boton_pausa.label.set_text(texto)
+            pausara = self.simulador.estado == EstadoSimulacion.EJECUTANDO
+            self._aplicar(self.simulador.pausar_reanudar)
+            self.boton_pausa.label.set_text('Reanudar' if pausara else 'Pausar')
 
     def accion_reiniciar(self, event):
         """Acción para el botón de reiniciar."""
+        if self.grabacion is not None:
+            self.slider_tiempo.set_val(self.grabacion.t_min)
+            return
         if not self.creando_widgets:
-            self.simulador.reiniciar()
+            self._aplicar(self.simulador.reiniciar)
             self.boton_pausa.label.set_text('Pausar')
 
     def accion_cambiar_altura(self, val):
         """Acción para el slider de altura."""
         if not self.creando_widgets:
-            self.simulador.modelo.actualizar_parametros(altura=val)
+            self._aplicar(self.simulador.cambiar_altura, val)
+
+    def accion_mover_tiempo(self, val):
+        """Acción para el slider de tiempo (modo reproducción)."""
+        self.t_reproduccion = val
+        self._dibujar(self._instantanea_grabacion(val))
+        self.fig.canvas.draw_idle()
+
+    def accion_tecla(self, event):
+        """
+        Teclas del modo reproducción: flechas para avanzar o retroceder un
+        décimo de la ventana, Inicio/Fin para ir a los extremos y espacio
+        para reproducir o detener.
+        """
+        salto = 0.1 * self.ventana
+        destinos = {
+            'right': self.t_reproduccion + salto,
+            'left': self.t_reproduccion - salto,
+            'home': self.grabacion.t_min,
+            'end': self.grabacion.t_max,
+        }
+        if event.key == ' ':
+            self.accion_pausar(event)
+        elif event.key in destinos:
+            t = min(max(destinos[event.key], self.grabacion.t_min), self.grabacion.t_max)
+            self.slider_tiempo.set_val(t)
+
+    def _avanzar_reproduccion(self):
+        """Avanza la reproducción un dt (llamado por el temporizador de la figura)."""
+        if not self.reproduciendo:
+            return
+        t = self.t_reproduccion + self.simulador.dt
+        if t >= self.grabacion.t_max:
+            t = self.grabacion.t_max
+            self.accion_pausar(None)
+        self.slider_tiempo.set_val(t)
 
     def inicializar_animacion(self):
         """
@@ -333,9 +759,18 @@ class VisualizadorLIPM:
         self.linea_energia.set_data([], [])
         self.linea_zmp.set_data([], [])
         self.texto_info.set_text('')
-        return [self.linea_pendulo, self.punto_zmp, self.linea_posicion,
-                self.linea_velocidad, self.linea_energia, self.linea_zmp,
-                self.texto_info]
+        if self.texto_instrumentacion is not None:
+            self.texto_instrumentacion.set_text('')
+        return self._artistas()
+
+    def _artistas(self):
+        """Artistas que cambian en cada frame."""
+        artistas = [self.linea_pendulo, self.punto_zmp, self.linea_posicion,
+                    self.linea_velocidad, self.linea_energia, self.linea_zmp,
+                    self.texto_info]
+        if self.texto_instrumentacion is not None:
+            artistas.append(self.texto_instrumentacion)
+        return artistas
 
     def animar(self, i):
         """
@@ -347,105 +782,333 @@ class VisualizadorLIPM:
         Returns:
             list: Lista de artistas gráficos actualizados
         """
-        # Actualizar el simulador
-        posicion_actual, zmp_actual = self.simulador.paso()
+        instrumentacion = self.instrumentacion
+        if instrumentacion is not None:
+            instrumentacion.frame()
+            if instrumentacion.contadores['frames'] % FRAMES_RESUMEN == 0:
+                self.texto_instrumentacion.set_text(instrumentacion.texto())
+            instrumentacion.informar_si_toca()
+
+        if self.bucle is None:
+            # Actualizar el simulador en el propio frame
+            self.simulador.paso()
+            datos = self._instantanea()
+        else:
+            datos = self.bucle.ultima()
+        return self._dibujar(datos)
+
+    def _dibujar(self, datos):
+        """
+        Actualiza los artistas a partir de una instantánea.
+
+        Args:
+            datos (dict): Instantánea de _instantanea o _instantanea_grabacion
+
+        Returns:
+            list: Lista de artistas gráficos actualizados
+        """
+        instrumentacion = self.instrumentacion
+        if instrumentacion is not None:
+            t_medida = instrumentacion.reloj()
 
         # Actualizar elementos gráficos
         self.linea_pendulo.set_data(
-            [zmp_actual, posicion_actual],
-            [0, self.simulador.modelo.altura]
-        )
-        self.punto_zmp.set_data([zmp_actual], [0])
-
-        # Actualizar gráficos de historial
-        self.linea_posicion.set_data(
-            self.simulador.historial_tiempo,
-            self.simulador.historial_posicion
-        )
-        self.linea_zmp.set_data(
-            self.simulador.historial_tiempo,
-            self.simulador.historial_zmp
-        )
-        self.linea_velocidad.set_data(
-            self.simulador.historial_tiempo,
-            self.simulador.historial_velocidad
-        )
-        self.linea_energia.set_data(
-            self.simulador.historial_tiempo,
-            self.simulador.historial_energia
+            [datos['zmp'], datos['posicion']],
+            [0, datos['altura']]
         )
+        self.punto_zmp.set_data([datos['zmp']], [0])
 
         # Ajustar los límites de los ejes automáticamente
-        if self.simulador.historial_tiempo:
-            ultimo_tiempo = self.simulador.historial_tiempo[-1]
-            ventana = 10  # Mostrar los últimos 10 segundos
-
-            # Limitar la ventana de visualización al rango de tiempo relevante
-            tiempo_min = max(0, ultimo_tiempo - ventana)
-            tiempo_max = max(ventana, ultimo_tiempo)
-
-            # Actualizar límites de los ejes
+        if datos['limites'] is not None:
+            tiempo_min, tiempo_max, lim_posicion, lim_velocidad, lim_energia = datos['limites']
             for ax in [self.ax_posicion, self.ax_velocidad, self.ax_energia]:
                 ax.set_xlim(tiempo_min, tiempo_max)
+            self.ax_posicion.set_ylim(*lim_posicion)
+            self.ax_velocidad.set_ylim(*lim_velocidad)
+            self.ax_energia.set_ylim(*lim_energia)
+        if instrumentacion is not None:
+            t_medida = instrumentacion.medir('limites', t_medida)
 
-            # Ajustar límites verticales para los datos visibles
-            indices_visibles = [i for i, t in enumerate(self.simulador.historial_tiempo)
-                                if tiempo_min <= t <= tiempo_max]
-
-            if indices_visibles:
-                # Posición
-                posiciones_visibles = [self.simulador.historial_posicion[i] for i in indices_visibles]
-                min_pos = min(posiciones_visibles) - 0.5
-                max_pos = max(posiciones_visibles) + 0.5
-                self.ax_posicion.set_ylim(min_pos, max_pos)
-
-                # Velocidad
-                velocidades_visibles = [self.simulador.historial_velocidad[i] for i in indices_visibles]
-                min_vel = min(velocidades_visibles) - 0.2
-                max_vel = max(velocidades_visibles) + 0.2
-                self.ax_velocidad.set_ylim(min_vel, max_vel)
-
-                # Energía
-                energias_visibles = [self.simulador.historial_energia[i] for i in indices_visibles]
-                min_ener = min(energias_visibles) * 0.9
-                max_ener = max(energias_visibles) * 1.1
-                self.ax_energia.set_ylim(min_ener, max_ener)
+        # Actualizar gráficos de historial
+        visibles = datos['visibles']
+        self.linea_posicion.set_data(visibles['tiempo'], visibles['posicion'])
+        self.linea_zmp.set_data(visibles['tiempo'], visibles['zmp'])
+        self.linea_velocidad.set_data(visibles['tiempo'], visibles['velocidad'])
+        self.linea_energia.set_data(visibles['tiempo'], visibles['energia'])
+        if instrumentacion is not None:
+            t_medida = instrumentacion.medir('set_data', t_medida)
 
         # Actualizar texto informativo
         texto = (
-            f"Tiempo: {self.simulador.t_abs:.2f}s\n"
-            f"Posición: {posicion_actual:.2f}m\n"
-            f"Velocidad: {self.simulador.x_dot_t:.2f}m/s\n"
-            f"ZMP Actual: {zmp_actual:.1f}m\n"
-            f"Estado: {'PAUSADO' if self.simulador.estado == EstadoSimulacion.PAUSADO else 'EJECUTANDO'}"
+            f"Tiempo: {datos['tiempo']:.2f}s\n"
+            f"Posición: {datos['posicion']:.2f}m\n"
+            f"Velocidad: {datos['velocidad']:.2f}m/s\n"
+            f"ZMP Actual: {datos['zmp']:.1f}m\n"
+            f"Estado: {'PAUSADO' if datos['estado'] == EstadoSimulacion.PAUSADO else 'EJECUTANDO'}"
         )
         self.texto_info.set_text(texto)
+        if instrumentacion is not None:
+            instrumentacion.medir('texto', t_medida)
+
+        return self._artistas()
+
+    def _instantanea(self, copiar=False):
+        """
+        Reúne todo lo que necesita un frame: estado actual, límites de los
+        ejes y muestras visibles del historial.
+
+        Args:
+            copiar (bool): Copiar las muestras visibles en lugar de devolver
+                vistas, para publicarlas desde el hilo de física
+
+        Returns:
+            dict: Instantánea del simulador lista para dibujar
+        """
+        simulador = self.simulador
+        historial = simulador.historial
+        instrumentacion = self.instrumentacion
+        if instrumentacion is not None:
+            t_medida = instrumentacion.reloj()
+        # Tras el último cambio zmp_idx queda fuera de rango (simulación detenida)
+        zmp_actual = simulador.zmp_x[min(simulador.zmp_idx, len(simulador.zmp_x) - 1)]
+
+        self._alimentar_ventanas()
+        limites = None
+        inicio = 0
+        if len(historial):
+            ultimo_tiempo = historial.ultimo('tiempo')
+
+            # Limitar la ventana de visualización al rango de tiempo relevante
+            tiempo_min = max(0, ultimo_tiempo - self.ventana)
+            tiempo_max = max(self.ventana, ultimo_tiempo)
+
+            # Ajustar límites verticales para los datos visibles
+            for ventana in self.ventanas_minmax.values():
+                ventana.expirar(tiempo_min)
+            posicion = self.ventanas_minmax['posicion']
+            velocidad = self.ventanas_minmax['velocidad']
+            energia = self.ventanas_minmax['energia']
+            limites = (tiempo_min, tiempo_max,
+                       (posicion.minimo() - 0.5, posicion.maximo() + 0.5),
+                       (velocidad.minimo() - 0.2, velocidad.maximo() + 0.2),
+                       (energia.minimo() * 0.9, energia.maximo() * 1.1))
+
+            # Solo se pasan a matplotlib las muestras visibles (búsqueda binaria)
+            inicio = int(np.searchsorted(historial['tiempo'], tiempo_min, side='left'))
+
+        visibles = historial.vista()[inicio:]
+        if instrumentacion is not None:
+            instrumentacion.medir('autoescalado', t_medida)
+        return {
+            'tiempo': simulador.t_abs,
+            'posicion': zmp_actual + simulador.x_t_rel,
+            'velocidad': simulador.x_dot_t,
+            'zmp': zmp_actual,
+            'altura': simulador.modelo.altura,
+            'estado': simulador.estado,
+            'limites': limites,
+            'visibles': visibles.copy() if copiar else visibles,
+        }
+
+    def _instantanea_grabacion(self, t):
+        """
+        Instantánea del instante t de la grabación.
 
-        return [self.linea_pendulo, self.punto_zmp, self.linea_posicion,
-                self.linea_velocidad, self.linea_energia, self.linea_zmp,
-                self.texto_info]
+        Solo se leen del fichero la fila de t y las muestras de la ventana
+        visible, localizadas por búsqueda binaria en la columna de tiempos.
+
+        Args:
+            t (float): Instante a mostrar
+
+        Returns:
+            dict: Instantánea con el mismo formato que _instantanea
+        """
+        grabacion = self.grabacion
+        fila = grabacion.fila(max(grabacion.indice_tiempo(t, 'right') - 1, 0))
+        tiempo = float(fila['t'])
+        tiempo_min = max(0, tiempo - self.ventana)
+        tiempo_max = max(self.ventana, tiempo)
+
+        columnas = grabacion.ventana(tiempo_min, tiempo, ('t', 'posicion', 'velocidad', 'zmp'))
+        # Energía total como en ModeloLIPM.calcular_energia (masa unitaria)
+        altura, gravedad = grabacion.parametros['altura'], grabacion.parametros['gravedad']
+        energia = gravedad * altura + 0.5 * columnas['velocidad'] ** 2
+        visibles = {'tiempo': columnas['t'], 'posicion': columnas['posicion'],
+                    'velocidad': columnas['velocidad'], 'zmp': columnas['zmp'], 'energia': energia}
+        limites = (tiempo_min, tiempo_max,
+                   (visibles['posicion'].min() - 0.5, visibles['posicion'].max() + 0.5),
+                   (visibles['velocidad'].min() - 0.2, visibles['velocidad'].max() + 0.2),
+                   (energia.min() * 0.9, energia.max() * 1.1))
+        return {
+            'tiempo': tiempo,
+            'posicion': float(fila['posicion']),
+            'velocidad': float(fila['velocidad']),
+            'zmp': float(fila['zmp']),
+            'altura': altura,
+            'estado': EstadoSimulacion.EJECUTANDO if self.reproduciendo else EstadoSimulacion.PAUSADO,
+            'limites': limites,
+            'visibles': visibles,
+        }
+
+    def _alimentar_ventanas(self):
+        """Añade a las ventanas de autoescalado las muestras nuevas del historial."""
+        historial = self.simulador.historial
+        if historial is not self._historial_visto:
+            # El simulador se ha reiniciado: empezar de cero
+            for ventana in self.ventanas_minmax.values():
+                ventana.limpiar()
+            self._historial_visto = historial
+            self._muestras_vistas = 0
+
+        nuevas = min(historial.total - self._muestras_vistas, len(historial))
+        if nuevas <= 0:
+            return
+        registros = historial.vista()[-nuevas:]
+        for registro in registros.tolist():
+            t, posicion, velocidad, energia = registro[:4]
+            self.ventanas_minmax['posicion'].agregar(t, posicion)
+            self.ventanas_minmax['velocidad'].agregar(t, velocidad)
+            self.ventanas_minmax['energia'].agregar(t, energia)
+        self._muestras_vistas = historial.total
 
     def iniciar_animacion(self):
         """Inicia la animación y muestra la figura."""
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+
+        if self.grabacion is not None:
+            # Reproducción: se redibuja solo al moverse por la grabación
+            self.temporizador = self.fig.canvas.new_timer(interval=int(self.simulador.dt * 1000))
+            self.temporizador.add_callback(self._avanzar_reproduccion)
+            self.temporizador.start()
+            self.accion_mover_tiempo(self.t_reproduccion)
+            plt.show()
+            return
+
         self.animacion = FuncAnimation(
             self.fig, self.animar, init_func=self.inicializar_animacion,
             interval=int(self.simulador.dt * 1000), blit=True, cache_frame_data=False
         )
-        plt.show()
+        if self.bucle is not None:
+            self.bucle.iniciar()
+        try:
+            plt.show()
+        finally:
+            if self.bucle is not None:
+                self.bucle.detener()
 
 
-def ejecutar_simulacion():
-    """Función principal para ejecutar la simulación."""
+def ejecutar_simulacion(altura=1.2, gravedad=9.8, desacoplado=False, grabar=None, instrumentar=False,
+                        integrador=None, escala=1.0):
+    """
+    Función principal para ejecutar la simulación.
+
+    Args:
+        altura (float): Altura del centro de masa (en metros)
+        gravedad (float): Aceleración de la gravedad (en m/s²)
+        desacoplado (bool): Avanzar la física en un hilo propio a ritmo real
+        grabar (str): Fichero donde grabar la trayectoria (formato de trayectoria.py)
+        instrumentar (bool): Medir el tiempo de cada fase, mostrarlo sobre la
+            animación e imprimir un resumen periódico
+        integrador (str): Integrador numérico (ver integradores.INTEGRADORES);
+            por defecto, la matriz de transición del LIPM
+        escala (float): Factor de semejanza de la planificación por defecto:
+            posiciones por escala y tiempos (paso dt incluido) y velocidad
+            por su raíz, de modo que la marcha sea la misma en unidades de
+            altura y de T_c (p. ej. altura de Boby / 1.2 m)
+    """
     # Crear modelo LIPM
-    modelo = ModeloLIPM(altura=1.2, gravedad=9.8)
+    modelo = ModeloLIPM(altura=altura, gravedad=gravedad)
 
-    # Crear simulador
-    simulador = SimuladorLIPM(modelo, dt=0.02)
+    # Crear simulador (historial circular: la ejecución no tiene fin)
+    if integrador is not None:
+        integrador = crear_integrador(integrador)
+    raiz = math.sqrt(escala)
+    simulador = SimuladorLIPM(modelo, dt=0.02 * raiz, capacidad_historial=16384, historial_circular=True,
+                              x_dot_0=0.3 * raiz, zmp_x=[zmp * escala for zmp in ZMP_X],
+                              zmp_x_change=[cambio * escala for cambio in ZMP_X_CHANGE],
+                              integrador=integrador)
 
     # Crear visualizador y iniciar animación
-    visualizador = VisualizadorLIPM(simulador)
-    visualizador.iniciar_animacion()
+    if grabar:
+        from trayectoria import EscritorTrayectoria
+
+        simulador.grabador = EscritorTrayectoria(grabar, simulador.parametros_grabacion())
+
+    instrumentacion = None
+    if instrumentar:
+        from instrumentacion import Instrumentacion
+
+        instrumentacion = Instrumentacion(periodo_resumen=5.0, intervalo_frame=simulador.dt)
+        simulador.instrumentacion = instrumentacion
+
+    visualizador = VisualizadorLIPM(simulador, desacoplado=desacoplado,
+                                    instrumentacion=instrumentacion)
+    try:
+        visualizador.iniciar_animacion()
+    finally:
+        if simulador.grabador is not None:
+            simulador.grabador.cerrar()
+
+
+def reproducir_grabacion(ruta):
+    """
+    Abre una trayectoria grabada (ver trayectoria.py) y la muestra en modo
+    reproducción, sin volver a simular.
+
+    Args:
+        ruta (str): Fichero de trayectoria
+    """
+    from trayectoria import LectorTrayectoria
+
+    with LectorTrayectoria(ruta) as grabacion:
+        if not len(grabacion):
+            sys.exit(f"{ruta}: la grabación no tiene muestras (¿se cerró antes del primer paso?)")
+        parametros = grabacion.parametros
+        modelo = ModeloLIPM(altura=parametros['altura'], gravedad=parametros['gravedad'])
+        # El simulador solo aporta la planificación para dibujar la figura
+        simulador = SimuladorLIPM(modelo, dt=parametros['dt'], capacidad_historial=1,
+                                  zmp_x=parametros['zmp'], zmp_x_change=parametros['cambios'])
+        visualizador = VisualizadorLIPM(simulador, grabacion=grabacion)
+        visualizador.iniciar_animacion()
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Simulador 2D del LIPM en el plano sagital')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del centro de masa (m)')
+    parser.add_argument('--gravedad', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--boby', action='store_true',
+                        help='Usar la altura del CoM de Boby calculada de sus STL (propiedades_masa.py) '
+                             'y escalar la planificación por semejanza')
+    parser.add_argument('--desacoplado', action='store_true',
+                        help='Avanzar la física en un hilo propio a ritmo real')
+    parser.add_argument('--grabar', default=None, help='Fichero donde grabar la trayectoria')
+    parser.add_argument('--reproducir', default=None, help='Reproducir una trayectoria grabada')
+    parser.add_argument('--instrumentar', action='store_true',
+                        help='Medir el tiempo de cada fase del bucle y mostrar un resumen')
+    parser.add_argument('--integrador', choices=list(INTEGRADORES),
+                        default=None, help='Integrador numérico (por defecto, la solución cerrada)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    escala = 1.0
+    if args.boby:
+        from propiedades_masa import parametros_lipm
+
+        # La planificación por defecto está pensada para --altura
+        altura, _ = parametros_lipm(args.gravedad)
+        escala = altura / args.altura
+        args.altura = altura
+    if args.reproducir:
+        reproducir_grabacion(args.reproducir)
+    else:
+        ejecutar_simulacion(args.altura, args.gravedad, args.desacoplado, args.grabar,
+                            args.instrumentar, args.integrador, escala)
 
 
 if __name__ == "__main__":
-    ejecutar_simulacion()
+    main()
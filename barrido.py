@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Barrido de parámetros de los simuladores LIPM sin visualización.
+
+Expande una rejilla (o una lista de conjuntos de parámetros en JSON Lines)
+sobre altura, gravedad, velocidad inicial, longitud de paso y planificación
+de cambios de ZMP, reparte las ejecuciones entre todos los núcleos y escribe
+una fila de resumen por ejecución en un CSV a medida que terminan. Cada fila
+lleva un identificador derivado de sus parámetros, de modo que un barrido
+interrumpido se reanuda saltando las ejecuciones ya escritas.
+
+Cada ejecución usa el modo por eventos de los simuladores (una operación por
+fase de apoyo) y solo muestrea la trayectoria para medir la velocidad pico.
+
+Ejemplos:
+    python barrido.py resultados.csv --plano sagital --altura 1.0 1.2 1.4 --v0 0.2 0.3
+    python barrido.py resultados.csv --plano frontal --cambios "0.4,1,1.8,8,10" "0.4,1,2,3.5,4,7.4,10"
+    python barrido.py resultados.csv --conjuntos conjuntos.jsonl
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+# Valores por defecto de cada parámetro del barrido
+PARAMETROS_DEFECTO = {
+    'plano': 'sagital',
+    'altura': 1.2,
+    'g': 9.8,
+    'v0': 0.3,
+    'longitud_paso': 4.0,
+    'n_pasos': 6,
+    'zmp_y': [0.4, 0.8, 0.4, 0.8, 0.4, 0.8, 0.4],
+    'cambios': [0.4, 1, 2, 3.5, 4, 7.4, 10.0],
+    't_max': 50.0,
+    'dt': 0.02,
+}
+
+COLUMNAS = ['id', 'parametros', 'pasos', 't_final', 'velocidad_pico',
+            'llega_max_x', 'energia_orbital_min', 'energia_orbital_max']
+
+
+def identificador(parametros):
+    """Identificador estable de un conjunto de parámetros."""
+    texto = json.dumps(parametros, sort_keys=True)
+    return hashlib.sha1(texto.encode()).hexdigest()[:16]
+
+
+def expandir_rejilla(valores):
+    """
+    Genera todas las combinaciones de una rejilla de parámetros.
+
+    Args:
+        valores (dict): Lista de valores por parámetro
+
+    Returns:
+        list: Un diccionario de parámetros completo por combinación
+    """
+    nombres = list(valores)
+    conjuntos = []
+    for combinacion in itertools.product(*(valores[nombre] for nombre in nombres)):
+        parametros = dict(PARAMETROS_DEFECTO)
+        parametros.update(zip(nombres, combinacion))
+        conjuntos.append(parametros)
+    return conjuntos
+
+
+def leer_conjuntos(ruta):
+    """Lee conjuntos de parámetros de un fichero JSON Lines."""
+    conjuntos = []
+    with open(ruta) as f:
+        for linea in f:
+            if linea.strip():
+                parametros = dict(PARAMETROS_DEFECTO)
+                parametros.update(json.loads(linea))
+                conjuntos.append(parametros)
+    return conjuntos
+
+
+def _energias_orbitales(gravedad, altura, fases):
+    """Energía orbital de cada fase (constante dentro de la fase)."""
+    return [0.5 * fase[3] ** 2 - (gravedad / (2 * altura)) * fase[2] ** 2 for fase in fases]
+
+
+def ejecutar_sagital(p):
+    """Simula una marcha sagital y devuelve su resumen."""
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM, muestrear_fases
+
+    modelo = ModeloLIPM(altura=p['altura'], gravedad=p['g'])
+    paso = p['longitud_paso']
+    zmp_x = [i * paso for i in range(p['n_pasos'] + 1)]
+    zmp_x_change = [(i + 0.5) * paso for i in range(p['n_pasos'])]
+    simulador = SimuladorLIPM(modelo, dt=p['dt'], x_dot_0=p['v0'],
+                              zmp_x=zmp_x, zmp_x_change=zmp_x_change)
+    fases = simulador.simular_eventos(p['t_max'])
+
+    tiempos = np.arange(1, int(simulador.t_abs / p['dt']) + 1) * p['dt']
+    posiciones, velocidades, _ = muestrear_fases(modelo, fases, tiempos)
+
+    # Como en lipm2d_sagital.py, la ejecución termina al superar MAX_X
+    max_x = zmp_x[-1]
+    superan = np.flatnonzero(posiciones > max_x)
+    llega = superan.size > 0
+    t_final = tiempos[superan[0]] if llega else simulador.t_abs
+    if llega:
+        velocidades = velocidades[:superan[0] + 1]
+    energias = _energias_orbitales(p['g'], p['altura'], fases)
+    return {
+        'pasos': len([f for f in fases if f.t_inicio <= t_final]) - 1,
+        't_final': float(t_final),
+        'velocidad_pico': float(np.abs(velocidades).max()) if velocidades.size else abs(p['v0']),
+        'llega_max_x': llega,
+        'energia_orbital_min': min(energias),
+        'energia_orbital_max': max(energias),
+    }
+
+
+def ejecutar_frontal(p):
+    """Simula un balanceo frontal y devuelve su resumen."""
+    from Frontal_Mejorado import LIPMSimulator, sample_phases
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador = LIPMSimulator(height=p['altura'], g=p['g'], max_time=p['t_max'],
+                                  history_capacity=1, y_dot_0=p['v0'], zmp_y=p['zmp_y'],
+                                  zmp_time_change=p['cambios'])
+    fases = simulador.simulate_events()
+
+    tiempos = np.arange(1, int(simulador.t_abs / p['dt']) + 1) * p['dt']
+    _, velocidades, _ = sample_phases(fases, simulador.T_c, tiempos)
+    energias = _energias_orbitales(p['g'], p['altura'], fases)
+    return {
+        'pasos': len(fases) - 1,
+        't_final': float(simulador.t_abs),
+        'velocidad_pico': float(np.abs(velocidades).max()) if velocidades.size else abs(p['v0']),
+        'llega_max_x': '',
+        'energia_orbital_min': min(energias),
+        'energia_orbital_max': max(energias),
+    }
+
+
+def ejecutar(parametros):
+    """Ejecuta un conjunto de parámetros y devuelve su fila de resumen."""
+    if parametros['plano'] == 'sagital':
+        resumen = ejecutar_sagital(parametros)
+    elif parametros['plano'] == 'frontal':
+        resumen = ejecutar_frontal(parametros)
+    else:
+        raise ValueError(f"Plano desconocido: {parametros['plano']}")
+    resumen['id'] = identificador(parametros)
+    resumen['parametros'] = json.dumps(parametros, sort_keys=True)
+    return resumen
+
+
+def ids_completados(ruta):
+    """Identificadores ya presentes en un CSV de resultados."""
+    if not os.path.exists(ruta):
+        return set()
+    with open(ruta, newline='') as f:
+        return {fila['id'] for fila in csv.DictReader(f)}
+
+
+def barrer(conjuntos, ruta_salida, procesos=None):
+    """
+    Ejecuta un barrido en paralelo escribiendo cada fila al terminar.
+
+    Args:
+        conjuntos (list): Diccionarios de parámetros
+        ruta_salida (str): CSV de resultados (se añade a él si ya existe)
+        procesos (int): Número de procesos (por defecto, todos los núcleos)
+
+    Returns:
+        int: Número de ejecuciones realizadas en esta llamada
+    """
+    hechos = ids_completados(ruta_salida)
+    pendientes = [p for p in conjuntos if identificador(p) not in hechos]
+    nuevo = not os.path.exists(ruta_salida) or os.path.getsize(ruta_salida) == 0
+
+    with open(ruta_salida, 'a', newline='') as f, Pool(procesos) as pool:
+        escritor = csv.DictWriter(f, fieldnames=COLUMNAS)
+        if nuevo:
+            escritor.writeheader()
+        for fila in pool.imap_unordered(ejecutar, pendientes):
+            escritor.writerow(fila)
+            f.flush()
+    return len(pendientes)
+
+
+def _lista_floats(texto):
+    """Convierte '0.4,1,1.8' en [0.4, 1.0, 1.8]."""
+    return [float(valor) for valor in texto.split(',')]
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Barrido de parámetros de los simuladores LIPM')
+    parser.add_argument('salida', help='CSV de resultados (se reanuda si ya existe)')
+    parser.add_argument('--conjuntos', help='Fichero JSON Lines con un conjunto de parámetros por línea')
+    parser.add_argument('--plano', nargs='+', choices=['sagital', 'frontal'])
+    parser.add_argument('--altura', nargs='+', type=float, help='Alturas del péndulo (m)')
+    parser.add_argument('--g', nargs='+', type=float, help='Gravedades (m/s²)')
+    parser.add_argument('--v0', nargs='+', type=float, help='Velocidades iniciales x_dot_0/y_dot_0 (m/s)')
+    parser.add_argument('--longitud_paso', nargs='+', type=float, help='Longitudes de paso sagital (m)')
+    parser.add_argument('--zmp_y', nargs='+', type=_lista_floats, help='Posiciones ZMP frontales ("a,b,...")')
+    parser.add_argument('--cambios', nargs='+', type=_lista_floats, help='Tiempos de cambio frontales ("a,b,...")')
+    parser.add_argument('--t_max', nargs='+', type=float, help='Tiempos máximos de simulación (s)')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos (por defecto, todos los núcleos)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    if args.conjuntos:
+        conjuntos = leer_conjuntos(args.conjuntos)
+    else:
+        rejilla = {nombre: getattr(args, nombre)
+                   for nombre in ('plano', 'altura', 'g', 'v0', 'longitud_paso', 'zmp_y', 'cambios', 't_max')
+                   if getattr(args, nombre)}
+        conjuntos = expandir_rejilla(rejilla)
+
+    ejecutadas = barrer(conjuntos, args.salida, args.procesos)
+    print(f"{ejecutadas} ejecuciones nuevas de {len(conjuntos)} escritas en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
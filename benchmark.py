@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+"""
+Banco de pruebas de rendimiento de los simuladores y visualizadores LIPM.
+
+Mide:
+
+- Pasos por segundo de cada motor (SimuladorLIPM.paso, LIPMSimulator.update,
+  Simulator.__call__ de lipm2d_*.py, SimuladorLIPM3D.paso y el lote
+  vectorizado) para historiales de 1e3 a 1e6 pasos.
+- Coste por frame de VisualizadorLIPM y LIPMVisualizer con el backend Agg
+  según crece el historial: en los dos, un paso del simulador más el
+  dibujado, como en la animación.
+- Frames por segundo del exportador paralelo (lipm_export).
+- Tiempo de arranque de un proceso que importa el núcleo (lipm_nucleo).
+
+Los resultados se guardan en JSON y pueden compararse con una ejecución
+anterior para detectar regresiones:
+
+    python benchmark.py --salida base.json
+    python benchmark.py --salida nuevo.json --comparar base.json
+
+Los motores se ejecutan partiendo del equilibrio (ZMP bajo el CoM y
+velocidad nula) para que los estados no desborden en las ejecuciones
+largas; el coste de un tic no depende del valor del estado. Cada punto es
+la mejor de varias medidas hechas tras un calentamiento, repartidas en
+RONDAS pasadas intercaladas por todos los motores para que una racha lenta
+de la máquina no afecte a todas las medidas del mismo punto.
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+TAMANOS = (1_000, 10_000, 100_000, 1_000_000)
+TAMANOS_RAPIDOS = (1_000, 10_000)
+HISTORIALES_RENDER = (1_000, 10_000, 100_000)
+HISTORIALES_RENDER_RAPIDOS = (1_000, 10_000)
+FRAMES_RENDER = 60
+TOLERANCIA = 0.2  # Empeoramiento relativo que se considera regresión
+REPETICIONES = 3  # Medidas mínimas por punto y ronda; se guarda la mejor
+RONDAS = 3  # Pasadas intercaladas por todos los motores
+LLAMADAS_MIN = 50_000  # Llamadas cronometradas mínimas por punto entre todas las medidas
+CALENTAMIENTO = 1_000  # Llamadas sin cronometrar antes de medir
+PASOS_LOTE_MIN = 200  # Pasos mínimos del lote por medida (unos milisegundos)
+
+
+def _cronometrar(funcion, n):
+    """Ejecuta funcion() n veces y devuelve los segundos transcurridos."""
+    inicio = time.perf_counter()
+    for _ in range(n):
+        funcion()
+    return time.perf_counter() - inicio
+
+
+def _mejor_tasa(crear, n, repeticiones=REPETICIONES):
+    """
+    Llamadas por segundo de la mejor de varias medidas de n llamadas.
+
+    Cada medida usa una función nueva de crear() (simulador recién creado,
+    con el historial vacío) y antes de medir se hace un calentamiento con
+    otra instancia. Con n pequeño se hacen más medidas, hasta sumar
+    LLAMADAS_MIN llamadas. Se guarda la mejor medida: las pausas del sistema
+    solo pueden hacer una medida más lenta, nunca más rápida.
+
+    Args:
+        crear (callable): Devuelve la función a cronometrar
+        n (int): Llamadas por medida
+        repeticiones (int): Número mínimo de medidas
+
+    Returns:
+        float: Llamadas por segundo
+    """
+    _cronometrar(crear(), min(n, CALENTAMIENTO))
+    repeticiones = max(repeticiones, -(-LLAMADAS_MIN // n))
+    return max(n / _cronometrar(crear(), n) for _ in range(repeticiones))
+
+
+def _mediana_ms(funcion, n):
+    """
+    Mediana (ms) de n llamadas a funcion(); menos sensible que la media a
+    las pausas del recolector de basura y del sistema en medidas cortas.
+    """
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)) * 1e3
+
+
+def _resultado(nombre, n, valor, unidad, mayor_es_mejor=True):
+    """Entrada de resultados en el formato del fichero JSON."""
+    return {'nombre': nombre, 'n': n, 'valor': valor, 'unidad': unidad,
+            'mayor_es_mejor': mayor_es_mejor}
+
+
+def pasos_sagital(n):
+    """Pasos/s de SimuladorLIPM.paso con un historial de n muestras."""
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM
+
+    return _mejor_tasa(lambda: SimuladorLIPM(ModeloLIPM(), capacidad_historial=n, x_dot_0=0.0).paso, n)
+
+
+def pasos_frontal(n):
+    """Pasos/s de LIPMSimulator.update con un historial de n muestras."""
+    from Frontal_Mejorado import TIME_DELTA, LIPMSimulator
+
+    def crear():
+        # Todos los ZMP en el mismo sitio: hay cambios de apoyo pero no deriva
+        return LIPMSimulator(max_time=2 * n * TIME_DELTA, history_capacity=n + 2, y_dot_0=0.0,
+                             zmp_y=[0.4] * 8, zmp_time_change=[0.4, 1, 2, 3.5, 4, 7.4, 10.0, 12.0]).update
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _mejor_tasa(crear, n)
+
+
+def pasos_lipm2d(modulo, n):
+    """
+    Pasos/s de Simulator.__call__ de un script lipm2d (incluye su print por paso).
+
+    Estos scripts no guardan historial: n son los pasos seguidos de una sola
+    simulación. Pasado MAX_X/MAX_TIME __call__ devuelve False pero sigue
+    avanzando igual, así que no hace falta reiniciarla.
+    """
+    script = importlib.import_module(modulo)
+
+    def crear():
+        simulador = script.Simulator()
+        # Equilibrio sin deriva: velocidad nula y, en el frontal, todos los ZMP en el mismo sitio
+        for atributo in ('x_dot_0', 'x_dot_t', 'y_dot_0', 'y_dot_t'):
+            if hasattr(simulador, atributo):
+                setattr(simulador, atributo, 0.0)
+        if hasattr(simulador, 'zmp_y'):
+            simulador.zmp_y = [simulador.zmp_y[0]] * len(simulador.zmp_y)
+        return simulador
+
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        return _mejor_tasa(crear, n)
+
+
+def pasos_3d(n):
+    """Pasos/s de SimuladorLIPM3D.paso (dos planos por tic)."""
+    from lipm3d import SimuladorLIPM3D
+    from Sagital_Mejorado import ModeloLIPM
+
+    return _mejor_tasa(lambda: SimuladorLIPM3D(ModeloLIPM(), capacidad_historial=n, x_dot_0=0.0,
+                                               y_dot_0=0.0, zmp_y=[0.0] * 7).paso, n)
+
+
+def pasos_lote(n, miembros=1000):
+    """
+    Pasos-miembro/s del simulador vectorizado con `miembros` trayectorias.
+
+    Cada medida da al menos PASOS_LOTE_MIN pasos para que dure varios
+    milisegundos aunque n sea pequeño.
+    """
+    from lipm_lote import SimuladorLoteLIPM
+
+    pasos = max(PASOS_LOTE_MIN, n // miembros)
+    return miembros * _mejor_tasa(lambda: SimuladorLoteLIPM(np.linspace(1.0, 1.4, miembros), 0.0, 0.0,
+                                                            [0, 4, 8, 12, 16, 20, 24],
+                                                            [2, 6, 10, 14, 18, 22]).paso, pasos)
+
+
+def frame_sagital(historial, frames=FRAMES_RENDER):
+    """
+    Coste (ms, mediana) de un frame de VisualizadorLIPM con un historial dado:
+    animar(), que avanza el simulador un paso y actualiza los artistas, más
+    el redibujado de los artistas dinámicos.
+    """
+    import matplotlib.pyplot as plt
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM, VisualizadorLIPM
+
+    simulador = SimuladorLIPM(ModeloLIPM(), capacidad_historial=historial + frames, x_dot_0=0.0)
+    for _ in range(historial):
+        simulador.paso()
+    visualizador = VisualizadorLIPM(simulador)
+    artistas = visualizador.inicializar_animacion()
+    lienzo = visualizador.fig.canvas
+    lienzo.draw()
+    visualizador.animar(0)  # Primer frame: alimenta las ventanas con todo el historial
+
+    def frame():
+        visualizador.animar(0)
+        for artista in artistas:
+            visualizador.fig.draw_artist(artista)
+
+    coste = _mediana_ms(frame, frames)
+    plt.close(visualizador.fig)
+    return coste
+
+
+def frame_frontal(historial, frames=FRAMES_RENDER):
+    """
+    Coste (ms, mediana) de un frame de LIPMVisualizer con un historial dado,
+    medido como frame_sagital: un paso del simulador (en la animación lo da
+    frames_generator, no update()), update() y el redibujado de los
+    artistas dinámicos.
+    """
+    import matplotlib.pyplot as plt
+    from Frontal_Mejorado import TIME_DELTA, LIPMSimulator, LIPMVisualizer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator = LIPMSimulator(max_time=(historial + frames + 10) * TIME_DELTA, y_dot_0=0.0,
+                                  zmp_y=[0.4] * 8, zmp_time_change=[0.4, 1, 2, 3.5, 4, 7.4, 10.0, 12.0])
+        for _ in range(historial):
+            simulator.update()
+        visualizer = LIPMVisualizer(simulator, animate=False)
+        visualizer.init_animation()
+        canvas = visualizer.fig.canvas
+        canvas.draw()
+        visualizer.update(0)
+
+        def frame():
+            simulator.update()
+            visualizer.update(0)
+            for artist in visualizer.animated_artists():
+                visualizer.fig.draw_artist(artist)
+
+        coste = _mediana_ms(frame, frames)
+    plt.close(visualizer.fig)
+    return coste
+
+
+def arranque(modulo='lipm_nucleo', repeticiones=5):
+    """
+    Tiempo (ms, mediana) de importar un módulo en un intérprete nuevo, como
+    lo haría un proceso de trabajo.
+
+    Returns:
+        tuple: (milisegundos, True si la importación cargó matplotlib)
+    """
+    codigo = ("import sys, time; t = time.perf_counter(); import {0}; "
+              "print((time.perf_counter() - t) * 1e3, 'matplotlib' in sys.modules)").format(modulo)
+    medidas = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        milisegundos, matplotlib_cargado = salida.stdout.split()
+        medidas.append(float(milisegundos))
+    return float(np.median(medidas)), matplotlib_cargado == 'True'
+
+
+def exportacion(max_time=2.0):
+    """Frames/s del exportador paralelo escribiendo RGBA sin comprimir."""
+    from lipm_export import export_animation
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            frames = export_animation(os.path.join(directorio, 'bench.rgba'), max_time=max_time,
+                                      dpi=50)
+        return frames / (time.perf_counter() - inicio)
+
+
+def ejecutar(rapido=False, incluir_exportacion=True):
+    """
+    Ejecuta todas las mediciones.
+
+    Args:
+        rapido (bool): Usar solo los tamaños pequeños
+        incluir_exportacion (bool): Medir también el exportador paralelo
+
+    Returns:
+        dict: Metadatos del entorno y lista de resultados
+    """
+    tamanos = TAMANOS_RAPIDOS if rapido else TAMANOS
+    historiales = HISTORIALES_RENDER_RAPIDOS if rapido else HISTORIALES_RENDER
+    resultados = []
+
+    milisegundos, matplotlib_cargado = arranque()
+    resultados.append(_resultado('arranque/lipm_nucleo', 0, milisegundos, 'ms', mayor_es_mejor=False))
+    print(f"{'arranque/lipm_nucleo':24s}               {milisegundos:14.1f} ms"
+          f"{'  (carga matplotlib)' if matplotlib_cargado else ''}")
+
+    motores = {
+        'pasos/sagital': pasos_sagital,
+        'pasos/frontal': pasos_frontal,
+        'pasos/lipm2d_sagital': lambda n: pasos_lipm2d('lipm2d_sagital', n),
+        'pasos/lipm2d_frontal': lambda n: pasos_lipm2d('lipm2d_frontal', n),
+        'pasos/3d': pasos_3d,
+        'pasos/lote': pasos_lote,
+    }
+    mejores = {}
+    for _ in range(RONDAS):
+        for nombre, medir in motores.items():
+            for n in tamanos:
+                mejores[nombre, n] = max(mejores.get((nombre, n), 0.0), medir(n))
+    for (nombre, n), pasos_por_segundo in mejores.items():
+        resultados.append(_resultado(nombre, n, pasos_por_segundo, 'pasos/s'))
+        print(f"{nombre:24s} n={n:>9d}  {pasos_por_segundo:14.0f} pasos/s")
+
+    for nombre, medir in (('frame/sagital', frame_sagital), ('frame/frontal', frame_frontal)):
+        for n in historiales:
+            resultados.append(_resultado(nombre, n, medir(n), 'ms/frame', mayor_es_mejor=False))
+            print(f"{nombre:24s} n={n:>9d}  {resultados[-1]['valor']:14.3f} ms/frame")
+
+    if incluir_exportacion:
+        resultados.append(_resultado('exportacion/rgba', 0, exportacion(), 'frames/s'))
+        print(f"{'exportacion/rgba':24s}               {resultados[-1]['valor']:14.1f} frames/s")
+
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'plataforma': platform.platform(),
+            'nucleos': os.cpu_count(),
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar(actual, base, tolerancia=TOLERANCIA):
+    """
+    Compara dos ejecuciones y muestra la variación de cada medida.
+
+    Args:
+        actual (dict): Resultados nuevos
+        base (dict): Resultados de referencia
+        tolerancia (float): Empeoramiento relativo a partir del cual se
+            considera regresión
+
+    Returns:
+        list: Nombres (con tamaño) de las medidas que han empeorado
+    """
+    referencia = {(r['nombre'], r['n']): r for r in base['resultados']}
+    regresiones = []
+    for resultado in actual['resultados']:
+        clave = (resultado['nombre'], resultado['n'])
+        if clave not in referencia:
+            continue
+        anterior = referencia[clave]['valor']
+        # Factor de mejora: > 1 es mejor independientemente de la unidad
+        if resultado['mayor_es_mejor']:
+            factor = resultado['valor'] / anterior
+        else:
+            factor = anterior / resultado['valor']
+        marca = ''
+        if factor < 1 - tolerancia:
+            marca = '  REGRESIÓN'
+            regresiones.append(f"{clave[0]} n={clave[1]}")
+        print(f"{clave[0]:24s} n={clave[1]:>9d}  x{factor:6.2f}{marca}")
+    return regresiones
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Banco de pruebas de rendimiento LIPM')
+    parser.add_argument('--salida', default='benchmark.json', help='Fichero JSON de resultados')
+    parser.add_argument('--comparar', default=None, help='Resultados de referencia (JSON)')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='Empeoramiento relativo que se considera regresión')
+    parser.add_argument('--rapido', action='store_true', help='Solo tamaños pequeños')
+    parser.add_argument('--sin_exportacion', action='store_true', help='No medir el exportador')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    resultados = ejecutar(args.rapido, not args.sin_exportacion)
+    with open(args.salida, 'w') as f:
+        json.dump(resultados, f, indent=2)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"{len(regresiones)} regresiones: {', '.join(regresiones)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+#!/usr/bin/env python
+"""
+Envío de consignas de servo a Boby por puerto serie en tramas binarias.
+
+Con un protocolo ASCII o una escritura por ángulo no se llega a los 50 Hz
+(dt = 0.02 s) de las simulaciones. Aquí el simulador agrupa consignas en
+tramas binarias con número de secuencia y CRC, las envía al ritmo del reloj
+de simulación y el Nano (Boby/Arduino/Consignas_Serie) las guarda en un
+buffer circular y las reproduce cada `periodo` ms, confirmando cada trama.
+
+Trama de consignas (host -> Nano), little-endian:
+
+    0xA5 0x5A           sincronismo
+    seq      u16        número de secuencia (módulo 65536)
+    periodo  u8         ms entre consignas
+    n        u8         consignas en la trama (1..MAX_CONSIGNAS)
+    n x (izq u16, der u16)  ángulos absolutos en cuartos de grado
+    crc      u16        CRC-16/MCRF4XX de seq..consignas (_crc_ccitt_update de avr-libc)
+
+Respuesta (Nano -> host): 0xA6, seq u16, estado u8 (ESTADO_*), libres u8.
+Una trama con CRC erróneo se descarta sin respuesta: el host la cuenta como
+perdida al agotar la espera.
+
+NanoVirtual sustituye al robot con un pseudoterminal que emula el tiempo de
+transmisión a los baudios dados, el buffer y el ritmo de reproducción, y
+opcionalmente corrompe bytes; así se miden latencia de ida y vuelta,
+caudal y tasa de tramas perdidas en Linux sin hardware:
+
+    python boby_serie.py --lote 1 --duracion 10
+    python boby_serie.py --puerto /dev/ttyUSB0 --lote 2
+"""
+
+import argparse
+import math
+import os
+import pty
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+
+import numpy as np
+
+from boby_tabla import CUARTOS
+
+SINCRONISMO = b'\xa5\x5a'
+RESPUESTA = 0xA6
+MAX_CONSIGNAS = 16  # Consignas por trama (limita el buffer de recepción del Nano)
+CAPACIDAD_NANO = 64  # Consignas en el buffer circular del sketch
+BAUDIOS = 115200
+
+ESTADO_ACEPTADA = 0
+ESTADO_HUECO = 1  # Aceptada, pero faltan tramas anteriores
+ESTADO_LLENO = 2  # Descartada: no cabe en el buffer
+
+_CABECERA = struct.Struct('<HBB')
+_RESPUESTA = struct.Struct('<BHBB')
+
+
+def _tabla_crc():
+    """Tabla de la CRC-16/MCRF4XX (polinomio 0x1021 reflejado, 0x8408)."""
+    tabla = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+        tabla.append(crc)
+    return tabla
+
+
+_CRC = _tabla_crc()
+
+
+def crc16(datos, crc=0xFFFF):
+    """
+    CRC-16/MCRF4XX, la misma que encadena _crc_ccitt_update en el Nano.
+
+    Args:
+        datos (bytes): Datos
+        crc (int): Valor inicial
+
+    Returns:
+        int: CRC de 16 bits
+    """
+    for byte in datos:
+        crc = (crc >> 8) ^ _CRC[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def codificar_trama(seq, periodo_ms, consignas):
+    """
+    Construye una trama de consignas.
+
+    Args:
+        seq (int): Número de secuencia
+        periodo_ms (int): Milisegundos entre consignas
+        consignas (array): (n, 2) ángulos izquierdo/derecho en cuartos de grado
+
+    Returns:
+        bytes: Trama completa
+    """
+    consignas = np.asarray(consignas, dtype='<u2')
+    if not 1 <= len(consignas) <= MAX_CONSIGNAS:
+        raise ValueError(f"Una trama lleva entre 1 y {MAX_CONSIGNAS} consignas")
+    cuerpo = _CABECERA.pack(seq & 0xFFFF, periodo_ms, len(consignas)) + consignas.tobytes()
+    return SINCRONISMO + cuerpo + struct.pack('<H', crc16(cuerpo))
+
+
+class AnalizadorTramas:
+    """
+    Analizador incremental de tramas de consignas, el equivalente del de Consignas_Serie.ino.
+    """
+
+    def __init__(self):
+        self.pendiente = bytearray()
+        self.errores_crc = 0
+        self.bytes_descartados = 0
+
+    def alimentar(self, datos):
+        """
+        Añade bytes recibidos y devuelve las tramas completas.
+
+        Args:
+            datos (bytes): Bytes recibidos
+
+        Returns:
+            list: Tuplas (seq, periodo_ms, consignas (n, 2))
+        """
+        self.pendiente += datos
+        tramas = []
+        while True:
+            inicio = self.pendiente.find(SINCRONISMO)
+            if inicio < 0:
+                # Conservar un posible primer byte de sincronismo al final
+                conservar = 1 if self.pendiente[-1:] == SINCRONISMO[:1] else 0
+                self.bytes_descartados += len(self.pendiente) - conservar
+                del self.pendiente[:len(self.pendiente) - conservar]
+                return tramas
+            self.bytes_descartados += inicio
+            del self.pendiente[:inicio]
+            if len(self.pendiente) < 2 + _CABECERA.size:
+                return tramas
+
+            seq, periodo_ms, n = _CABECERA.unpack_from(self.pendiente, 2)
+            if not 1 <= n <= MAX_CONSIGNAS:
+                # Cabecera imposible: resincronizar a partir del byte siguiente
+                self.bytes_descartados += 1
+                del self.pendiente[:1]
+                continue
+            longitud = 2 + _CABECERA.size + 4 * n + 2
+            if len(self.pendiente) < longitud:
+                return tramas
+
+            cuerpo = bytes(self.pendiente[2:longitud - 2])
+            crc, = struct.unpack_from('<H', self.pendiente, longitud - 2)
+            if crc16(cuerpo) != crc:
+                self.errores_crc += 1
+                self.bytes_descartados += 1
+                del self.pendiente[:1]
+                continue
+            consignas = np.frombuffer(cuerpo, dtype='<u2', offset=_CABECERA.size).reshape(n, 2)
+            tramas.append((seq, periodo_ms, consignas))
+            del self.pendiente[:longitud]
+
+
+class AnalizadorRespuestas:
+    """Analizador incremental de las respuestas del Nano."""
+
+    def __init__(self):
+        self.pendiente = bytearray()
+
+    def alimentar(self, datos):
+        """
+        Añade bytes recibidos y devuelve las respuestas completas.
+
+        Args:
+            datos (bytes): Bytes recibidos
+
+        Returns:
+            list: Tuplas (seq, estado, libres)
+        """
+        self.pendiente += datos
+        respuestas = []
+        while True:
+            inicio = self.pendiente.find(bytes([RESPUESTA]))
+            if inicio < 0:
+                self.pendiente.clear()
+                return respuestas
+            del self.pendiente[:inicio]
+            if len(self.pendiente) < _RESPUESTA.size:
+                return respuestas
+            _, seq, estado, libres = _RESPUESTA.unpack_from(self.pendiente)
+            respuestas.append((seq, estado, libres))
+            del self.pendiente[:_RESPUESTA.size]
+
+
+def abrir_puerto(ruta, baudios=BAUDIOS):
+    """
+    Abre un puerto serie en modo crudo sin depender de pyserial.
+
+    Args:
+        ruta (str): Dispositivo (/dev/ttyUSB0, o el pseudoterminal de NanoVirtual)
+        baudios (int): Velocidad
+
+    Returns:
+        int: Descriptor de fichero no bloqueante
+    """
+    fd = os.open(ruta, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    tty.setraw(fd)
+    atributos = termios.tcgetattr(fd)
+    velocidad = getattr(termios, f'B{baudios}')
+    atributos[4] = atributos[5] = velocidad
+    atributos[2] |= termios.CLOCAL | termios.CREAD
+    termios.tcsetattr(fd, termios.TCSANOW, atributos)
+    return fd
+
+
+class NanoVirtual:
+    """
+    Sustituto del Nano sobre un pseudoterminal.
+
+    Un hilo lee el extremo maestro, retrasa cada bloque el tiempo que
+    tardaría en llegar a `baudios` (10 bits por byte), analiza las tramas
+    como el sketch, simula el buffer circular vaciándose al ritmo de
+    reproducción y responde a cada trama válida.
+    """
+
+    def __init__(self, baudios=BAUDIOS, probabilidad_error=0.0, capacidad=CAPACIDAD_NANO, semilla=0):
+        """
+        Inicializa el sustituto.
+
+        Args:
+            baudios (int): Velocidad de la línea emulada
+            probabilidad_error (float): Probabilidad de corromper cada byte recibido
+            capacidad (int): Consignas en el buffer
+            semilla (int): Semilla del generador de errores
+        """
+        self.baudios = baudios
+        self.probabilidad_error = probabilidad_error
+        self.capacidad = capacidad
+        self.rng = np.random.default_rng(semilla)
+        self.maestro, self.esclavo = pty.openpty()
+        tty.setraw(self.esclavo)
+        self.ruta = os.ttyname(self.esclavo)
+        self.analizador = AnalizadorTramas()
+        self.tramas = 0
+        self.huecos = 0
+        self.vacios = 0  # Consignas que tocaba reproducir con el buffer vacío
+        self._esperado = None
+        self._ocupacion = 0
+        self._periodo = None
+        self._ultima_reproduccion = None
+        self._activo = False
+        self._hilo = None
+
+    def __enter__(self):
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._activo = False
+        self._hilo.join()
+        os.close(self.maestro)
+        os.close(self.esclavo)
+
+    def _reproducir(self, ahora):
+        """Vacía el buffer con las consignas que ya tocaba reproducir."""
+        if self._periodo is None:
+            return
+        debidas = int((ahora - self._ultima_reproduccion) / self._periodo)
+        if debidas <= 0:
+            return
+        self._ultima_reproduccion += debidas * self._periodo
+        self.vacios += max(debidas - self._ocupacion, 0)
+        self._ocupacion = max(self._ocupacion - debidas, 0)
+
+    def _bucle(self):
+        """Recibe tramas y responde hasta que se detiene."""
+        while self._activo:
+            listos, _, _ = select.select([self.maestro], [], [], 0.05)
+            if not listos:
+                continue
+            try:
+                datos = os.read(self.maestro, 4096)
+            except OSError:
+                return
+            # Tiempo de transmisión por la línea serie
+            time.sleep(10 * len(datos) / self.baudios)
+            if self.probabilidad_error:
+                datos = bytearray(datos)
+                for i in np.flatnonzero(self.rng.random(len(datos)) < self.probabilidad_error):
+                    datos[i] ^= 1 << int(self.rng.integers(8))
+
+            ahora = time.perf_counter()
+            self._reproducir(ahora)
+            for seq, periodo_ms, consignas in self.analizador.alimentar(datos):
+                self.tramas += 1
+                estado = ESTADO_ACEPTADA
+                if self._esperado is not None and seq != self._esperado:
+                    estado = ESTADO_HUECO
+                    self.huecos += 1
+                self._esperado = (seq + 1) & 0xFFFF
+                if self._ocupacion + len(consignas) > self.capacidad:
+                    estado = ESTADO_LLENO
+                else:
+                    if self._periodo is None:
+                        self._ultima_reproduccion = ahora
+                    self._periodo = periodo_ms / 1000
+                    self._ocupacion += len(consignas)
+                libres = self.capacidad - self._ocupacion
+                os.write(self.maestro, _RESPUESTA.pack(RESPUESTA, seq, estado, libres))
+
+
+class EmisorConsignas:
+    """
+    Envía tramas por un descriptor serie y empareja las respuestas.
+    """
+
+    def __init__(self, fd, espera_respuesta=0.5):
+        """
+        Inicializa el emisor.
+
+        Args:
+            fd (int): Descriptor del puerto (ver abrir_puerto)
+            espera_respuesta (float): Segundos tras los que una trama sin
+                respuesta cuenta como perdida
+        """
+        self.fd = fd
+        self.espera_respuesta = espera_respuesta
+        self.analizador = AnalizadorRespuestas()
+        self.seq = 0
+        self.enviadas = {}  # seq -> instante de envío
+        self.latencias = []
+        self.estados = {ESTADO_ACEPTADA: 0, ESTADO_HUECO: 0, ESTADO_LLENO: 0}
+        self.perdidas = 0
+        self.bytes_enviados = 0
+        self.consignas_enviadas = 0
+
+    def enviar(self, periodo_ms, consignas):
+        """
+        Envía una trama con las consignas dadas.
+
+        Args:
+            periodo_ms (int): Milisegundos entre consignas
+            consignas (array): (n, 2) ángulos en cuartos de grado
+        """
+        trama = codificar_trama(self.seq, periodo_ms, consignas)
+        escrito = 0
+        while escrito < len(trama):
+            try:
+                escrito += os.write(self.fd, trama[escrito:])
+            except BlockingIOError:
+                select.select([], [self.fd], [], 0.01)
+        self.enviadas[self.seq] = time.perf_counter()
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.bytes_enviados += len(trama)
+        self.consignas_enviadas += len(consignas)
+
+    def recoger(self, hasta):
+        """
+        Lee respuestas hasta el instante dado (reloj perf_counter).
+
+        Args:
+            hasta (float): Instante hasta el que esperar respuestas
+        """
+        while True:
+            restante = hasta - time.perf_counter()
+            listos, _, _ = select.select([self.fd], [], [], max(restante, 0))
+            if listos:
+                try:
+                    datos = os.read(self.fd, 4096)
+                except BlockingIOError:
+                    datos = b''
+                ahora = time.perf_counter()
+                for seq, estado, _ in self.analizador.alimentar(datos):
+                    enviada = self.enviadas.pop(seq, None)
+                    if enviada is not None:
+                        self.latencias.append(ahora - enviada)
+                        self.estados[estado] = self.estados.get(estado, 0) + 1
+            ahora = time.perf_counter()
+            caducadas = [seq for seq, t in self.enviadas.items() if ahora - t > self.espera_respuesta]
+            for seq in caducadas:
+                del self.enviadas[seq]
+                self.perdidas += 1
+            if restante <= 0:
+                return
+
+    def estadisticas(self, duracion):
+        """
+        Resumen del envío.
+
+        Args:
+            duracion (float): Tiempo real transcurrido (s)
+
+        Returns:
+            dict: Latencias (ms), tramas confirmadas y perdidas, caudal
+        """
+        latencias = 1e3 * np.array(self.latencias) if self.latencias else np.zeros(1)
+        tramas = sum(self.estados.values()) + self.perdidas
+        return {
+            'tramas': tramas,
+            'confirmadas': sum(self.estados.values()),
+            'perdidas': self.perdidas,
+            'tasa_perdidas': self.perdidas / tramas if tramas else 0.0,
+            'huecos': self.estados[ESTADO_HUECO],
+            'rechazadas_lleno': self.estados[ESTADO_LLENO],
+            'latencia_p50_ms': float(np.percentile(latencias, 50)),
+            'latencia_p99_ms': float(np.percentile(latencias, 99)),
+            'latencia_max_ms': float(latencias.max()),
+            'consignas_por_s': self.consignas_enviadas / duracion,
+            'bytes_por_s': self.bytes_enviados / duracion,
+        }
+
+
+def consignas_lipm(n, altura=1.2, gravedad=9.8, dt=0.02, velocidad=0.5, medio_paso=0.3):
+    """
+    Consignas de servo de una marcha sagital sin fin (colocación en línea).
+
+    Los ángulos son los de las piernas reales de Boby con la trayectoria
+    escalada a la altura de su CoM (cinematica_boby.angulos_desde_lipm), y
+    las consignas las de cinematica_boby.angulos_servo.
+
+    Args:
+        n (int): Número de consignas (una por paso de simulación)
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        dt (float): Paso de simulación (s)
+        velocidad (float): Velocidad de marcha (m/s)
+        medio_paso (float): Umbral de cambio de apoyo (m)
+
+    Returns:
+        array: (n, 2) ángulos absolutos en cuartos de grado
+    """
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM
+    from cinematica_boby import angulos_desde_lipm, angulos_servo
+    from colocacion_pasos import ColocacionSagital
+
+    simulador = SimuladorLIPM(ModeloLIPM(altura, gravedad), dt=dt, capacidad_historial=1,
+                              historial_circular=True, x_dot_0=velocidad,
+                              colocacion=ColocacionSagital(velocidad, medio_paso))
+    x_rel = np.empty(n)
+    apoyo = np.empty(n, dtype=np.intp)
+    for i in range(n):
+        simulador.paso()
+        x_rel[i] = simulador.x_t_rel
+        apoyo[i] = simulador.zmp_idx
+    theta_izq, theta_der, _ = angulos_desde_lipm(x_rel, 0.0, apoyo, altura)
+    consignas, _ = angulos_servo(theta_izq, theta_der)
+    return np.round(CUARTOS * consignas).astype(np.uint16)
+
+
+def transmitir(fd, consignas, dt=0.02, lote=1, adelanto=0.04, espera_respuesta=0.5):
+    """
+    Envía consignas al ritmo del reloj de simulación.
+
+    La trama con las consignas de [t, t + lote·dt) sale en el instante real
+    t - adelanto, de modo que llega antes de tener que reproducirse; entre
+    envíos se recogen las respuestas.
+
+    Args:
+        fd (int): Descriptor del puerto
+        consignas (array): (n, 2) ángulos en cuartos de grado, una por dt
+        dt (float): Paso de simulación (s)
+        lote (int): Consignas por trama
+        adelanto (float): Antelación de cada trama (s)
+        espera_respuesta (float): Espera máxima de cada respuesta (s)
+
+    Returns:
+        dict: Estadísticas de EmisorConsignas
+    """
+    emisor = EmisorConsignas(fd, espera_respuesta)
+    periodo_ms = round(1000 * dt)
+    inicio = time.perf_counter() + adelanto
+    for primera in range(0, len(consignas), lote):
+        emisor.recoger(inicio + primera * dt - adelanto)
+        emisor.enviar(periodo_ms, consignas[primera:primera + lote])
+    # El caudal se mide sobre el tiempo cubierto por los envíos, sin la espera final
+    duracion = time.perf_counter() - inicio + adelanto + lote * dt
+    emisor.recoger(time.perf_counter() + espera_respuesta)
+    return emisor.estadisticas(duracion)
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Envío de consignas LIPM a Boby por puerto serie')
+    parser.add_argument('--puerto', default=None, help='Puerto serie del Nano (por defecto, NanoVirtual)')
+    parser.add_argument('--baudios', type=int, default=BAUDIOS, help='Velocidad de la línea')
+    parser.add_argument('--duracion', type=float, default=10.0, help='Segundos de marcha a enviar')
+    parser.add_argument('--lote', type=int, default=1, help=f'Consignas por trama (1..{MAX_CONSIGNAS})')
+    parser.add_argument('--adelanto_ms', type=float, default=40.0, help='Antelación de cada trama (ms)')
+    parser.add_argument('--velocidad', type=float, default=0.5, help='Velocidad de marcha simulada (m/s)')
+    parser.add_argument('--error', type=float, default=0.0,
+                        help='Probabilidad de corromper cada byte (solo NanoVirtual)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    dt = 0.02
+    consignas = consignas_lipm(int(math.ceil(args.duracion / dt)), dt=dt, velocidad=args.velocidad)
+
+    if args.puerto:
+        fd = abrir_puerto(args.puerto, args.baudios)
+        try:
+            time.sleep(2.0)  # Abrir el puerto reinicia el Nano: esperar al bootloader
+            estadisticas = transmitir(fd, consignas, dt, args.lote, args.adelanto_ms / 1000)
+        finally:
+            os.close(fd)
+    else:
+        with NanoVirtual(args.baudios, args.error) as nano:
+            fd = abrir_puerto(nano.ruta, args.baudios)
+            try:
+                estadisticas = transmitir(fd, consignas, dt, args.lote, args.adelanto_ms / 1000)
+            finally:
+                os.close(fd)
+        print(f"NanoVirtual: {nano.tramas} tramas válidas, {nano.analizador.errores_crc} errores de CRC, "
+              f"{nano.huecos} huecos de secuencia, {nano.vacios} consignas con el buffer vacío")
+
+    e = estadisticas
+    print(f"{e['tramas']} tramas de {args.lote} consignas: {e['confirmadas']} confirmadas, "
+          f"{e['perdidas']} perdidas ({100 * e['tasa_perdidas']:.2f}%), {e['rechazadas_lleno']} con buffer lleno")
+    print(f"Latencia ida y vuelta: p50 {e['latencia_p50_ms']:.2f} ms, p99 {e['latencia_p99_ms']:.2f} ms, "
+          f"máx {e['latencia_max_ms']:.2f} ms")
+    print(f"Caudal: {e['consignas_por_s']:.1f} consignas/s, {e['bytes_por_s']:.0f} bytes/s "
+          f"({100 * 10 * e['bytes_por_s'] / args.baudios:.1f}% de la línea)")
+
+
+if __name__ == "__main__":
+    main()
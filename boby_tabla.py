@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+"""
+Generador de la tabla de ángulos de los servos de Boby a partir del LIPM.
+
+Movimineto_Seno.ino calcula dos sin() en coma flotante por iteración y mueve
+las piernas con una senoide fija, sin relación con los simuladores. Este
+script simula un ciclo de marcha periódico (dos apoyos, izquierdo y derecho)
+con SimuladorLIPM o LIPMSimulator, lo convierte en ángulos de pierna y
+escribe una cabecera C con la tabla en PROGMEM para el sketch
+Boby/Arduino/Movimiento_LIPM, cuyo bucle queda en una lectura de tabla y
+aritmética entera.
+
+Ángulos de pierna: durante un apoyo la pierna de apoyo va del pie al CoM,
+θ = atan(x_rel / altura), y la pierna libre se mueve en espejo (-θ). Con
+cambio de apoyo en x_rel = ±d la curva de cada pierna es continua. Es el
+ángulo del péndulo del modelo, no el de la pierna de Boby
+(cinematica_boby.angulos_desde_lipm, θ = asin(k·x_rel / L)): la tabla solo
+guarda la forma de la curva, porque las desviaciones se escalan para que el
+pico valga `amplitud` grados (como AMPLITUD en el sketch senoidal), sirve
+también para el ciclo frontal, que cinematica_boby no modela, y el ciclo
+sagital por defecto (pasos de 4 m a 1.2 m de altura) queda fuera del alcance
+de la pierna real. Se guardan ya con el signo de montaje: el servo derecho está
+montado en espejo, así que ambas columnas se suman a su CENTRO tal cual.
+
+Formato: int8 en cuartos de grado (±31.75°), dos bytes por entrada. El
+sketch convierte CENTRO·4 + valor en microsegundos con enteros
+(writeMicroseconds), con la misma cuenta que reproduce verificar_tabla.
+
+Ejemplo:
+    python boby_tabla.py --periodo_ms 20 --duracion_ms 1000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+import numpy as np
+
+CENTRO_IZQ = 95  # Ángulos de reposo de Movimineto_Seno.ino
+CENTRO_DER = 95
+AMPLITUD = 15  # Desviación pico por defecto (grados)
+CUARTOS = 4  # Resolución de la tabla: cuartos de grado
+PULSO_MIN = 544  # Pulsos por defecto de la librería Servo para 0° y 180° (µs)
+PULSO_MAX = 2400
+SALIDA_DEFECTO = os.path.join('Boby', 'Arduino', 'Movimiento_LIPM', 'tabla_lipm.h')
+
+
+def ciclo_sagital(altura=1.2, gravedad=9.8, x_dot_0=0.3, longitud_paso=4.0, n_pasos=6):
+    """
+    Dos apoyos consecutivos de la marcha sagital periódica.
+
+    Con umbrales a mitad de paso la marcha es periódica desde el primer
+    cambio; se toman los dos últimos apoyos completos.
+
+    Args:
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        x_dot_0 (float): Velocidad inicial (m/s)
+        longitud_paso (float): Distancia entre ZMP consecutivos (m)
+        n_pasos (int): Apoyos simulados (al menos 3)
+
+    Returns:
+        tuple: (inicios, x_0, x_dot_0, T_c, t_fin): instantes de inicio y
+        estado relativo inicial de los dos apoyos, constante de tiempo y
+        final del segundo apoyo
+    """
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM
+
+    zmp = [i * longitud_paso for i in range(n_pasos + 1)]
+    cambios = [(i + 0.5) * longitud_paso for i in range(n_pasos)]
+    modelo = ModeloLIPM(altura, gravedad)
+    fases = SimuladorLIPM(modelo, capacidad_historial=1, x_dot_0=x_dot_0,
+                          zmp_x=zmp, zmp_x_change=cambios).simular_eventos()
+    ciclo = fases[-3:-1]
+    return (np.array([fase.t_inicio for fase in ciclo]), np.array([fase.x_0_rel for fase in ciclo]),
+            np.array([fase.x_dot_0 for fase in ciclo]), modelo.T_c, fases[-1].t_inicio)
+
+
+def ciclo_frontal(altura=1.2, gravedad=9.8, ancho=0.4, duracion_paso=0.6, n_pasos=8):
+    """
+    Dos apoyos consecutivos de la marcha frontal con colocación en línea.
+
+    La colocación por la componente divergente lleva la marcha a un ciclo
+    periódico en pocos pasos; se toman los dos últimos apoyos completos
+    empezando por el pie izquierdo.
+
+    Args:
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        ancho (float): Separación lateral entre pies (m)
+        duracion_paso (float): Duración de cada apoyo (s)
+        n_pasos (int): Apoyos simulados (al menos 4)
+
+    Returns:
+        tuple: (inicios, y_0, y_dot_0, T_c, t_fin) como ciclo_sagital
+    """
+    from Frontal_Mejorado import LIPMSimulator
+    from colocacion_pasos import ColocacionFrontal
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador = LIPMSimulator(altura, gravedad, max_time=(n_pasos + 0.5) * duracion_paso,
+                                  history_capacity=1, placement=ColocacionFrontal(ancho, duracion_paso))
+        fases = simulador.simulate_events()
+    primero = len(fases) - 3 if fases[-3].foot == 'LF' else len(fases) - 4
+    ciclo = fases[primero:primero + 2]
+    return (np.array([fase.t_start for fase in ciclo]), np.array([fase.y_0_rel for fase in ciclo]),
+            np.array([fase.y_dot_0 for fase in ciclo]), simulador.T_c, fases[primero + 2].t_start)
+
+
+def angulos_pierna(ciclo, altura, fracciones):
+    """
+    Ángulos de las dos piernas a lo largo del ciclo.
+
+    Args:
+        ciclo (tuple): Resultado de ciclo_sagital o ciclo_frontal
+        altura (float): Altura del CoM (m)
+        fracciones (array): Instantes como fracción del ciclo, en [0, 1)
+
+    Returns:
+        tuple: (izquierda, derecha) en grados; el primer apoyo es el izquierdo
+    """
+    inicios, x_0, x_dot_0, T_c, t_fin = ciclo
+    tiempos = inicios[0] + np.asarray(fracciones, dtype=float) * (t_fin - inicios[0])
+    fase = (tiempos >= inicios[1]).astype(np.intp)
+    tau = (tiempos - inicios[fase]) / T_c
+    x_rel = x_0[fase] * np.cosh(tau) + T_c * x_dot_0[fase] * np.sinh(tau)
+
+    apoyo = np.degrees(np.arctan2(x_rel, altura))
+    izquierda = np.where(fase == 0, apoyo, -apoyo)
+    return izquierda, -izquierda
+
+
+def generar_tabla(ciclo, altura, n_entradas, amplitud=AMPLITUD):
+    """
+    Tabla de desviaciones de servo en cuartos de grado.
+
+    Args:
+        ciclo (tuple): Resultado de ciclo_sagital o ciclo_frontal
+        altura (float): Altura del CoM (m)
+        n_entradas (int): Entradas por ciclo
+        amplitud (float): Desviación pico (grados); None para usar el
+            ángulo de pierna real
+
+    Returns:
+        tuple: (tabla int8 (n_entradas, 2), escala aplicada, entradas saturadas)
+    """
+    izquierda, derecha = angulos_pierna(ciclo, altura, np.arange(n_entradas) / n_entradas)
+    escala = 1.0 if amplitud is None else amplitud / max(np.abs(izquierda).max(), 1e-12)
+    # El servo derecho está montado en espejo: su desviación de servo es -θ_der
+    servo = np.column_stack([izquierda, -derecha]) * escala * CUARTOS
+    cuantizada = np.round(servo)
+    saturadas = int(np.count_nonzero((cuantizada < -128) | (cuantizada > 127)))
+    return np.clip(cuantizada, -128, 127).astype(np.int8), escala, saturadas
+
+
+def pulso(cuartos):
+    """
+    Pulso en microsegundos que escribe el sketch, con su misma aritmética entera.
+
+    Args:
+        cuartos (array): Ángulo absoluto en cuartos de grado
+
+    Returns:
+        array: Pulsos en µs
+    """
+    cuartos = np.clip(np.asarray(cuartos, dtype=np.int64), 0, 180 * CUARTOS)
+    return PULSO_MIN + cuartos * (PULSO_MAX - PULSO_MIN) // (180 * CUARTOS)
+
+
+def verificar_tabla(tabla, periodo_ms, ciclo, altura, escala, duracion_ms, resolucion=20):
+    """
+    Reproduce la tabla como el sketch y la compara con la trayectoria continua.
+
+    Cada entrada se mantiene durante periodo_ms (el sketch marca el ritmo con
+    millis()), se convierte a pulso con aritmética entera y de vuelta a
+    grados. La referencia es el ángulo escalado evaluado `resolucion` veces
+    por entrada.
+
+    Args:
+        tabla (array): Tabla int8 (n, 2)
+        periodo_ms (int): Periodo entre entradas (ms)
+        ciclo (tuple): Ciclo del que sale la tabla
+        altura (float): Altura del CoM (m)
+        escala (float): Escala aplicada al generar la tabla
+        duracion_ms (float): Duración deseada del ciclo (ms)
+        resolucion (int): Muestras de referencia por entrada
+
+    Returns:
+        dict: 'error_max', 'error_rms' y 'error_cuantizacion' (grados),
+        'duracion_ms' real frente a 'duracion_objetivo_ms', 'bytes' y 'periodo_ms'
+    """
+    n = len(tabla)
+    # Instante de cada muestra de referencia en el ciclo que ejecuta el robot
+    fracciones = np.arange(n * resolucion) / (n * resolucion)
+    izquierda, derecha = angulos_pierna(ciclo, altura, fracciones)
+    referencia = np.column_stack([izquierda, -derecha]) * escala
+
+    centros = np.array([CENTRO_IZQ, CENTRO_DER])
+    pulsos = pulso(CUARTOS * centros + tabla.astype(np.int64))
+    ejecutado = (pulsos - PULSO_MIN) * 180.0 / (PULSO_MAX - PULSO_MIN) - centros
+    mantenido = np.repeat(ejecutado, resolucion, axis=0)
+
+    error = mantenido - referencia
+    error_cuantizacion = ejecutado - referencia[::resolucion]
+    return {
+        'error_max': float(np.abs(error).max()),
+        'error_rms': float(np.sqrt(np.mean(error ** 2))),
+        'error_cuantizacion': float(np.abs(error_cuantizacion).max()),
+        'duracion_ms': n * periodo_ms,
+        'duracion_objetivo_ms': duracion_ms,
+        'bytes': tabla.nbytes,
+        'periodo_ms': periodo_ms,
+    }
+
+
+def escribir_cabecera(ruta, tabla, periodo_ms, descripcion):
+    """
+    Escribe la tabla como cabecera C en PROGMEM.
+
+    Args:
+        ruta (str): Fichero de salida (.h)
+        tabla (array): Tabla int8 (n, 2)
+        periodo_ms (int): Periodo entre entradas (ms)
+        descripcion (str): Comentario con el origen de la tabla
+    """
+    filas = [f"  {{{izq:4d}, {der:4d}}}," for izq, der in tabla.tolist()]
+    texto = '\n'.join([
+        "// Generado por boby_tabla.py; no editar a mano.",
+        f"// {descripcion}",
+        "// Desviaciones de CENTRO_IZQ / CENTRO_DER en cuartos de grado.",
+        "#ifndef TABLA_LIPM_H",
+        "#define TABLA_LIPM_H",
+        "",
+        "#include <avr/pgmspace.h>",
+        "",
+        f"#define TABLA_LIPM_N {len(tabla)}",
+        f"#define TABLA_LIPM_PERIODO_MS {periodo_ms}",
+        "",
+        "const int8_t TABLA_LIPM[TABLA_LIPM_N][2] PROGMEM = {",
+        *filas,
+        "};",
+        "",
+        "#endif",
+        "",
+    ])
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, 'w') as f:
+        f.write(texto)
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Tabla de ángulos de servo de Boby a partir del LIPM')
+    parser.add_argument('--salida', default=SALIDA_DEFECTO, help='Cabecera C de salida')
+    parser.add_argument('--plano', choices=['sagital', 'frontal'], default='sagital')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del CoM (m)')
+    parser.add_argument('--gravedad', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--v0', type=float, default=0.3, help='Velocidad inicial sagital (m/s)')
+    parser.add_argument('--longitud_paso', type=float, default=4.0, help='Longitud de paso sagital (m)')
+    parser.add_argument('--ancho', type=float, default=0.4, help='Separación lateral entre pies (m)')
+    parser.add_argument('--duracion_paso', type=float, default=0.6, help='Duración de apoyo frontal (s)')
+    parser.add_argument('--periodo_ms', type=int, default=20, help='Periodo entre entradas (ms)')
+    parser.add_argument('--duracion_ms', type=float, default=None,
+                        help='Duración del ciclo en el robot (por defecto, la simulada)')
+    parser.add_argument('--amplitud', type=float, default=AMPLITUD,
+                        help='Desviación pico de los servos (grados; 0 para el ángulo real)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    if args.plano == 'sagital':
+        ciclo = ciclo_sagital(args.altura, args.gravedad, args.v0, args.longitud_paso)
+        descripcion = f"Sagital: altura {args.altura:g} m, v0 {args.v0:g} m/s, paso {args.longitud_paso:g} m"
+    else:
+        ciclo = ciclo_frontal(args.altura, args.gravedad, args.ancho, args.duracion_paso)
+        descripcion = f"Frontal: altura {args.altura:g} m, ancho {args.ancho:g} m, apoyo {args.duracion_paso:g} s"
+
+    duracion_simulada = 1000 * (ciclo[4] - ciclo[0][0])
+    duracion_ms = duracion_simulada if args.duracion_ms is None else args.duracion_ms
+    n_entradas = max(2, round(duracion_ms / args.periodo_ms))
+    tabla, escala, saturadas = generar_tabla(ciclo, args.altura, n_entradas, args.amplitud or None)
+    escribir_cabecera(args.salida, tabla, args.periodo_ms,
+                      f"{descripcion}; ciclo simulado {duracion_simulada:.0f} ms")
+
+    informe = verificar_tabla(tabla, args.periodo_ms, ciclo, args.altura, escala, duracion_ms)
+    print(f"{n_entradas} entradas cada {args.periodo_ms} ms ({informe['bytes']} bytes de flash) "
+          f"en {args.salida}")
+    print(f"Ciclo: {informe['duracion_ms']} ms en el robot frente a {duracion_ms:.0f} ms pedidos "
+          f"(simulado {duracion_simulada:.0f} ms, escala de ángulo {escala:.3f})")
+    print(f"Error de ángulo reproducido: máximo {informe['error_max']:.2f}°, "
+          f"RMS {informe['error_rms']:.2f}°, de cuantización {informe['error_cuantizacion']:.2f}°")
+    if saturadas:
+        print(f"Aviso: {saturadas} valores fuera de ±{128 / CUARTOS:g}° saturados")
+    if args.periodo_ms < 20:
+        print("Nota: los servos reciben un pulso cada 20 ms; con periodos menores "
+              "algunas entradas no llegan a aplicarse")
+
+
+if __name__ == "__main__":
+    main()
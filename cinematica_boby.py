@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""
+Cinemática de las piernas de Boby para convertir trayectorias LIPM en consignas de servo.
+
+Cada pierna es una barra rígida movida por un servo 9g en la cadera (pines
+10 y 11 de Movimineto_Seno.ino). La longitud L entre los ejes de cadera y
+tobillo y la altura del tobillo sobre la planta se miden en Pierna.stl y
+Pie.stl (ver propiedades_masa.py); el pie gira libre en el tobillo y queda
+plano en el suelo.
+
+θ es la inclinación de la pierna respecto a la vertical, positiva con la
+cadera por delante del tobillo: el mismo signo y montaje de servos que
+boby_tabla.py, que sin embargo usa el ángulo del péndulo del modelo,
+atan(x_rel / altura), porque solo guarda la forma de la curva (ver su
+docstring). boby_serie.py envía los ángulos de este módulo. En el sistema de
+la cadera (X hacia delante, Z hacia arriba):
+
+- Directa: tobillo = (-L·sin θ, -L·cos θ); con el pie de apoyo en el suelo
+  la cadera queda a h_tobillo + L·cos θ_apoyo.
+- Inversa cerrada: θ = atan2(x_cadera - x_tobillo, z_cadera - z_tobillo). Con
+  un solo grado de libertad el tobillo solo alcanza la circunferencia de
+  radio L; el error de distancia se devuelve para marcar los objetivos
+  inalcanzables.
+- Desde el LIPM: la cadera debe ir a k·(x_CoM - ZMP) del tobillo de apoyo,
+  con k = altura del CoM de Boby / altura del modelo, así que
+  θ_apoyo = asin(k·x_rel / L) y la pierna libre va en espejo.
+
+Servos: izquierdo = CENTRO_IZQ + θ_izq y derecho = CENTRO_DER - θ_der (montado
+en espejo). Las consignas fuera de 0..180° se marcan como violaciones del
+constrain() del sketch, que las recortaría.
+
+Todas las funciones operan sobre arrays completos (p. ej. las 50k muestras
+de una simulación) en una sola llamada vectorizada.
+
+Ejemplo:
+    python cinematica_boby.py --muestras 50000 --velocidad 0.5
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from boby_tabla import CENTRO_DER, CENTRO_IZQ
+
+LIMITES_SERVO = (0.0, 180.0)  # constrain() de Movimineto_Seno.ino (grados)
+
+# Medidas de la pierna (m): eje a eje, tobillo sobre la planta y altura del CoM de pie
+GeometriaPierna = namedtuple('GeometriaPierna', ['longitud', 'altura_tobillo', 'altura_com'])
+
+# Posición de los tobillos en el sistema de la cadera (..., 2) y altura de la cadera (m)
+Postura = namedtuple('Postura', ['tobillo_izq', 'tobillo_der', 'altura_cadera'])
+
+
+@functools.lru_cache(maxsize=1)
+def geometria_pierna():
+    """
+    Medidas de la pierna de Boby tomadas de los STL.
+
+    Returns:
+        GeometriaPierna: Longitud, altura del tobillo y altura del CoM (m)
+    """
+    from propiedades_masa import MM, TOBILLO_PIE, longitud_pierna, propiedades_boby
+
+    return GeometriaPierna(longitud_pierna(), TOBILLO_PIE[2] * MM,
+                           float(propiedades_boby().centro_masas[2]))
+
+
+def directa(theta_izq, theta_der, geometria=None):
+    """
+    Cinemática directa de las dos piernas.
+
+    Args:
+        theta_izq (array): Inclinación de la pierna izquierda (grados)
+        theta_der (array): Inclinación de la pierna derecha (grados)
+        geometria (GeometriaPierna): Medidas (por defecto, las de los STL)
+
+    Returns:
+        Postura: Tobillos respecto a la cadera y altura de la cadera sobre el
+        suelo, apoyada en la pierna más vertical
+    """
+    geometria = geometria or geometria_pierna()
+    L = geometria.longitud
+    izq = np.radians(np.asarray(theta_izq, dtype=float))
+    der = np.radians(np.asarray(theta_der, dtype=float))
+    tobillo_izq = np.stack([-L * np.sin(izq), -L * np.cos(izq)], axis=-1)
+    tobillo_der = np.stack([-L * np.sin(der), -L * np.cos(der)], axis=-1)
+    altura_cadera = geometria.altura_tobillo + L * np.maximum(np.cos(izq), np.cos(der))
+    return Postura(tobillo_izq, tobillo_der, altura_cadera)
+
+
+def inversa(tobillo, geometria=None):
+    """
+    Cinemática inversa cerrada de una pierna.
+
+    Args:
+        tobillo (array): Posiciones objetivo del tobillo respecto a la cadera (..., 2)
+        geometria (GeometriaPierna): Medidas (por defecto, las de los STL)
+
+    Returns:
+        tuple: (θ en grados, error de distancia |tobillo| - L en m); el
+               ángulo es el del punto alcanzable más cercano
+    """
+    geometria = geometria or geometria_pierna()
+    tobillo = np.asarray(tobillo, dtype=float)
+    theta = np.degrees(np.arctan2(-tobillo[..., 0], -tobillo[..., 1]))
+    return theta, np.hypot(tobillo[..., 0], tobillo[..., 1]) - geometria.longitud
+
+
+def angulos_desde_lipm(x_com, zmp, apoyo, altura, escala=None, geometria=None):
+    """
+    Inclinaciones de las dos piernas para seguir una trayectoria sagital del LIPM.
+
+    Args:
+        x_com (array): Posición sagital del CoM (m, en la escala del modelo)
+        zmp (array): ZMP activo, es decir, posición del pie de apoyo (m)
+        apoyo (array): Índice de la fase de apoyo; par = pie izquierdo
+        altura (float): Altura del CoM del modelo LIPM (m)
+        escala (float): Factor del modelo a Boby (por defecto, altura del CoM
+            de Boby / altura)
+        geometria (GeometriaPierna): Medidas (por defecto, las de los STL)
+
+    Returns:
+        tuple: (theta_izq, theta_der) en grados y máscara de muestras
+               alcanzables (|desplazamiento de la cadera| <= L)
+    """
+    geometria = geometria or geometria_pierna()
+    if escala is None:
+        escala = geometria.altura_com / altura
+    seno = escala * (np.asarray(x_com, dtype=float) - zmp) / geometria.longitud
+    alcanzable = np.abs(seno) <= 1
+    theta = np.degrees(np.arcsin(np.clip(seno, -1, 1)))
+    theta_izq = np.where(np.asarray(apoyo) % 2 == 0, theta, -theta)
+    return theta_izq, -theta_izq, alcanzable
+
+
+def angulos_servo(theta_izq, theta_der):
+    """
+    Consignas de los servos y violaciones del rango 0..180° del sketch.
+
+    Args:
+        theta_izq (array): Inclinación de la pierna izquierda (grados)
+        theta_der (array): Inclinación de la pierna derecha (grados)
+
+    Returns:
+        tuple: (consignas (..., 2) en grados ya recortadas como constrain(),
+               máscara (..., 2) de consignas fuera de rango)
+    """
+    consignas = np.stack([CENTRO_IZQ + np.asarray(theta_izq, dtype=float),
+                          CENTRO_DER - np.asarray(theta_der, dtype=float)], axis=-1)
+    fuera = (consignas < LIMITES_SERVO[0]) | (consignas > LIMITES_SERVO[1])
+    return np.clip(consignas, *LIMITES_SERVO), fuera
+
+
+def trayectoria_sagital(n, altura=1.2, gravedad=9.8, dt=0.02, velocidad=0.5, medio_paso=0.3):
+    """
+    Muestrea n instantes de una marcha sagital sin fin de SimuladorLIPM.
+
+    El simulador avanza por eventos con colocación de pasos en línea y la
+    trayectoria se evalúa después en todos los instantes a la vez.
+
+    Returns:
+        tuple: (tiempos, x_com, zmp, índice de fase de apoyo)
+    """
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM, muestrear_fases
+    from colocacion_pasos import ColocacionSagital
+
+    modelo = ModeloLIPM(altura, gravedad)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador = SimuladorLIPM(modelo, dt=dt, capacidad_historial=1, historial_circular=True,
+                                  x_dot_0=velocidad, colocacion=ColocacionSagital(velocidad, medio_paso))
+        fases = simulador.simular_eventos(n * dt)
+    tiempos = np.arange(1, n + 1) * dt
+    x_com, _, zmp = muestrear_fases(modelo, fases, tiempos)
+    inicios = np.array([fase.t_inicio for fase in fases])
+    apoyo = np.searchsorted(inicios, tiempos, side='right') - 1
+    return tiempos, x_com, zmp, apoyo
+
+
+def parse_arguments():
+    """Parsea los argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Cinemática de las piernas de Boby a partir del LIPM')
+    parser.add_argument('--muestras', type=int, default=50000, help='Muestras de la trayectoria')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del CoM del modelo (m)')
+    parser.add_argument('--boby', action='store_true',
+                        help='Simular con la altura del CoM de Boby (sin escalar la trayectoria)')
+    parser.add_argument('--gravedad', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--dt', type=float, default=0.02, help='Paso de simulación (s)')
+    parser.add_argument('--velocidad', type=float, default=0.5, help='Velocidad de marcha (m/s)')
+    parser.add_argument('--medio_paso', type=float, default=0.3,
+                        help='Umbral de cambio de apoyo, en la escala del modelo (m)')
+    parser.add_argument('--escala', type=float, default=None,
+                        help='Factor del modelo a Boby (por defecto, cociente de alturas del CoM)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    geometria = geometria_pierna()
+    altura = geometria.altura_com if args.boby else args.altura
+    medio_paso = args.medio_paso * altura / args.altura if args.boby else args.medio_paso
+    velocidad = args.velocidad * altura / args.altura if args.boby else args.velocidad
+
+    inicio = time.perf_counter()
+    _, x_com, zmp, apoyo = trayectoria_sagital(args.muestras, altura, args.gravedad, args.dt,
+                                               velocidad, medio_paso)
+    duracion_simulacion = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    theta_izq, theta_der, alcanzable = angulos_desde_lipm(x_com, zmp, apoyo, altura, args.escala, geometria)
+    consignas, fuera = angulos_servo(theta_izq, theta_der)
+    duracion = (time.perf_counter() - inicio) * 1000
+
+    postura = directa(theta_izq, theta_der, geometria)
+    theta_inversa, error_distancia = inversa(postura.tobillo_izq, geometria)
+    altura_cadera = postura.altura_cadera * 1000
+
+    print(f"Pierna (STL): L = {geometria.longitud * 1000:.1f} mm, tobillo a "
+          f"{geometria.altura_tobillo * 1000:.2f} mm, CoM a {geometria.altura_com * 1000:.1f} mm")
+    print(f"{args.muestras} muestras: simulación {duracion_simulacion:.1f} ms, "
+          f"ángulos y consignas {duracion:.2f} ms")
+    print(f"Inclinación de pierna: {theta_izq.min():+.2f}° .. {theta_izq.max():+.2f}°")
+    print(f"Consignas: izquierda {consignas[:, 0].min():.2f}..{consignas[:, 0].max():.2f}°, "
+          f"derecha {consignas[:, 1].min():.2f}..{consignas[:, 1].max():.2f}°")
+    print(f"Fuera de 0..180°: {np.count_nonzero(fuera.any(axis=1))} muestras; "
+          f"inalcanzables: {np.count_nonzero(~alcanzable)}")
+    print(f"Altura de la cadera: {altura_cadera.min():.1f}..{altura_cadera.max():.1f} mm "
+          f"(el LIPM la supone constante)")
+    print(f"Ida y vuelta directa/inversa: error máximo {np.abs(theta_inversa - theta_izq).max():.1e}° "
+          f"y {np.abs(error_distancia).max():.1e} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+Colocación de pasos en línea a partir del punto de captura.
+
+En lugar de recorrer una lista fija de ZMP, el simulador pregunta en cada
+cambio de apoyo dónde poner el siguiente pie, con una fórmula cerrada sobre
+el estado relativo actual (posición x y velocidad ẋ respecto al ZMP):
+
+- Sagital (ColocacionSagital): la energía orbital E = ½ẋ² - ½x²/T_c² se
+  conserva durante el apoyo, así que apoyando el pie a una distancia
+  d = T_c·sqrt(ẋ² - v²) por delante del CoM, el CoM pasa sobre él con
+  velocidad v. Con v = 0 es el punto de captura ξ = x + T_c·ẋ y el robot se
+  detiene; con v > 0 la velocidad de media zancada queda en v en un solo
+  paso, sea cual sea el empujón recibido.
+
+- Frontal (ColocacionFrontal): con la componente divergente del movimiento
+  ξ = y + T_c·ẏ, un apoyo de duración T_s a distancia σ·ancho del anterior
+  es periódico si el pie se coloca en p' = ξ + σ·ancho / (1 + e^(T_s/T_c)),
+  con σ = ±1 según el lado del nuevo pie. Un empujón lateral desplaza la
+  marcha en lugar de hacerla divergir; con ancho = 0 el pie va al punto de
+  captura y el CoM se detiene sobre él.
+
+Ambas cuestan O(1) por cambio de apoyo, y con los simuladores por eventos
+(simular_eventos / simulate_events) cada paso cuesta lo mismo que un tic,
+así que las pruebas de empujones por lotes van miles de veces más rápido
+que el tiempo real.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import time
+
+import numpy as np
+
+
+class ColocacionSagital:
+    """
+    Elige el siguiente ZMP sagital para llegar a una velocidad de marcha.
+    """
+
+    def __init__(self, velocidad_objetivo=0.5, medio_paso=0.3):
+        """
+        Inicializa la estrategia.
+
+        Args:
+            velocidad_objetivo (float): Velocidad del CoM al pasar sobre el
+                pie de apoyo (m/s); 0 para detenerse
+            medio_paso (float): Distancia por delante del ZMP a la que el CoM
+                provoca el cambio de apoyo (m)
+        """
+        self.velocidad_objetivo = velocidad_objetivo
+        self.medio_paso = medio_paso
+
+    def siguiente_zmp(self, T_c, zmp, x_rel, x_dot):
+        """
+        Posición del siguiente ZMP.
+
+        Args:
+            T_c (float): Constante de tiempo del LIPM
+            zmp (float): ZMP actual
+            x_rel (float): Posición del CoM relativa al ZMP actual
+            x_dot (float): Velocidad del CoM
+
+        Returns:
+            float: Posición absoluta del nuevo ZMP
+        """
+        # Si el CoM ya va más lento que el objetivo, el pie va bajo el CoM y acelera
+        exceso = x_dot * x_dot - self.velocidad_objetivo ** 2
+        distancia = T_c * math.sqrt(exceso) if exceso > 0 else 0.0
+        return zmp + x_rel + distancia
+
+    def siguiente_umbral(self, zmp):
+        """
+        Posición absoluta del CoM que provocará el cambio de apoyo siguiente.
+
+        Args:
+            zmp (float): ZMP del apoyo que empieza
+
+        Returns:
+            float: Umbral de cambio
+        """
+        return zmp + self.medio_paso
+
+
+class ColocacionFrontal:
+    """
+    Elige el siguiente ZMP lateral a partir de la componente divergente del movimiento.
+    """
+
+    def __init__(self, ancho=0.4, duracion_paso=0.6):
+        """
+        Inicializa la estrategia.
+
+        Args:
+            ancho (float): Separación lateral entre pies (m); 0 para detenerse
+            duracion_paso (float): Duración de cada apoyo (s)
+        """
+        self.ancho = ancho
+        self.duracion_paso = duracion_paso
+        self._clave = None  # (T_c, duracion_paso) del factor cacheado
+        self._factor = None
+
+    def factor(self, T_c):
+        """1 / (1 + e^(T_s/T_c)), cacheado por (T_c, duración)."""
+        clave = (T_c, self.duracion_paso)
+        if clave != self._clave:
+            self._factor = 1.0 / (1.0 + math.exp(self.duracion_paso / T_c))
+            self._clave = clave
+        return self._factor
+
+    def siguiente_zmp(self, T_c, zmp, y_rel, y_dot, lado):
+        """
+        Posición del siguiente ZMP.
+
+        Args:
+            T_c (float): Constante de tiempo del LIPM
+            zmp (float): ZMP actual
+            y_rel (float): Posición del CoM relativa al ZMP actual
+            y_dot (float): Velocidad del CoM
+            lado (int): +1 si el nuevo pie está hacia +y, -1 si hacia -y
+
+        Returns:
+            float: Posición absoluta del nuevo ZMP
+        """
+        xi = zmp + y_rel + T_c * y_dot
+        return xi + lado * self.ancho * self.factor(T_c)
+
+    def siguiente_cambio(self, t_abs):
+        """
+        Instante del cambio de apoyo siguiente.
+
+        Args:
+            t_abs (float): Instante en que empieza el apoyo
+
+        Returns:
+            float: Tiempo absoluto del cambio
+        """
+        return t_abs + self.duracion_paso
+
+
+def prueba_empujones(velocidades, pasos=10, altura=1.2, gravedad=9.8,
+                     velocidad_objetivo=0.5, medio_paso=0.3, ancho=0.4, duracion_paso=0.6):
+    """
+    Recuperación de empujones por lotes con los simuladores por eventos.
+
+    Cada velocidad inicial hace de empujón, sagital y lateral a la vez. Se
+    simulan `pasos` cambios de apoyo y se mide cuánto se aleja la marcha de
+    la objetivo.
+
+    Args:
+        velocidades (array): Velocidades iniciales (m/s)
+        pasos (int): Cambios de apoyo a simular por empujón
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        velocidad_objetivo (float): Velocidad sagital de media zancada (m/s)
+        medio_paso (float): Umbral sagital de cambio (m)
+        ancho (float): Separación lateral entre pies (m)
+        duracion_paso (float): Duración de los apoyos laterales (s)
+
+    Returns:
+        dict: Errores finales de los empujones recuperados, número de
+        empujones no recuperados (el CoM no llega a dar todos los pasos) y
+        tiempo simulado frente a tiempo real
+    """
+    from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM
+    from Frontal_Mejorado import LIPMSimulator
+
+    error_sagital, deriva_lateral = [], []
+    fallos = 0
+    simulado = 0.0
+    inicio = time.perf_counter()
+    for v_0 in np.asarray(velocidades, dtype=float).tolist():
+        sagital = SimuladorLIPM(ModeloLIPM(altura, gravedad), x_dot_0=v_0,
+                                colocacion=ColocacionSagital(velocidad_objetivo, medio_paso))
+        while len(sagital.fases) <= pasos and sagital.avanzar_hasta_evento():
+            pass
+        if len(sagital.fases) <= pasos:
+            # Empujón hacia atrás o sin energía para llegar al primer cambio
+            fallos += 1
+        else:
+            # Velocidad de media zancada de la última fase (CoM sobre el pie)
+            fase = sagital.fases[-1]
+            energia = fase.x_dot_0 ** 2 - (fase.x_0_rel / sagital.modelo.T_c) ** 2
+            error_sagital.append(math.sqrt(max(energia, 0.0)) - velocidad_objetivo)
+            simulado += sagital.t_abs
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            frontal = LIPMSimulator(altura, gravedad, max_time=pasos * duracion_paso, history_capacity=1,
+                                    y_dot_0=v_0, placement=ColocacionFrontal(ancho, duracion_paso))
+            frontal.simulate_events()
+        # Centro de los dos últimos apoyos respecto al inicial
+        deriva_lateral.append(0.5 * (frontal.zmp_y[-1] + frontal.zmp_y[-2]) - frontal.zmp_y[0])
+        simulado += frontal.t_abs
+    transcurrido = time.perf_counter() - inicio
+
+    return {
+        'error_velocidad_sagital': np.array(error_sagital),
+        'deriva_lateral': np.array(deriva_lateral),
+        'fallos_sagitales': fallos,
+        'tiempo_real': transcurrido,
+        'tiempo_simulado': simulado,
+    }
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Prueba de recuperación de empujones con colocación de pasos')
+    parser.add_argument('--empujones', type=int, default=1000, help='Número de empujones a probar')
+    parser.add_argument('--v_min', type=float, default=0.05, help='Velocidad inicial mínima (m/s)')
+    parser.add_argument('--v_max', type=float, default=2.0, help='Velocidad inicial máxima (m/s)')
+    parser.add_argument('--pasos', type=int, default=10, help='Cambios de apoyo por empujón')
+    parser.add_argument('--velocidad', type=float, default=0.5, help='Velocidad sagital objetivo (m/s)')
+    parser.add_argument('--ancho', type=float, default=0.4, help='Separación lateral entre pies (m)')
+    parser.add_argument('--duracion', type=float, default=0.6, help='Duración de los apoyos laterales (s)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    resultado = prueba_empujones(np.linspace(args.v_min, args.v_max, args.empujones), args.pasos,
+                                 velocidad_objetivo=args.velocidad, ancho=args.ancho,
+                                 duracion_paso=args.duracion)
+    error = np.abs(resultado['error_velocidad_sagital'])
+    deriva = np.abs(resultado['deriva_lateral'])
+    print(f"Error de velocidad sagital tras {args.pasos} pasos: medio {error.mean():.2e}, "
+          f"máximo {error.max():.2e} m/s ({resultado['fallos_sagitales']} empujones sin recuperar)")
+    print(f"Deriva lateral del centro de la marcha: media {deriva.mean():.3f}, máxima {deriva.max():.3f} m")
+    print(f"{resultado['tiempo_simulado']:.0f} s simulados en {resultado['tiempo_real']:.2f} s "
+          f"(x{resultado['tiempo_simulado'] / resultado['tiempo_real']:.0f} tiempo real)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Instrumentación opcional de los bucles de simulación y de render.
+
+Cuando la animación se entrecorta no se sabe si el tiempo se va en la física,
+en el historial, en los set_data de los artistas, en el autoescalado, en el
+formateo de los textos o en el redibujado. Instrumentacion acumula por fase
+el número de llamadas, el tiempo total y el peor caso, y cuenta eventos
+(pasos, frames, cambios de ZMP, frames perdidos, redibujados completos).
+
+Los simuladores y visualizadores guardan una referencia `instrumentacion`
+que por defecto es None; cada punto de medida está protegido por un
+`if ... is not None`, así que desactivada solo cuesta esa comprobación.
+
+Las fases se miden encadenadas: `medir` devuelve el instante final, que es
+el inicio de la fase siguiente, y así basta una lectura de reloj por fase:
+
+    t = inst.reloj()
+    ...  # física
+    t = inst.medir('fisica', t)
+    ...  # historial
+    inst.medir('historial', t)
+"""
+
+import time
+
+
+class Instrumentacion:
+    """
+    Temporizadores por fase y contadores de eventos.
+    """
+
+    reloj = staticmethod(time.perf_counter)
+
+    def __init__(self, periodo_resumen=None, intervalo_frame=None, salida=print):
+        """
+        Inicializa los acumuladores.
+
+        Args:
+            periodo_resumen (float): Cada cuántos segundos reales imprimir un
+                resumen con informar_si_toca (None: nunca)
+            intervalo_frame (float): Periodo esperado entre frames (s); un
+                frame que llega más tarde de 1.5 periodos cuenta los frames
+                que se han perdido por el camino
+            salida (callable): Función que recibe el texto del resumen
+        """
+        self.periodo_resumen = periodo_resumen
+        self.intervalo_frame = intervalo_frame
+        self.salida = salida
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Pone a cero todos los acumuladores."""
+        self.fases = {}  # fase -> [llamadas, total (s), máximo (s)]
+        self.contadores = {}
+        self.inicio = self.reloj()
+        self._ultimo_frame = None
+        self._ultimo_resumen = self.inicio
+
+    def medir(self, fase, inicio):
+        """
+        Acumula el tiempo transcurrido desde `inicio` en una fase.
+
+        Args:
+            fase (str): Nombre de la fase
+            inicio (float): Instante de inicio (de reloj o de un medir anterior)
+
+        Returns:
+            float: Instante actual, inicio de la fase siguiente
+        """
+        ahora = self.reloj()
+        duracion = ahora - inicio
+        registro = self.fases.get(fase)
+        if registro is None:
+            self.fases[fase] = [1, duracion, duracion]
+        else:
+            registro[0] += 1
+            registro[1] += duracion
+            if duracion > registro[2]:
+                registro[2] = duracion
+        return ahora
+
+    def contar(self, nombre, n=1):
+        """
+        Incrementa un contador de eventos.
+
+        Args:
+            nombre (str): Nombre del contador
+            n (int): Incremento
+        """
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def frame(self):
+        """
+        Marca el inicio de un frame: cuenta frames, mide el periodo real
+        entre frames y los frames perdidos respecto a intervalo_frame.
+
+        Returns:
+            float: Instante actual
+        """
+        ahora = self.reloj()
+        self.contar('frames')
+        if self._ultimo_frame is not None:
+            self.medir('periodo_frame', self._ultimo_frame)
+            if self.intervalo_frame:
+                periodo = ahora - self._ultimo_frame
+                if periodo > 1.5 * self.intervalo_frame:
+                    self.contar('frames_perdidos', int(periodo / self.intervalo_frame + 0.5) - 1)
+        self._ultimo_frame = ahora
+        return ahora
+
+    def resumen(self):
+        """
+        Estadísticas acumuladas.
+
+        Returns:
+            dict: {'fases': {fase: {'llamadas', 'media_ms', 'max_ms', 'total_s'}},
+                   'contadores': {...}, 'duracion_s': tiempo desde el último reinicio}
+        """
+        # Copias de las entradas: la física puede ir en otro hilo
+        fases = {
+            fase: {'llamadas': llamadas, 'media_ms': 1e3 * total / llamadas,
+                   'max_ms': 1e3 * maximo, 'total_s': total}
+            for fase, (llamadas, total, maximo) in list(self.fases.items())
+        }
+        return {'fases': fases, 'contadores': dict(self.contadores),
+                'duracion_s': self.reloj() - self.inicio}
+
+    def texto(self):
+        """
+        Resumen legible, una línea por fase y una con los contadores.
+
+        Returns:
+            str: Texto del resumen
+        """
+        datos = self.resumen()
+        lineas = [f"{fase:18s} {e['media_ms']:7.3f} ms (máx {e['max_ms']:7.2f}) x{e['llamadas']}"
+                  for fase, e in sorted(datos['fases'].items())]
+        duracion = max(datos['duracion_s'], 1e-9)
+        contadores = datos['contadores']
+        tasas = [f"{nombre}: {valor}" for nombre, valor in sorted(contadores.items())]
+        if 'pasos' in contadores:
+            tasas.append(f"{contadores['pasos'] / duracion:.0f} pasos/s")
+        if 'frames' in contadores:
+            tasas.append(f"{contadores['frames'] / duracion:.1f} fps")
+        lineas.append(', '.join(tasas))
+        return '\n'.join(lineas)
+
+    def informar_si_toca(self):
+        """
+        Imprime el resumen si ha pasado periodo_resumen desde el anterior.
+
+        Returns:
+            bool: True si se ha impreso
+        """
+        if self.periodo_resumen is None:
+            return False
+        ahora = self.reloj()
+        if ahora - self._ultimo_resumen < self.periodo_resumen:
+            return False
+        self._ultimo_resumen = ahora
+        self.salida(self.texto())
+        return True
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+"""
+Integradores numéricos del LIPM con altura del CoM variable.
+
+La solución cerrada x(t) = x_0·cosh(t/T_c) + T_c·ẋ_0·sinh(t/T_c) solo vale
+si T_c es constante. Con una altura z(t) que cambia durante el apoyo la
+dinámica es
+
+    ẍ = ω²(t)·x,    ω²(t) = (g + z̈(t)) / z(t)
+
+(x relativa al ZMP), que se integra paso a paso. Todos los integradores
+tienen la misma interfaz, avanzar(x, x_dot, t, dt, omega2), y operan igual
+sobre floats que sobre arrays de NumPy, así que sirven tanto para
+SimuladorLIPM/LIPMSimulator como para un lote completo de SimuladorLoteLIPM:
+
+- IntegradorAnalitico: matriz de transición Φ(dt) con ω² en el punto medio.
+  Exacto con altura constante; de segundo orden si varía.
+- IntegradorSimplectico: Störmer-Verlet (kick-drift-kick), segundo orden,
+  dos evaluaciones de ω² por paso y sin deriva de energía a largo plazo.
+- IntegradorRK4: Runge-Kutta clásico de cuarto orden.
+- IntegradorAdaptativo: Dormand-Prince 5(4) con control del error; divide
+  cada dt en los subpasos necesarios para la tolerancia pedida.
+
+El informe (python integradores.py --tolerancia 1e-6) mide error frente a
+la solución analítica y coste por paso de cada uno, y señala el más barato
+que cumple la tolerancia.
+"""
+
+import abc
+import argparse
+import math
+import time
+
+import numpy as np
+
+
+class PerfilAltura:
+    """
+    Altura del centro de masa en función del tiempo.
+    """
+
+    def __init__(self, altura, aceleracion=None):
+        """
+        Inicializa el perfil.
+
+        Args:
+            altura (callable): z(t) en metros
+            aceleracion (callable): z̈(t) en m/s² (por defecto 0, cambio cuasiestático)
+        """
+        self.altura = altura
+        self.aceleracion = aceleracion
+
+    def omega2(self, t, gravedad):
+        """
+        Calcula ω²(t) = (g + z̈(t)) / z(t).
+
+        Args:
+            t (float): Tiempo absoluto
+            gravedad (float): Aceleración de la gravedad (m/s²)
+
+        Returns:
+            float: ω² en 1/s²
+        """
+        z_ddot = 0.0 if self.aceleracion is None else self.aceleracion(t)
+        return (gravedad + z_ddot) / self.altura(t)
+
+    @classmethod
+    def constante(cls, altura):
+        """Perfil de altura fija."""
+        return cls(lambda t: altura)
+
+    @classmethod
+    def senoidal(cls, altura, amplitud, periodo):
+        """
+        Oscilación vertical z(t) = altura + amplitud·sin(2πt/periodo).
+
+        Args:
+            altura (float): Altura media (m)
+            amplitud (float): Amplitud de la oscilación (m)
+            periodo (float): Periodo de la oscilación (s)
+        """
+        w = 2 * math.pi / periodo
+        return cls(lambda t: altura + amplitud * math.sin(w * t),
+                   lambda t: -amplitud * w * w * math.sin(w * t))
+
+    @classmethod
+    def rampa(cls, altura_inicial, altura_final, t_inicio, duracion):
+        """
+        Cambio suave de altura con un polinomio de grado 5 (velocidad y
+        aceleración nulas en los extremos).
+
+        Args:
+            altura_inicial (float): Altura antes de t_inicio (m)
+            altura_final (float): Altura tras t_inicio + duracion (m)
+            t_inicio (float): Comienzo del cambio (s)
+            duracion (float): Duración del cambio (s)
+        """
+        salto = altura_final - altura_inicial
+
+        def fraccion(t):
+            return min(max((t - t_inicio) / duracion, 0.0), 1.0)
+
+        def altura(t):
+            s = fraccion(t)
+            return altura_inicial + salto * s ** 3 * (10 - 15 * s + 6 * s * s)
+
+        def aceleracion(t):
+            s = fraccion(t)
+            return salto * 60 * s * (1 - s) * (1 - 2 * s) / duracion ** 2
+
+        return cls(altura, aceleracion)
+
+
+class Integrador(abc.ABC):
+    """
+    Interfaz común: avanza (x, ẋ) un dt con ẍ = ω²(t)·x.
+
+    `evaluaciones` cuenta las llamadas a omega2, que es lo que cuesta cada
+    paso cuando ω² viene de un perfil de altura.
+    """
+
+    nombre = None
+
+    def __init__(self):
+        self.evaluaciones = 0
+
+    def reiniciar(self):
+        """Pone a cero el contador de evaluaciones y el estado interno."""
+        self.evaluaciones = 0
+
+    @abc.abstractmethod
+    def avanzar(self, x, x_dot, t, dt, omega2):
+        """
+        Avanza el estado un dt.
+
+        Args:
+            x (float o array): Posición relativa al ZMP
+            x_dot (float o array): Velocidad
+            t (float): Tiempo absoluto al inicio del paso
+            dt (float): Incremento de tiempo
+            omega2 (callable): ω²(t), float o array compatible con x
+
+        Returns:
+            tuple: (posición relativa, velocidad) tras dt
+        """
+
+
+class IntegradorAnalitico(Integrador):
+    """Matriz de transición del LIPM evaluada con ω² en el punto medio del paso."""
+
+    nombre = 'analitico'
+
+    def avanzar(self, x, x_dot, t, dt, omega2):
+        self.evaluaciones += 1
+        w = np.sqrt(omega2(t + 0.5 * dt))
+        c = np.cosh(w * dt)
+        s = np.sinh(w * dt)
+        return c * x + s / w * x_dot, w * s * x + c * x_dot
+
+
+class IntegradorSimplectico(Integrador):
+    """Störmer-Verlet (velocity Verlet) con ω² dependiente del tiempo."""
+
+    nombre = 'simplectico'
+
+    def avanzar(self, x, x_dot, t, dt, omega2):
+        self.evaluaciones += 2
+        medio = x_dot + 0.5 * dt * omega2(t) * x
+        x = x + dt * medio
+        return x, medio + 0.5 * dt * omega2(t + dt) * x
+
+
+class IntegradorRK4(Integrador):
+    """Runge-Kutta clásico de cuarto orden."""
+
+    nombre = 'rk4'
+
+    def avanzar(self, x, x_dot, t, dt, omega2):
+        self.evaluaciones += 3  # ω² en t, t + dt/2 (dos etapas) y t + dt
+        w_0, w_m, w_1 = omega2(t), omega2(t + 0.5 * dt), omega2(t + dt)
+        k1_x, k1_v = x_dot, w_0 * x
+        k2_x, k2_v = x_dot + 0.5 * dt * k1_v, w_m * (x + 0.5 * dt * k1_x)
+        k3_x, k3_v = x_dot + 0.5 * dt * k2_v, w_m * (x + 0.5 * dt * k2_x)
+        k4_x, k4_v = x_dot + dt * k3_v, w_1 * (x + dt * k3_x)
+        return (x + dt / 6 * (k1_x + 2 * k2_x + 2 * k3_x + k4_x),
+                x_dot + dt / 6 * (k1_v + 2 * k2_v + 2 * k3_v + k4_v))
+
+
+# Tabla de Butcher de Dormand-Prince 5(4)
+_DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Diferencia entre los pesos de orden 5 (última fila de A) y los de orden 4
+_DP_E = (35 / 384 - 5179 / 57600, 0.0, 500 / 1113 - 7571 / 16695, 125 / 192 - 393 / 640,
+         -2187 / 6784 + 92097 / 339200, 11 / 84 - 187 / 2100, -1 / 40)
+
+
+class IntegradorAdaptativo(Integrador):
+    """
+    Dormand-Prince 5(4) con paso adaptativo.
+
+    Cada llamada cubre exactamente dt con tantos subpasos como haga falta;
+    el último tamaño de subpaso aceptado se conserva para la llamada
+    siguiente. En un lote el subpaso es común y lo limita el peor miembro.
+    """
+
+    nombre = 'adaptativo'
+
+    def __init__(self, tolerancia=1e-8, tolerancia_relativa=1e-8):
+        """
+        Inicializa el integrador.
+
+        Args:
+            tolerancia (float): Error absoluto admitido por subpaso
+            tolerancia_relativa (float): Error relativo admitido por subpaso
+        """
+        super().__init__()
+        self.tolerancia = tolerancia
+        self.tolerancia_relativa = tolerancia_relativa
+        self.h = None
+        self.rechazos = 0
+
+    def reiniciar(self):
+        super().reiniciar()
+        self.h = None
+        self.rechazos = 0
+
+    def _subpaso(self, x, v, t, h, omega2):
+        """Un subpaso de Dormand-Prince; devuelve el estado de orden 5 y su error."""
+        kx, kv = [], []
+        for c, fila in zip(_DP_C, _DP_A):
+            xi, vi = x, v
+            for a, k_x, k_v in zip(fila, kx, kv):
+                if a:
+                    xi = xi + h * a * k_x
+                    vi = vi + h * a * k_v
+            kx.append(vi)
+            kv.append(omega2(t + c * h) * xi)
+        self.evaluaciones += len(_DP_C)
+
+        # La última etapa se evalúa en el resultado de orden 5
+        x_nuevo, v_nuevo = xi, vi
+        error_x = h * sum(e * k for e, k in zip(_DP_E, kx) if e)
+        error_v = h * sum(e * k for e, k in zip(_DP_E, kv) if e)
+        escala_x = self.tolerancia + self.tolerancia_relativa * np.maximum(np.abs(x), np.abs(x_nuevo))
+        escala_v = self.tolerancia + self.tolerancia_relativa * np.maximum(np.abs(v), np.abs(v_nuevo))
+        error = float(np.max(np.maximum(np.abs(error_x) / escala_x, np.abs(error_v) / escala_v)))
+        return x_nuevo, v_nuevo, error
+
+    def avanzar(self, x, x_dot, t, dt, omega2):
+        t_final = t + dt
+        h = dt if self.h is None else min(self.h, dt)
+        while t < t_final:
+            ultimo = t + h >= t_final
+            if ultimo:
+                h = t_final - t
+            x_nuevo, v_nuevo, error = self._subpaso(x, x_dot, t, h, omega2)
+            # Control clásico del paso con exponente 1/5 y factores acotados
+            factor = min(5.0, max(0.2, 0.9 * error ** -0.2)) if error > 0 else 5.0
+            if error <= 1.0:
+                t = t_final if ultimo else t + h
+                x, x_dot = x_nuevo, v_nuevo
+                if not ultimo or factor < 1.0:
+                    self.h = h * factor
+            else:
+                self.rechazos += 1
+            h *= factor
+        return x, x_dot
+
+
+INTEGRADORES = {
+    clase.nombre: clase
+    for clase in (IntegradorAnalitico, IntegradorSimplectico, IntegradorRK4, IntegradorAdaptativo)
+}
+
+
+def crear_integrador(nombre, **opciones):
+    """
+    Crea un integrador por nombre.
+
+    Args:
+        nombre (str): Una de las claves de INTEGRADORES
+        **opciones: Argumentos del constructor (tolerancia del adaptativo)
+
+    Returns:
+        Integrador: Nueva instancia
+    """
+    if nombre not in INTEGRADORES:
+        raise ValueError(f"Integrador desconocido: {nombre} ({', '.join(INTEGRADORES)})")
+    return INTEGRADORES[nombre](**opciones)
+
+
+def _integrar(integrador, x, v, dt, n_pasos, omega2):
+    """Aplica n_pasos del integrador y devuelve el estado final y el tiempo por paso."""
+    integrador.reiniciar()
+    inicio = time.perf_counter()
+    t = 0.0
+    for _ in range(n_pasos):
+        x, v = integrador.avanzar(x, v, t, dt, omega2)
+        t += dt
+    return x, v, (time.perf_counter() - inicio) / n_pasos
+
+
+def informe_precision(pasos_tiempo=(0.04, 0.02, 0.01, 0.005), duracion=1.0, altura=1.2, gravedad=9.8,
+                      miembros=1000, perfil=None, semilla=0):
+    """
+    Error y coste de cada integrador sobre un lote de condiciones iniciales.
+
+    Con altura constante la referencia es la solución analítica; con un
+    perfil de altura, un RK4 con un paso 64 veces menor que el más fino.
+
+    Args:
+        pasos_tiempo (tuple): Valores de dt a probar (s)
+        duracion (float): Tiempo integrado (s), del orden de un apoyo
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        miembros (int): Condiciones iniciales integradas a la vez
+        perfil (PerfilAltura): Altura variable (por defecto, constante)
+        semilla (int): Semilla de las condiciones iniciales
+
+    Returns:
+        list: Filas {'integrador', 'dt', 'error_posicion', 'error_velocidad',
+        'evaluaciones_paso', 'us_paso'} con errores máximos sobre el lote
+    """
+    rng = np.random.default_rng(semilla)
+    x_0 = rng.uniform(-0.3, 0.0, miembros)
+    v_0 = rng.uniform(0.2, 1.0, miembros)
+
+    if perfil is None:
+        k = gravedad / altura
+        omega2 = lambda t: k  # noqa: E731
+        T_c = math.sqrt(altura / gravedad)
+        c, s = math.cosh(duracion / T_c), math.sinh(duracion / T_c)
+        x_ref, v_ref = x_0 * c + T_c * v_0 * s, x_0 * s / T_c + v_0 * c
+    else:
+        omega2 = lambda t: perfil.omega2(t, gravedad)  # noqa: E731
+        dt_ref = min(pasos_tiempo) / 64
+        x_ref, v_ref, _ = _integrar(IntegradorRK4(), x_0, v_0, dt_ref, round(duracion / dt_ref), omega2)
+
+    filas = []
+    for nombre, clase in INTEGRADORES.items():
+        for dt in pasos_tiempo:
+            integrador = clase()
+            n_pasos = round(duracion / dt)
+            x, v, segundos = _integrar(integrador, x_0, v_0, dt, n_pasos, omega2)
+            # Mejor de tres medidas: la primera paga el calentamiento de cachés
+            for _ in range(2):
+                segundos = min(segundos, _integrar(integrador, x_0, v_0, dt, n_pasos, omega2)[2])
+            filas.append({
+                'integrador': nombre,
+                'dt': dt,
+                'error_posicion': float(np.max(np.abs(x - x_ref))),
+                'error_velocidad': float(np.max(np.abs(v - v_ref))),
+                'evaluaciones_paso': integrador.evaluaciones / n_pasos,
+                'us_paso': 1e6 * segundos,
+            })
+    return filas
+
+
+def mas_barato(filas, tolerancia):
+    """
+    Fila más barata (tiempo por unidad de tiempo simulado) que cumple la tolerancia.
+
+    Args:
+        filas (list): Resultado de informe_precision
+        tolerancia (float): Error de posición máximo (m)
+
+    Returns:
+        dict: Fila elegida, o None si ninguna la cumple
+    """
+    validas = [fila for fila in filas if fila['error_posicion'] <= tolerancia]
+    if not validas:
+        return None
+    return min(validas, key=lambda fila: fila['us_paso'] / fila['dt'])
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Precisión frente a coste de los integradores del LIPM')
+    parser.add_argument('--tolerancia', type=float, default=1e-6, help='Error de posición admitido (m)')
+    parser.add_argument('--dt', type=float, nargs='+', default=[0.04, 0.02, 0.01, 0.005],
+                        help='Pasos de tiempo a probar (s)')
+    parser.add_argument('--duracion', type=float, default=1.0, help='Tiempo integrado (s)')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del CoM (m)')
+    parser.add_argument('--miembros', type=int, default=1000, help='Condiciones iniciales del lote')
+    parser.add_argument('--oscilacion', type=float, nargs=2, metavar=('AMPLITUD', 'PERIODO'),
+                        help='Altura variable: oscilación senoidal alrededor de --altura')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    perfil = None
+    if args.oscilacion:
+        perfil = PerfilAltura.senoidal(args.altura, *args.oscilacion)
+
+    filas = informe_precision(tuple(args.dt), args.duracion, args.altura, miembros=args.miembros,
+                              perfil=perfil)
+    referencia = 'RK4 con paso fino' if perfil else 'solución analítica'
+    print(f"Error máximo tras {args.duracion:g} s en {args.miembros} trayectorias (referencia: {referencia})")
+    print(f"{'integrador':12s} {'dt':>7s} {'error x':>10s} {'error v':>10s} {'eval/paso':>9s} {'us/paso':>8s}")
+    for fila in filas:
+        print(f"{fila['integrador']:12s} {fila['dt']:7.3f} {fila['error_posicion']:10.2e} "
+              f"{fila['error_velocidad']:10.2e} {fila['evaluaciones_paso']:9.1f} {fila['us_paso']:8.1f}")
+
+    elegida = mas_barato(filas, args.tolerancia)
+    if elegida is None:
+        print(f"Ningún integrador cumple la tolerancia {args.tolerancia:g} m")
+    else:
+        print(f"Más barato con error <= {args.tolerancia:g} m: {elegida['integrador']} con dt={elegida['dt']:g} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Punto de entrada único de las herramientas LIPM.
+
+    python lipm.py simulate [argumentos de lipm3d.py]
+    python lipm.py view sagital|frontal|sagital2d|frontal2d [argumentos del visualizador]
+    python lipm.py export [argumentos de lipm_export.py]
+    python lipm.py sweep [argumentos de barrido.py]
+    python lipm.py optimize [argumentos de optimizador_frontal.py]
+    python lipm.py plan [argumentos de planificador_preview.py]
+    python lipm.py push [argumentos de colocacion_pasos.py]
+    python lipm.py montecarlo [argumentos de montecarlo.py]
+    python lipm.py integrate [argumentos de integradores.py]
+    python lipm.py servo [argumentos de boby_tabla.py]
+    python lipm.py stream [argumentos de boby_serie.py]
+    python lipm.py mesh [argumentos de stl_malla.py]
+    python lipm.py mass [argumentos de propiedades_masa.py]
+    python lipm.py kinematics [argumentos de cinematica_boby.py]
+    python lipm.py benchmark [argumentos de benchmark.py]
+
+Cada subcomando importa solo el módulo que necesita y le pasa el resto de
+argumentos, así que `simulate`, `sweep` u `optimize` no cargan matplotlib.
+"""
+
+import argparse
+import importlib
+import sys
+
+# Subcomando -> módulo con una función main() que lee sys.argv
+SUBCOMANDOS = {
+    'simulate': 'lipm3d',
+    'export': 'lipm_export',
+    'sweep': 'barrido',
+    'optimize': 'optimizador_frontal',
+    'plan': 'planificador_preview',
+    'push': 'colocacion_pasos',
+    'montecarlo': 'montecarlo',
+    'integrate': 'integradores',
+    'servo': 'boby_tabla',
+    'stream': 'boby_serie',
+    'mesh': 'stl_malla',
+    'mass': 'propiedades_masa',
+    'kinematics': 'cinematica_boby',
+    'benchmark': 'benchmark',
+}
+
+# Visualizadores de `view`
+VISTAS = {
+    'sagital': 'Sagital_Mejorado',
+    'frontal': 'Frontal_Mejorado',
+    'sagital2d': 'lipm2d_sagital',
+    'frontal2d': 'lipm2d_frontal',
+}
+
+
+def parse_arguments(argv=None):
+    """Parsea el subcomando; el resto de argumentos se pasan sin tocar."""
+    parser = argparse.ArgumentParser(
+        description='Herramientas del modelo de péndulo invertido lineal (LIPM)',
+        epilog='Usa "lipm.py <subcomando> -h" para ver los argumentos de cada uno.'
+    )
+    parser.add_argument('subcomando', choices=sorted([*SUBCOMANDOS, 'view']))
+    parser.add_argument('argumentos', nargs=argparse.REMAINDER,
+                        help='Argumentos del subcomando (view: primero el visualizador)')
+    return parser.parse_args(argv)
+
+
+def ejecutar(subcomando, argumentos):
+    """
+    Importa el módulo del subcomando y ejecuta su main() con los argumentos dados.
+
+    Args:
+        subcomando (str): Uno de SUBCOMANDOS o 'view'
+        argumentos (list): Argumentos de línea de comando del módulo
+    """
+    nombre = f'lipm.py {subcomando}'
+    if subcomando == 'view':
+        if not argumentos or argumentos[0] not in VISTAS:
+            sys.exit(f"lipm.py view: indica un visualizador ({', '.join(VISTAS)})")
+        modulo = VISTAS[argumentos[0]]
+        nombre += f' {argumentos[0]}'
+        argumentos = argumentos[1:]
+    else:
+        modulo = SUBCOMANDOS[subcomando]
+
+    sys.argv = [nombre, *argumentos]
+    importlib.import_module(modulo).main()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    ejecutar(args.subcomando, args.argumentos)
+
+
+if __name__ == "__main__":
+    main()
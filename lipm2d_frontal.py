@@ -1,4 +1,4 @@
-  #!/usr/bin/env python
+#!/usr/bin/env python
 
 """\
 lipm2d.py: A tiny 2d LIPM simulation with matplotlib animation.
@@ -7,14 +7,12 @@ lipm2d.py: A tiny 2d LIPM simulation with matplotlib animation.
 - Frontal = YZ
 - Y plotted as matplotlib_x
 - Z plotted as matplotlib_y
+- matplotlib is only imported by main(), so Simulator can be used headless
 """
 
 __author__      = "Juan G Victores"
 __copyright__   = "Copyright 2024-present, Planet Earth"
 
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-
 from time import sleep
 import math
 
@@ -23,19 +21,6 @@ HEIGHT = 1.2
 G = 9.8
 TIME_DELTA = 0.02 # s
 
-fig, ax = plt.subplots()
-ln, = ax.plot([], [], marker = 'o')
-
-def init():
-    #ax.set_xlim(0, 800)
-    ax.set_xlim(0, 1l
-                )
-    ax.set_ylim(-0.1, 1)
-    return ln,
-
-def animate(args):
-    return ln,
-
 class Simulator():
     def __init__(self):
         #self.zmp_y = [1.0, 2.0, 1.0, 2.0, 1.0, 2.0, 1.0]
@@ -49,24 +34,27 @@ class Simulator():
         # Establecer alguno de estos dos para que arranque:
         self.y_dot_0 = 0.3
         self.y_0_rel = 0.0
+        self.y_t_rel = self.y_0_rel
+        self.y_dot_t = self.y_dot_0
+        # Matriz de transicion para TIME_DELTA fijo (cosh/sinh una sola vez)
+        self.c = math.cosh(TIME_DELTA / self.T_c)
+        self.s = math.sinh(TIME_DELTA / self.T_c)
 
     def __call__(self):
 
         self.t_rel += TIME_DELTA
         self.t_abs += TIME_DELTA
         
-        self.y_t_rel = (self.y_0_rel * math.cosh(self.t_rel / self.T_c)) + self.T_c * self.y_dot_0 * math.sinh(self.t_rel / self.T_c)
-
-        self.y_dot_t = (self.y_0_rel * math.sinh(self.t_rel / self.T_c) / self.T_c) + self.y_dot_0 * math.cosh(self.t_rel / self.T_c) # para conservar tras cambio
+        y_t_rel = self.y_t_rel
+        self.y_t_rel = self.c * y_t_rel + self.T_c * self.s * self.y_dot_t
+        self.y_dot_t = self.s / self.T_c * y_t_rel + self.c * self.y_dot_t # para conservar tras cambio
 
         print("t_abs: %1.2f (zmp_y[self.zmp_idx]: %5f), y_t_rel: %5.2f, y_dot_t: %5.2f" % (self.t_abs, self.zmp_y[self.zmp_idx], self.y_t_rel, self.y_dot_t))
         
-        ln.set_data([self.zmp_y[self.zmp_idx], self.zmp_y[self.zmp_idx] + self.y_t_rel], [0, HEIGHT])
-        # ln.set_data([180, self.currentTimeStep, 0, self.currentTimeStep], [0, HEIGHT, 0, HEIGHT])
-
         #sleep(0.1)
 
-        if self.t_abs > self.zmp_time_change[self.zmp_idx]:
+        # El ultimo tiempo de cambio solo marca el final de la planificacion
+        if self.zmp_idx < len(self.zmp_time_change) - 1 and self.t_abs > self.zmp_time_change[self.zmp_idx]:
             self.zmp_idx += 1
             if self.foot == "LF":
                 self.foot = "RF"
@@ -79,17 +67,37 @@ class Simulator():
             self.y_0_rel = self.y_t_rel
 
         if self.t_abs > MAX_TIME:
-            quit()
+            return False # fin de la simulacion
+
+        return True
+
+def main():
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    fig, ax = plt.subplots()
+    ln, = ax.plot([], [], marker = 'o')
+
+    simulator = Simulator()
+
+    def init():
+        #ax.set_xlim(0, 800)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(-0.1, 1)
+        return ln,
 
-        return 1
+    def animate(args):
+        ln.set_data([simulator.zmp_y[simulator.zmp_idx], simulator.zmp_y[simulator.zmp_idx] + simulator.y_t_rel], [0, HEIGHT])
+        return ln,
 
-simulator = Simulator()
+    def frames():
+        while simulator():
+            yield 1
 
-def frames():
-    while True:
-        yield simulator()
+    ani = FuncAnimation(fig, animate, frames=frames,
+                        interval=100, init_func=init,
+                        blit=True, save_count=MAX_TIME)
+    plt.show()
 
-ani = FuncAnimation(fig, animate, frames=frames,
-                    interval=100, init_func=init,
-                    blit=True, save_count=MAX_TIME)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,12 @@ lipm2d.py: A tiny 2d LIPM simulation with matplotlib animation.
 - Sagital = XZ
 - X plotted as matplotlib_x
 - Z plotted as matplotlib_y
+- matplotlib is only imported by main(), so Simulator can be used headless
 """
 
 __author__      = "Juan G Victores"
 __copyright__   = "Copyright 2024-present, Planet Earth"
 
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-
 from time import sleep
 import math
 
@@ -23,17 +21,6 @@ HEIGHT = 1.2
 G = 9.8
 TIME_DELTA = 0.04 # s
 
-fig, ax = plt.subplots()
-ln, = ax.plot([], [], marker = 'o')
-
-def init():
-    ax.set_xlim(0, MAX_X)
-    ax.set_ylim(-0.1, 1.5)
-    return ln,
-
-def animate(args):
-    return ln,
-
 class Simulator():
     def __init__(self):
         self.zmp_x = [0, 4, 8, 12, 16, 20, 24]
@@ -44,21 +31,24 @@ class Simulator():
         # Establecer alguno de estos dos para que arranque:
         self.x_dot_0 = 0.3
         self.x_0_rel = 0
+        self.x_t_rel = self.x_0_rel
+        self.x_dot_t = self.x_dot_0
+        # Matriz de transicion para TIME_DELTA fijo (cosh/sinh una sola vez)
+        self.c = math.cosh(TIME_DELTA / self.T_c)
+        self.s = math.sinh(TIME_DELTA / self.T_c)
 
     def __call__(self):
         self.t_rel += TIME_DELTA
         self.t_abs += TIME_DELTA
         
-        self.x_t_rel = (self.x_0_rel * math.cosh(self.t_rel / self.T_c)) + self.T_c * self.x_dot_0 * math.sinh(self.t_rel / self.T_c)
-
-        self.x_dot_t = (self.x_0_rel * math.sinh(self.t_rel / self.T_c) / self.T_c) + self.x_dot_0 * math.cosh(self.t_rel / self.T_c) # para conservar tras cambio
+        x_t_rel = self.x_t_rel
+        self.x_t_rel = self.c * x_t_rel + self.T_c * self.s * self.x_dot_t
+        self.x_dot_t = self.s / self.T_c * x_t_rel + self.c * self.x_dot_t # para conservar tras cambio
 
         print("t_rel: %1.2f (zmp_x[self.zmp_idx]: %5f), x_t_rel: %5.2f, x_dot_t: %5.2f" % (self.t_rel, self.zmp_x[self.zmp_idx], self.x_t_rel, self.x_dot_t))
         
-        ln.set_data([self.zmp_x[self.zmp_idx], self.zmp_x[self.zmp_idx] + self.x_t_rel], [0, HEIGHT])
-        # ln.set_data([180, self.currentTimeStep, 0, self.currentTimeStep], [0, HEIGHT, 0, HEIGHT])
-
-        if self.zmp_x[self.zmp_idx] + self.x_t_rel > self.zmp_x_change[self.zmp_idx]:
+        # Tras el ultimo cambio no quedan umbrales: se sigue hasta MAX_X
+        if self.zmp_idx < len(self.zmp_x_change) and self.zmp_x[self.zmp_idx] + self.x_t_rel > self.zmp_x_change[self.zmp_idx]:
             self.zmp_idx += 1
             print("zmp_idx", self.zmp_idx)
             self.t_rel = 0 # reseteamos tiempo
@@ -67,17 +57,36 @@ class Simulator():
             self.x_0_rel = self.x_t_rel
 
         if self.zmp_x[self.zmp_idx] + self.x_t_rel > MAX_X:
-            quit()
+            return False # fin de la simulacion
+
+        return True
+
+def main():
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    fig, ax = plt.subplots()
+    ln, = ax.plot([], [], marker = 'o')
+
+    simulator = Simulator()
+
+    def init():
+        ax.set_xlim(0, MAX_X)
+        ax.set_ylim(-0.1, 1.5)
+        return ln,
 
-        return 1
+    def animate(args):
+        ln.set_data([simulator.zmp_x[simulator.zmp_idx], simulator.zmp_x[simulator.zmp_idx] + simulator.x_t_rel], [0, HEIGHT])
+        return ln,
 
-simulator = Simulator()
+    def frames():
+        while simulator():
+            yield 1
 
-def frames():
-    while True:
-        yield simulator()
+    ani = FuncAnimation(fig, animate, frames=frames,
+                        interval=100, init_func=init,
+                        blit=True, save_count=MAX_X)
+    plt.show()
 
-ani = FuncAnimation(fig, animate, frames=frames,
-                    interval=100, init_func=init,
-                    blit=True, save_count=MAX_X)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+"""
+Motor LIPM 3D: planos sagital (X) y frontal (Y) con un único reloj.
+
+Sagital_Mejorado.py y Frontal_Mejorado.py simulan cada plano por separado.
+Aquí ambos planos comparten la misma secuencia de pasos: cada paso fija a la
+vez el ZMP en X y en Y, y el cambio de apoyo se produce en el mismo instante
+en los dos planos. Como la constante de tiempo T_c es la misma en X y en Y,
+cada tic aplica a los dos planos la misma matriz de transición Φ(dt),
+cacheada en ModeloLIPM, y el historial guarda una fila
+(t, x, ẋ, y, ẏ, zmp_x, zmp_y) por muestra.
+
+Los instantes de cambio pueden darse explícitamente (como en el plano
+frontal) o deducirse de umbrales de posición en X (como en el plano
+sagital); en ese caso se calculan analíticamente al empezar cada paso con
+ModeloLIPM.tiempo_hasta_posicion.
+"""
+
+import argparse
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from lipm_historial import HistorialLIPM
+from trayectoria import codigo_pie
+from Sagital_Mejorado import ModeloLIPM
+
+# Paso de apoyo: instante de inicio, ZMP en X e Y, estado relativo inicial y pie
+Paso3D = namedtuple('Paso3D', ['t_inicio', 'zmp_x', 'zmp_y', 'x_0_rel', 'x_dot_0',
+                               'y_0_rel', 'y_dot_0', 'pie'])
+
+
+class SimuladorLIPM3D:
+    """
+    Simulador conjunto de los planos sagital y frontal sobre una línea
+    temporal de pasos compartida.
+    """
+
+    def __init__(self, modelo, dt=0.02, zmp_x=None, zmp_y=None, tiempos_cambio=None,
+                 zmp_x_change=None, x_dot_0=0.3, y_dot_0=0.3, capacidad_historial=4096,
+                 historial_circular=False):
+        """
+        Inicializa el simulador.
+
+        Args:
+            modelo (ModeloLIPM): Modelo físico compartido por ambos planos
+            dt (float): Incremento de tiempo por paso (s)
+            zmp_x (list): Posiciones sagitales de los pasos (m)
+            zmp_y (list): Posiciones laterales de los pasos (m), mismo número que zmp_x
+            tiempos_cambio (list): Instantes absolutos de cambio de apoyo (s), uno
+                menos que pasos; si es None se usan los umbrales zmp_x_change
+            zmp_x_change (list): Umbrales de posición X que disparan cada cambio
+                (por defecto, a mitad de paso)
+            x_dot_0 (float): Velocidad sagital inicial (m/s)
+            y_dot_0 (float): Velocidad lateral inicial (m/s)
+            capacidad_historial (int): Muestras preasignadas en el historial
+            historial_circular (bool): Conservar solo las últimas muestras
+        """
+        if zmp_x is None:
+            zmp_x = [0, 4, 8, 12, 16, 20, 24]
+        if zmp_y is None:
+            zmp_y = [0.4 if i % 2 == 0 else 0.8 for i in range(len(zmp_x))]
+        if len(zmp_x) != len(zmp_y):
+            raise ValueError("zmp_x y zmp_y deben tener el mismo número de pasos")
+        if tiempos_cambio is None and zmp_x_change is None:
+            zmp_x_change = [0.5 * (a + b) for a, b in zip(zmp_x[:-1], zmp_x[1:])]
+
+        self.modelo = modelo
+        self.dt = dt
+        self.zmp_x = list(zmp_x)
+        self.zmp_y = list(zmp_y)
+        self.tiempos_cambio = None if tiempos_cambio is None else list(tiempos_cambio)
+        self.zmp_x_change = None if zmp_x_change is None else list(zmp_x_change)
+        self.x_dot_inicial = x_dot_0
+        self.y_dot_inicial = y_dot_0
+        self.capacidad_historial = capacidad_historial
+        self.historial_circular = historial_circular
+
+        # Estado actual (relativo al ZMP del paso activo)
+        self.paso_idx = 0
+        self.t_abs = 0.0
+        self.t_rel = 0.0
+        self.pie = "LF"
+        self.x_0_rel, self.x_dot_0 = 0.0, x_dot_0
+        self.y_0_rel, self.y_dot_0 = 0.0, y_dot_0
+        self.x_t_rel, self.x_dot_t = self.x_0_rel, self.x_dot_0
+        self.y_t_rel, self.y_dot_t = self.y_0_rel, self.y_dot_0
+
+        self.pasos = [self._paso_actual()]
+        self.t_cambio = self._calcular_t_cambio()
+
+        self.historial = HistorialLIPM(('t', 'x', 'x_dot', 'y', 'y_dot', 'zmp_x', 'zmp_y'),
+                                       capacidad=capacidad_historial, circular=historial_circular)
+
+        # Grabación opcional (trayectoria.EscritorTrayectoria con COLUMNAS_3D)
+        self.grabador = None
+
+    def reiniciar(self):
+        """Reinicia la simulación a su estado inicial."""
+        self.__init__(self.modelo, self.dt, self.zmp_x, self.zmp_y, self.tiempos_cambio,
+                      self.zmp_x_change, self.x_dot_inicial, self.y_dot_inicial,
+                      self.capacidad_historial, self.historial_circular)
+
+    def parametros_grabacion(self):
+        """Parámetros del modelo y de la planificación para la cabecera de una grabación."""
+        return {
+            'plano': '3d',
+            'altura': self.modelo.altura,
+            'gravedad': self.modelo.gravedad,
+            'dt': self.dt,
+            'velocidad_inicial': [self.x_dot_inicial, self.y_dot_inicial],
+            'zmp_x': self.zmp_x,
+            'zmp_y': self.zmp_y,
+            'tiempos_cambio': self.tiempos_cambio,
+            'zmp_x_change': self.zmp_x_change,
+        }
+
+    def _paso_actual(self):
+        """Paso de apoyo con el estado inicial de la fase actual."""
+        return Paso3D(self.t_abs, self.zmp_x[self.paso_idx], self.zmp_y[self.paso_idx],
+                      self.x_0_rel, self.x_dot_0, self.y_0_rel, self.y_dot_0, self.pie)
+
+    def _calcular_t_cambio(self):
+        """
+        Instante absoluto del siguiente cambio de apoyo (inf si no hay más).
+
+        Con umbrales sagitales el instante se resuelve una vez por paso a
+        partir del estado inicial de la fase, sin comprobar la posición en
+        cada tic.
+        """
+        if self.paso_idx >= len(self.zmp_x) - 1:
+            return math.inf
+        if self.tiempos_cambio is not None:
+            if self.paso_idx >= len(self.tiempos_cambio):
+                return math.inf
+            return self.tiempos_cambio[self.paso_idx]
+        if self.paso_idx >= len(self.zmp_x_change):
+            return math.inf
+        umbral = self.zmp_x_change[self.paso_idx] - self.zmp_x[self.paso_idx]
+        t = self.modelo.tiempo_hasta_posicion(self.x_0_rel, self.x_dot_0, umbral)
+        return math.inf if t is None else self.t_abs + t
+
+    def _propagar(self, t):
+        """
+        Propaga ambos planos un tiempo t desde el inicio de la fase.
+
+        Un único par cosh/sinh sirve para X e Y porque comparten T_c.
+        """
+        T_c = self.modelo.T_c
+        c = math.cosh(t / T_c)
+        s = math.sinh(t / T_c)
+        self.x_t_rel = self.x_0_rel * c + T_c * self.x_dot_0 * s
+        self.x_dot_t = self.x_0_rel * s / T_c + self.x_dot_0 * c
+        self.y_t_rel = self.y_0_rel * c + T_c * self.y_dot_0 * s
+        self.y_dot_t = self.y_0_rel * s / T_c + self.y_dot_0 * c
+
+    def posicion(self):
+        """Posición absoluta (x, y) del centro de masa."""
+        return (self.zmp_x[self.paso_idx] + self.x_t_rel,
+                self.zmp_y[self.paso_idx] + self.y_t_rel)
+
+    def paso(self):
+        """
+        Ejecuta un paso de tiempo dt en ambos planos.
+
+        Returns:
+            bool: True si se produjo un cambio de apoyo en este paso
+        """
+        self.t_abs += self.dt
+        self.t_rel += self.dt
+
+        # Φ(dt) cacheada en el modelo: la misma para X e Y
+        c, ts, s_t = self.modelo.transicion(self.dt)
+        self.x_t_rel, self.x_dot_t = c * self.x_t_rel + ts * self.x_dot_t, s_t * self.x_t_rel + c * self.x_dot_t
+        self.y_t_rel, self.y_dot_t = c * self.y_t_rel + ts * self.y_dot_t, s_t * self.y_t_rel + c * self.y_dot_t
+
+        x, y = self.posicion()
+        self.historial.agregar(self.t_abs, x, self.x_dot_t, y, self.y_dot_t,
+                               self.zmp_x[self.paso_idx], self.zmp_y[self.paso_idx])
+        if self.grabador is not None:
+            T_c2 = self.modelo.T_c ** 2
+            self.grabador.agregar(self.t_abs, x, self.x_dot_t, self.x_t_rel / T_c2, self.zmp_x[self.paso_idx],
+                                  y, self.y_dot_t, self.y_t_rel / T_c2, self.zmp_y[self.paso_idx],
+                                  codigo_pie(self.pie))
+
+        # Como en los simuladores 2D, el cambio se aplica en el primer tic posterior
+        if self.t_abs > self.t_cambio:
+            self.cambiar_apoyo()
+            return True
+        return False
+
+    def cambiar_apoyo(self):
+        """Pasa al siguiente paso en ambos planos conservando las velocidades."""
+        self.paso_idx += 1
+        self.pie = "RF" if self.pie == "LF" else "LF"
+        self.t_rel = 0.0
+
+        self.x_dot_0 = self.x_dot_t
+        self.y_dot_0 = self.y_dot_t
+        self.x_t_rel -= self.zmp_x[self.paso_idx] - self.zmp_x[self.paso_idx - 1]
+        self.y_t_rel -= self.zmp_y[self.paso_idx] - self.zmp_y[self.paso_idx - 1]
+        self.x_0_rel = self.x_t_rel
+        self.y_0_rel = self.y_t_rel
+
+        self.pasos.append(self._paso_actual())
+        self.t_cambio = self._calcular_t_cambio()
+
+    def avanzar_hasta_evento(self, t_max):
+        """
+        Salta directamente al siguiente cambio de apoyo (o a t_max).
+
+        Args:
+            t_max (float): Tiempo absoluto máximo (s)
+
+        Returns:
+            bool: True si se produjo un cambio de apoyo
+        """
+        if self.t_abs >= t_max:
+            return False
+        hay_cambio = self.t_cambio <= t_max
+        t_evento = max(self.t_cambio, self.t_abs) if hay_cambio else t_max
+
+        self.t_rel += t_evento - self.t_abs
+        self.t_abs = t_evento
+        self._propagar(self.t_rel)
+        if hay_cambio:
+            self.cambiar_apoyo()
+        return hay_cambio
+
+    def simular_eventos(self, t_max):
+        """
+        Recorre todos los pasos hasta t_max con una operación por paso.
+
+        Args:
+            t_max (float): Tiempo absoluto máximo (s)
+
+        Returns:
+            list: Pasos de apoyo (Paso3D) recorridos
+        """
+        while self.avanzar_hasta_evento(t_max):
+            pass
+        return self.pasos
+
+    def simular(self, t_max):
+        """
+        Simula con paso fijo dt hasta t_max guardando el historial.
+
+        Args:
+            t_max (float): Tiempo absoluto máximo (s)
+
+        Returns:
+            np.ndarray: Vista de los registros del historial
+        """
+        while self.t_abs < t_max:
+            self.paso()
+        return self.historial.vista()
+
+
+def muestrear_pasos(pasos, T_c, tiempos):
+    """
+    Evalúa la trayectoria 3D en instantes arbitrarios a partir de los pasos.
+
+    Args:
+        pasos (list): Pasos de apoyo (Paso3D) ordenados por tiempo
+        T_c (float): Constante de tiempo del LIPM (s)
+        tiempos (array): Instantes absolutos a muestrear
+
+    Returns:
+        tuple: Arrays (x, ẋ, y, ẏ) absolutos en cada instante
+    """
+    tiempos = np.asarray(tiempos, dtype=float)
+    tabla = np.array([paso[:7] for paso in pasos], dtype=float)
+    # Paso activo en cada instante (el cambio pertenece al nuevo paso)
+    idx = np.clip(np.searchsorted(tabla[:, 0], tiempos, side='right') - 1, 0, len(pasos) - 1)
+    t_inicio, zmp_x, zmp_y, x_0, x_dot_0, y_0, y_dot_0 = tabla[idx].T
+
+    tau = (tiempos - t_inicio) / T_c
+    c = np.cosh(tau)
+    s = np.sinh(tau)
+    return (zmp_x + x_0 * c + T_c * x_dot_0 * s, x_0 * s / T_c + x_dot_0 * c,
+            zmp_y + y_0 * c + T_c * y_dot_0 * s, y_0 * s / T_c + y_dot_0 * c)
+
+
+def dibujar_trayectoria(simulador):
+    """Dibuja la vista superior del CoM y las huellas de los pasos."""
+    import matplotlib.pyplot as plt
+
+    registros = simulador.historial.vista()
+    fig, (ax_xy, ax_t) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_xy.plot(registros['x'], registros['y'], 'b-', label='CoM')
+    for paso in simulador.pasos:
+        color = 'red' if paso.pie == "LF" else 'green'
+        ax_xy.plot(paso.zmp_x, paso.zmp_y, 's', color=color, markersize=10)
+    ax_xy.set_xlabel('X (m)')
+    ax_xy.set_ylabel('Y (m)')
+    ax_xy.set_title('Vista superior (rojo: LF, verde: RF)')
+    ax_xy.grid(True)
+    ax_xy.legend()
+
+    ax_t.plot(registros['t'], registros['x'] - registros['zmp_x'], label='x - zmp_x')
+    ax_t.plot(registros['t'], registros['y'] - registros['zmp_y'], label='y - zmp_y')
+    ax_t.set_xlabel('Tiempo (s)')
+    ax_t.set_ylabel('Posición relativa (m)')
+    ax_t.grid(True)
+    ax_t.legend()
+    plt.tight_layout()
+    plt.show()
+
+
+def _lista_floats(texto):
+    """Convierte '0.4,1,1.8' en [0.4, 1.0, 1.8]."""
+    return [float(valor) for valor in texto.split(',')]
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Simulador LIPM 3D (sagital + frontal)')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del péndulo (m)')
+    parser.add_argument('--g', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--dt', type=float, default=0.02, help='Incremento de tiempo (s)')
+    parser.add_argument('--t_max', type=float, default=10.0, help='Tiempo máximo de simulación (s)')
+    parser.add_argument('--x_dot_0', type=float, default=0.3, help='Velocidad sagital inicial (m/s)')
+    parser.add_argument('--y_dot_0', type=float, default=0.3, help='Velocidad lateral inicial (m/s)')
+    parser.add_argument('--zmp_x', type=_lista_floats, default=None, help='ZMP sagitales ("a,b,...")')
+    parser.add_argument('--zmp_y', type=_lista_floats, default=None, help='ZMP laterales ("a,b,...")')
+    parser.add_argument('--tiempos', type=_lista_floats, default=None,
+                        help='Tiempos de cambio ("a,b,..."); por defecto, umbrales sagitales')
+    parser.add_argument('--grabar', default=None, help='Fichero donde grabar la trayectoria')
+    parser.add_argument('--grafica', action='store_true', help='Dibujar la trayectoria')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    modelo = ModeloLIPM(altura=args.altura, gravedad=args.g)
+    simulador = SimuladorLIPM3D(modelo, dt=args.dt, zmp_x=args.zmp_x, zmp_y=args.zmp_y,
+                                tiempos_cambio=args.tiempos, x_dot_0=args.x_dot_0,
+                                y_dot_0=args.y_dot_0)
+    if args.grabar:
+        from trayectoria import COLUMNAS_3D, EscritorTrayectoria
+
+        simulador.grabador = EscritorTrayectoria(args.grabar, simulador.parametros_grabacion(),
+                                                 columnas=COLUMNAS_3D)
+    simulador.simular(args.t_max)
+    if simulador.grabador is not None:
+        simulador.grabador.cerrar()
+
+    for paso in simulador.pasos:
+        print(f"t={paso.t_inicio:6.2f}s  pie={paso.pie}  zmp=({paso.zmp_x:.2f}, {paso.zmp_y:.2f})")
+    x, y = simulador.posicion()
+    print(f"Estado final: t={simulador.t_abs:.2f}s  x={x:.3f}  y={y:.3f}")
+
+    if args.grafica:
+        dibujar_trayectoria(simulador)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+"""
+Exportación paralela y en streaming de la animación de LIPMVisualizer.
+
+La trayectoria se calcula una sola vez. Los frames se renderizan por bloques
+en un conjunto de procesos con el backend Agg, y se escriben en orden en la
+salida a medida que llegan, con un número acotado de bloques en vuelo, de
+modo que la memoria no crece con la duración de la animación.
+
+Formatos de salida según el nombre del fichero:
+
+- `.gif`: GIF animado escrito frame a frame (paleta local por frame).
+- `.rgba`: secuencia de frames RGBA sin cabecera, por ejemplo para
+  `ffmpeg -f rawvideo -pix_fmt rgba -s ANCHOxALTO -r FPS -i salida.rgba`.
+- Patrón con `%d` terminado en `.png` (p. ej. `frames/lipm_%05d.png`):
+  un PNG por frame.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Frontal_Mejorado import G, HEIGHT, MAX_TIME, LIPMSimulator
+
+CHUNK_FRAMES = 16  # Frames renderizados por tarea
+DEFAULT_FIGSIZE = (14, 10)  # Tamaño de figura de LIPMVisualizer (pulgadas)
+
+
+def parse_size(text):
+    """Convierte 'ANCHOxALTO' en una tupla de enteros (o None)."""
+    if not text:
+        return None
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def output_format(filename):
+    """Deduce el formato de salida a partir del nombre del fichero."""
+    if filename.endswith('.gif'):
+        return 'gif'
+    if filename.endswith('.rgba'):
+        return 'rgba'
+    if filename.endswith('.png') and '%' in filename:
+        return 'png'
+    raise ValueError(f"Formato de salida no soportado: {filename}")
+
+
+def precompute_trajectory(height=HEIGHT, g=G, max_time=MAX_TIME, schedule=None):
+    """
+    Simula una vez la trayectoria completa sin visualización.
+
+    Args:
+        height: Altura del péndulo (m)
+        g: Aceleración de la gravedad (m/s²)
+        max_time: Tiempo máximo de simulación (s)
+        schedule: Argumentos de planificación para LIPMSimulator (opcional)
+
+    Returns:
+        Diccionario de arrays por muestra: 't', 'y', 'y_dot', 'zmp', 'energy'
+        y 'foot' (0 = LF, 1 = RF)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator = LIPMSimulator(height=height, g=g, max_time=max_time, **(schedule or {}))
+        while simulator.update():
+            pass
+
+    records = simulator.history.vista()
+    trajectory = {name: np.ascontiguousarray(records[name]) for name in records.dtype.names}
+
+    # Pie de apoyo de cada muestra (la muestra del cambio pertenece a la fase anterior)
+    starts = np.array([phase.t_start for phase in simulator.phases])
+    feet = np.array([phase.foot == "RF" for phase in simulator.phases], dtype=np.int8)
+    phase_idx = np.clip(np.searchsorted(starts, trajectory['t'], side='left') - 1, 0, len(feet) - 1)
+    trajectory['foot'] = feet[phase_idx]
+    return trajectory
+
+
+class TrajectoryPlayback:
+    """
+    Reproduce una trayectoria precalculada con la interfaz de LIPMSimulator
+    que usa LIPMVisualizer (get_display_data, height).
+    """
+
+    def __init__(self, trajectory, height=HEIGHT, g=G):
+        """
+        Inicializa la reproducción.
+
+        Args:
+            trajectory: Diccionario devuelto por precompute_trajectory
+            height: Altura del péndulo (m)
+            g: Aceleración de la gravedad (m/s²)
+        """
+        self.trajectory = trajectory
+        self.height = height
+        self.g = g
+        self.frame = 0
+
+    def get_display_data(self):
+        """Retorna los datos para visualización en el frame actual."""
+        i, n, tr = self.frame, self.frame + 1, self.trajectory
+        return {
+            't': tr['t'][i],
+            'y': tr['y'][i],
+            'y_dot': tr['y_dot'][i],
+            'y_ddot': (tr['y'][i] - tr['zmp'][i]) * self.g / self.height,
+            'zmp': tr['zmp'][i],
+            'foot': "RF" if tr['foot'][i] else "LF",
+            'orbital_energy': tr['energy'][i],
+            'history_t': tr['t'][:n],
+            'history_y': tr['y'][:n],
+            'history_y_dot': tr['y_dot'][:n],
+            'history_zmp': tr['zmp'][:n],
+            'history_total': n,
+            'foot_positions': [],
+            'energy_history': tr['energy'][:n]
+        }
+
+
+# Estado de cada proceso de render (se inicializa una vez por proceso)
+_worker = {}
+
+
+def _init_worker(trajectory, height, g, figsize, dpi, fmt, duration_ms):
+    """Crea en el proceso hijo una figura Agg con límites fijos para toda la animación."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from Frontal_Mejorado import LIPMVisualizer
+
+    playback = TrajectoryPlayback(trajectory, height, g)
+    visualizer = LIPMVisualizer(playback, blit=False, animate=False, figsize=figsize, dpi=dpi)
+    visualizer.init_animation()
+
+    # Límites calculados con la trayectoria completa: no hay reescalados entre bloques
+    playback.frame = len(trajectory['t']) - 1
+    visualizer.update(playback.frame)
+
+    # Con los límites fijos, el fondo estático se renderiza una sola vez
+    artists = visualizer.animated_artists()
+    for artist in artists:
+        artist.set_animated(True)
+    canvas = visualizer.fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(visualizer.fig.bbox)
+
+    _worker.update(playback=playback, visualizer=visualizer, artists=artists,
+                   background=background, fmt=fmt, duration_ms=duration_ms)
+
+
+def _encode_frame(rgba, fmt, duration_ms):
+    """Codifica un frame RGBA en el formato de salida."""
+    if fmt == 'rgba':
+        return rgba.tobytes()
+
+    from PIL import GifImagePlugin, Image
+
+    image = Image.fromarray(rgba[..., :3])
+    if fmt == 'png':
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    paletted = image.convert('P', palette=Image.ADAPTIVE)
+    return b''.join(GifImagePlugin.getdata(paletted, duration=duration_ms, include_color_table=True))
+
+
+def _render_chunk(frames):
+    """
+    Renderiza un bloque de frames consecutivos.
+
+    Returns:
+        Tupla (ancho, alto, lista de frames codificados)
+    """
+    playback, visualizer = _worker['playback'], _worker['visualizer']
+    fig = visualizer.fig
+    canvas = fig.canvas
+    encoded = []
+    for i in frames:
+        playback.frame = i
+        visualizer.update(i)
+        # Fondo estático + artistas dinámicos (blit sobre el buffer Agg)
+        canvas.restore_region(_worker['background'])
+        for artist in _worker['artists']:
+            fig.draw_artist(artist)
+        rgba = np.asarray(canvas.buffer_rgba())
+        encoded.append(_encode_frame(rgba, _worker['fmt'], _worker['duration_ms']))
+    return rgba.shape[1], rgba.shape[0], encoded
+
+
+class _FrameWriter:
+    """Escribe frames codificados en orden en la salida elegida."""
+
+    def __init__(self, filename, fmt):
+        self.filename = filename
+        self.fmt = fmt
+        self.file = None
+        self.count = 0
+
+    def open(self, width, height):
+        """Abre la salida cuando se conoce el tamaño del primer frame."""
+        if self.fmt == 'png':
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            return
+        self.file = open(self.filename, 'wb')
+        if self.fmt == 'gif':
+            # Cabecera sin paleta global y extensión NETSCAPE para repetir en bucle
+            self.file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+            self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', 0) + b'\x00')
+
+    def write(self, frame):
+        """Escribe un frame codificado."""
+        if self.fmt == 'png':
+            with open(self.filename % self.count, 'wb') as f:
+                f.write(frame)
+        else:
+            self.file.write(frame)
+        self.count += 1
+
+    def close(self):
+        """Cierra la salida."""
+        if self.file is not None:
+            if self.fmt == 'gif':
+                self.file.write(b';')
+            self.file.close()
+
+
+def export_animation(filename, height=HEIGHT, g=G, max_time=MAX_TIME, fps=30, dpi=100,
+                     size=None, workers=None, frame_step=1, chunk_frames=CHUNK_FRAMES, schedule=None):
+    """
+    Exporta la animación de LIPMVisualizer sin ventana y en paralelo.
+
+    Args:
+        filename: Fichero de salida (.gif, .rgba o patrón .png con %d)
+        height: Altura del péndulo (m)
+        g: Aceleración de la gravedad (m/s²)
+        max_time: Tiempo máximo de simulación (s)
+        fps: Frames por segundo del resultado
+        dpi: Resolución de render
+        size: Tamaño (ancho, alto) en píxeles; por defecto el de LIPMVisualizer
+        workers: Procesos de render (por defecto, todos los núcleos)
+        frame_step: Se renderiza una de cada frame_step muestras
+        chunk_frames: Frames por tarea de render
+        schedule: Argumentos de planificación para LIPMSimulator (opcional)
+
+    Returns:
+        Número de frames escritos
+    """
+    fmt = output_format(filename)
+    trajectory = precompute_trajectory(height, g, max_time, schedule)
+    figsize = DEFAULT_FIGSIZE if size is None else (size[0] / dpi, size[1] / dpi)
+    workers = workers or os.cpu_count() or 1
+
+    frames = range(0, len(trajectory['t']), frame_step)
+    chunks = (frames[i:i + chunk_frames] for i in range(0, len(frames), chunk_frames))
+    writer = _FrameWriter(filename, fmt)
+
+    def consume(future):
+        width, height_px, encoded = future.result()
+        if writer.count == 0:
+            writer.open(width, height_px)
+        for frame in encoded:
+            writer.write(frame)
+
+    # 'spawn' evita heredar un backend gráfico ya inicializado en el proceso padre
+    context = multiprocessing.get_context('spawn')
+    initargs = (trajectory, height, g, figsize, dpi, fmt, int(round(1000 / fps)))
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_render_chunk, chunk))
+                # Como mucho dos bloques en vuelo por proceso: memoria acotada
+                if len(pending) >= 2 * workers:
+                    consume(pending.popleft())
+            while pending:
+                consume(pending.popleft())
+    finally:
+        writer.close()
+    return writer.count
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Exportación paralela de la animación LIPM frontal')
+    parser.add_argument('output', help='Fichero de salida (.gif, .rgba o patrón .png con %%d)')
+    parser.add_argument('--height', type=float, default=HEIGHT, help='Altura del péndulo (m)')
+    parser.add_argument('--g', type=float, default=G, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--max_time', type=float, default=MAX_TIME, help='Tiempo máximo de simulación (s)')
+    parser.add_argument('--fps', type=int, default=30, help='Frames por segundo')
+    parser.add_argument('--dpi', type=int, default=100, help='Resolución de render')
+    parser.add_argument('--size', type=str, default=None, help='Tamaño en píxeles (ANCHOxALTO)')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos de render')
+    parser.add_argument('--frame_step', type=int, default=1, help='Renderizar una de cada N muestras')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    count = export_animation(args.output, height=args.height, g=args.g, max_time=args.max_time,
+                             fps=args.fps, dpi=args.dpi, size=parse_size(args.size),
+                             workers=args.workers, frame_step=args.frame_step)
+    print(f"{count} frames escritos en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
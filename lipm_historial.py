@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Historial compacto de estados para los simuladores LIPM.
+
+Guarda las muestras en un único array estructurado de NumPy preasignado, en
+lugar de varias listas de floats de Python. Admite dos modos:
+
+- Lineal: conserva todas las muestras; la capacidad se duplica al agotarse.
+- Circular: conserva solo las últimas `capacidad` muestras para ejecuciones
+  largas o indefinidas. Cada muestra se escribe dos veces (en i e i+capacidad)
+  de forma que la ventana más reciente siempre es contigua en memoria.
+
+En ambos modos los campos se devuelven como vistas sin copia, que pueden
+pasarse directamente a `set_data` de matplotlib.
+
+VentanaMinMax mantiene el mínimo y el máximo de una ventana deslizante en el
+tiempo con coste amortizado O(1) por muestra, para el autoescalado de ejes.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class HistorialLIPM:
+    """
+    Historial de tamaño fijo respaldado por un array estructurado de NumPy.
+    """
+
+    def __init__(self, campos, capacidad=4096, circular=False):
+        """
+        Inicializa el historial.
+
+        Args:
+            campos (sequence): Nombres de los campos de cada muestra, en orden
+            capacidad (int): Número de muestras preasignadas
+            circular (bool): Si es True, sobrescribe las muestras más antiguas
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad del historial debe ser positiva")
+
+        self.campos = tuple(campos)
+        self.capacidad = int(capacidad)
+        self.circular = circular
+        self.dtype = np.dtype([(campo, np.float64) for campo in self.campos])
+        tamano = 2 * self.capacidad if circular else self.capacidad
+        self._datos = np.zeros(tamano, dtype=self.dtype)
+        self.total = 0  # Muestras añadidas desde el inicio
+
+    def __len__(self):
+        """Número de muestras disponibles."""
+        return min(self.total, self.capacidad) if self.circular else self.total
+
+    def agregar(self, *valores):
+        """
+        Añade una muestra con un valor por campo, en el orden de `campos`.
+
+        Args:
+            *valores (float): Valores de la muestra
+        """
+        if self.circular:
+            i = self.total % self.capacidad
+            self._datos[i] = valores
+            self._datos[i + self.capacidad] = valores
+        else:
+            if self.total == self.capacidad:
+                self._ampliar()
+            self._datos[self.total] = valores
+        self.total += 1
+
+    def _ampliar(self):
+        """Duplica la capacidad en modo lineal (coste amortizado O(1))."""
+        datos = np.zeros(2 * self.capacidad, dtype=self.dtype)
+        datos[:self.capacidad] = self._datos
+        self._datos = datos
+        self.capacidad *= 2
+
+    def _limites(self):
+        """Devuelve los índices [inicio, fin) de las muestras válidas."""
+        if not self.circular:
+            return 0, self.total
+        n = len(self)
+        fin = (self.total - 1) % self.capacidad + 1 + self.capacidad if n else self.capacidad
+        return fin - n, fin
+
+    def vista(self, campo=None):
+        """
+        Devuelve una vista sin copia de las muestras válidas.
+
+        Args:
+            campo (str): Campo a devolver; si es None, devuelve los registros completos
+
+        Returns:
+            np.ndarray: Vista ordenada de la muestra más antigua a la más reciente
+        """
+        inicio, fin = self._limites()
+        if campo is None:
+            return self._datos[inicio:fin]
+        return self._datos[campo][inicio:fin]
+
+    def __getitem__(self, campo):
+        """Atajo para `vista(campo)`."""
+        return self.vista(campo)
+
+    def ultimo(self, campo):
+        """Devuelve el valor más reciente de un campo."""
+        if not self.total:
+            raise IndexError("El historial está vacío")
+        return self._datos[campo][self._limites()[1] - 1]
+
+    def limpiar(self):
+        """Descarta todas las muestras conservando la memoria reservada."""
+        self.total = 0
+
+
+class VentanaMinMax:
+    """
+    Mínimo y máximo de una ventana temporal deslizante.
+
+    Usa dos colas monótonas de pares (tiempo, valor): cada muestra entra y
+    sale de cada cola como mucho una vez, así que agregar y expirar cuestan
+    O(1) amortizado y la consulta es O(1). Los tiempos deben ser crecientes.
+    """
+
+    def __init__(self):
+        """Inicializa una ventana vacía."""
+        self._minimos = deque()  # Valores crecientes
+        self._maximos = deque()  # Valores decrecientes
+
+    def __len__(self):
+        """Número de candidatos a máximo en la ventana (0 si está vacía)."""
+        return len(self._maximos)
+
+    def agregar(self, t, valor):
+        """
+        Añade una muestra al final de la ventana.
+
+        Args:
+            t (float): Instante de la muestra
+            valor (float): Valor de la muestra
+        """
+        while self._minimos and self._minimos[-1][1] >= valor:
+            self._minimos.pop()
+        self._minimos.append((t, valor))
+        while self._maximos and self._maximos[-1][1] <= valor:
+            self._maximos.pop()
+        self._maximos.append((t, valor))
+
+    def expirar(self, t_min):
+        """
+        Descarta las muestras anteriores al inicio de la ventana.
+
+        Args:
+            t_min (float): Instante de inicio de la ventana
+        """
+        while self._minimos and self._minimos[0][0] < t_min:
+            self._minimos.popleft()
+        while self._maximos and self._maximos[0][0] < t_min:
+            self._maximos.popleft()
+
+    def minimo(self):
+        """Valor mínimo de la ventana."""
+        return self._minimos[0][1]
+
+    def maximo(self):
+        """Valor máximo de la ventana."""
+        return self._maximos[0][1]
+
+    def limpiar(self):
+        """Vacía la ventana."""
+        self._minimos.clear()
+        self._maximos.clear()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""
+Simulación vectorizada de conjuntos de péndulos invertidos lineales (LIPM).
+
+Avanza a la vez miles de trayectorias con distintas alturas, condiciones
+iniciales y planificaciones de ZMP usando operaciones sobre arrays de NumPy.
+Los cambios de apoyo de cada miembro se aplican con máscaras, con la misma
+lógica que SimuladorLIPM (cambio por posición, plano sagital) y LIPMSimulator
+(cambio por tiempo, plano frontal).
+"""
+
+import numpy as np
+
+from integradores import IntegradorRK4
+
+
+class SimuladorLoteLIPM:
+    """
+    Simulador de un lote de LIPM que comparten reloj y paso de tiempo.
+    """
+
+    def __init__(self, altura, x_0_rel, x_dot_0, zmp, cambios, modo='posicion',
+                 gravedad=9.8, dt=0.02, integrador=None, perfil_altura=None):
+        """
+        Inicializa el lote de simulaciones.
+
+        Args:
+            altura (array): Altura del centro de masa de cada miembro (m)
+            x_0_rel (array): Posición inicial relativa al primer ZMP (m)
+            x_dot_0 (array): Velocidad inicial (m/s)
+            zmp (array): Posiciones de ZMP, compartidas (n_zmp,) o por miembro (N, n_zmp)
+            cambios (array): Umbrales de cambio, compartidos (n_cambios,) o por miembro
+                (N, n_cambios); posiciones si modo='posicion', tiempos si modo='tiempo'
+            modo (str): 'posicion' (sagital) o 'tiempo' (frontal)
+            gravedad (float): Aceleración de la gravedad (m/s²)
+            dt (float): Incremento de tiempo por paso (s)
+            integrador (Integrador): Integrador numérico aplicado a todo el lote
+                a la vez (ver integradores.py); por defecto, Φ(dt) por miembro
+            perfil_altura (PerfilAltura): Altura común en función del tiempo
+                (sustituye a `altura`; sin integrador indicado se usa RK4)
+        """
+        if modo not in ('posicion', 'tiempo'):
+            raise ValueError(f"Modo de cambio desconocido: {modo}")
+
+        altura, x_0_rel, x_dot_0 = np.broadcast_arrays(
+            np.asarray(altura, dtype=float),
+            np.asarray(x_0_rel, dtype=float),
+            np.asarray(x_dot_0, dtype=float),
+        )
+        self.n = altura.size
+        self.modo = modo
+        self.gravedad = gravedad
+        self.dt = dt
+        self.perfil_altura = perfil_altura
+        if integrador is None and perfil_altura is not None:
+            integrador = IntegradorRK4()
+        self.integrador = integrador
+
+        # Planificación de ZMP: vistas sin copia cuando es compartida
+        self.zmp = np.broadcast_to(np.asarray(zmp, dtype=float), (self.n, np.shape(zmp)[-1]))
+        self.cambios = np.broadcast_to(np.asarray(cambios, dtype=float),
+                                       (self.n, np.shape(cambios)[-1]))
+        self._filas = np.arange(self.n)
+
+        # Parámetros físicos por miembro
+        self.altura = altura.ravel().copy()
+        self.T_c = np.sqrt(self.altura / gravedad)
+
+        # Matriz de transición Φ(dt) por miembro: dt y T_c son fijos en el lote
+        c = np.cosh(dt / self.T_c)
+        s = np.sinh(dt / self.T_c)
+        self._phi_c, self._phi_ts, self._phi_st = c, self.T_c * s, s / self.T_c
+
+        # Estado actual
+        self.t_abs = 0.0
+        self.t_rel = np.zeros(self.n)
+        self.x_0_rel = x_0_rel.ravel().copy()
+        self.x_dot_0 = x_dot_0.ravel().copy()
+        self.x_t_rel = self.x_0_rel.copy()
+        self.x_dot_t = self.x_dot_0.copy()
+        self.zmp_idx = np.zeros(self.n, dtype=np.intp)
+        self.activo = np.ones(self.n, dtype=bool)
+        self.n_cambios = np.zeros(self.n, dtype=np.intp)
+
+    def zmp_actual(self):
+        """Devuelve el ZMP activo de cada miembro."""
+        return self.zmp[self._filas, self.zmp_idx]
+
+    def posicion(self):
+        """Devuelve la posición absoluta del centro de masa de cada miembro."""
+        return self.zmp_actual() + self.x_t_rel
+
+    def energia_orbital(self):
+        """Devuelve la energía orbital E = ẋ²/2 - (g/2h)·x² de cada miembro."""
+        return 0.5 * self.x_dot_t ** 2 - (self.gravedad / (2 * self.altura)) * self.x_t_rel ** 2
+
+    def omega2(self, t):
+        """ω²(t) = (g + z̈)/z de cada miembro, o común si hay perfil de altura."""
+        if self.perfil_altura is not None:
+            return self.perfil_altura.omega2(t, self.gravedad)
+        return self.gravedad / self.altura
+
+    def paso(self):
+        """
+        Ejecuta un paso de simulación para todos los miembros activos.
+
+        Returns:
+            array: Posición absoluta de cada miembro
+        """
+        activo = self.activo
+
+        # Calcular nuevo estado con Φ(dt) (los miembros detenidos no avanzan)
+        if self.integrador is None:
+            x_t_rel = self._phi_c * self.x_t_rel + self._phi_ts * self.x_dot_t
+            x_dot_t = self._phi_st * self.x_t_rel + self._phi_c * self.x_dot_t
+        else:
+            x_t_rel, x_dot_t = self.integrador.avanzar(self.x_t_rel, self.x_dot_t, self.t_abs,
+                                                        self.dt, self.omega2)
+        self.t_abs += self.dt
+        self.t_rel[activo] += self.dt
+        self.x_t_rel = np.where(activo, x_t_rel, self.x_t_rel)
+        self.x_dot_t = np.where(activo, x_dot_t, self.x_dot_t)
+        posicion = self.posicion()
+
+        # Lógica de cambio de ZMP por miembro
+        n_cambios = self.cambios.shape[1]
+        idx_umbral = np.minimum(self.zmp_idx, n_cambios - 1)
+        umbral = self.cambios[self._filas, idx_umbral]
+        if self.modo == 'posicion':
+            cambia = activo & (self.zmp_idx < n_cambios) & (posicion > umbral)
+        else:
+            cambia = activo & (self.zmp_idx < n_cambios - 1) & (self.t_abs > umbral)
+
+        if cambia.any():
+            self._cambiar_zmp(np.flatnonzero(cambia))
+        return posicion
+
+    def _cambiar_zmp(self, miembros):
+        """
+        Pasa al siguiente ZMP a los miembros indicados conservando su velocidad.
+
+        Args:
+            miembros (array): Índices de los miembros que cambian de apoyo
+        """
+        nuevo_idx = self.zmp_idx[miembros] + 1
+
+        # Sin más ZMP disponibles el miembro se detiene
+        agotados = nuevo_idx >= self.zmp.shape[1]
+        self.activo[miembros[agotados]] = False
+        miembros = miembros[~agotados]
+        nuevo_idx = nuevo_idx[~agotados]
+
+        avance = self.zmp[miembros, nuevo_idx] - self.zmp[miembros, nuevo_idx - 1]
+        self.zmp_idx[miembros] = nuevo_idx
+        self.n_cambios[miembros] += 1
+        self.t_rel[miembros] = 0
+        self.x_dot_0[miembros] = self.x_dot_t[miembros]
+        self.x_t_rel[miembros] -= avance
+        self.x_0_rel[miembros] = self.x_t_rel[miembros]
+
+    def simular(self, n_pasos, registrar=False):
+        """
+        Ejecuta varios pasos seguidos.
+
+        Args:
+            n_pasos (int): Número de pasos a simular
+            registrar (bool): Si es True, devuelve las trayectorias completas
+
+        Returns:
+            dict: Arrays (n_pasos, N) con 'tiempo', 'posicion', 'velocidad' y 'zmp'
+                si registrar es True; None en caso contrario
+        """
+        if not registrar:
+            for _ in range(n_pasos):
+                self.paso()
+            return None
+
+        tiempo = np.empty(n_pasos)
+        posicion = np.empty((n_pasos, self.n))
+        velocidad = np.empty((n_pasos, self.n))
+        zmp = np.empty((n_pasos, self.n))
+        for i in range(n_pasos):
+            zmp[i] = self.zmp_actual()
+            posicion[i] = self.paso()
+            velocidad[i] = self.x_dot_t
+            tiempo[i] = self.t_abs
+        return {'tiempo': tiempo, 'posicion': posicion, 'velocidad': velocidad, 'zmp': zmp}
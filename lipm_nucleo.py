@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+"""
+Núcleo sin ventana de los simuladores LIPM.
+
+Reúne en un solo import el modelo, los simuladores, el historial y el formato
+de trayectorias, sin cargar matplotlib: los visualizadores lo importan solo
+cuando se crean. Es lo que deben importar los procesos de trabajo (barridos,
+exportación, lotes) para arrancar en milisegundos:
+
+    from lipm_nucleo import ModeloLIPM, SimuladorLIPM
+"""
+
+from lipm_historial import HistorialLIPM, VentanaMinMax
+from trayectoria import EscritorTrayectoria, LectorTrayectoria, leer_trayectoria
+from Sagital_Mejorado import EstadoSimulacion, FaseApoyo, ModeloLIPM, SimuladorLIPM, muestrear_fases
+from Frontal_Mejorado import LIPMSimulator, SupportPhase, sample_phases
+from lipm3d import Paso3D, SimuladorLIPM3D, muestrear_pasos
+from lipm_lote import SimuladorLoteLIPM
+
+__all__ = [
+    'HistorialLIPM', 'VentanaMinMax',
+    'EscritorTrayectoria', 'LectorTrayectoria', 'leer_trayectoria',
+    'EstadoSimulacion', 'FaseApoyo', 'ModeloLIPM', 'SimuladorLIPM', 'muestrear_fases',
+    'LIPMSimulator', 'SupportPhase', 'sample_phases',
+    'Paso3D', 'SimuladorLIPM3D', 'muestrear_pasos',
+    'SimuladorLoteLIPM',
+]
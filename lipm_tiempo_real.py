@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Bucle de física desacoplado del bucle de render.
+
+En los visualizadores interactivos la física solo avanza cuando matplotlib
+pide un nuevo frame, así que un redibujado lento ralentiza también el tiempo
+simulado. BucleFisica avanza el simulador en un hilo propio a un ritmo fijo
+ligado al reloj real y publica después de cada ciclo una instantánea del
+estado; el render dibuja la última instantánea publicada al ritmo que pueda.
+
+- La publicación es una sola asignación de referencia: el lector siempre ve
+  una instantánea completa, la anterior o la nueva, sin cerrojos.
+- Las acciones de botones y sliders se encolan y el hilo de física las
+  aplica entre dos tics, nunca a mitad de un paso.
+- Si la física se retrasa más de `max_pasos` tics (por ejemplo, tras una
+  suspensión del proceso) se descarta el retraso en lugar de intentar
+  recuperarlo de golpe.
+"""
+
+import queue
+import threading
+import time
+
+
+class BucleFisica:
+    """
+    Hilo que avanza un simulador en tiempo real y publica instantáneas.
+    """
+
+    def __init__(self, avanzar, instantanea, dt, velocidad=1.0, en_marcha=None, max_pasos=25):
+        """
+        Inicializa el bucle (el hilo no arranca hasta llamar a iniciar).
+
+        Args:
+            avanzar (callable): Ejecuta un tic del simulador; si devuelve False
+                la simulación ha terminado
+            instantanea (callable): Construye, en el hilo de física, el estado
+                que se publica para el render
+            dt (float): Tiempo simulado por tic (s)
+            velocidad (float): Tiempo simulado por segundo real
+            en_marcha (callable): Devuelve False mientras la simulación está
+                pausada o detenida (por defecto, siempre en marcha)
+            max_pasos (int): Máximo de tics de recuperación por ciclo
+        """
+        self.avanzar = avanzar
+        self.instantanea = instantanea
+        self.dt = dt
+        self.velocidad = velocidad
+        self.en_marcha = en_marcha
+        self.max_pasos = max_pasos
+
+        self._comandos = queue.SimpleQueue()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name='BucleFisica', daemon=True)
+        self._ultima = None
+
+        self.ticks = 0  # Tics ejecutados
+        self.descartados = 0  # Tics descartados por retraso
+        self.terminado = False
+
+    def iniciar(self):
+        """Publica el estado inicial y arranca el hilo de física."""
+        self._publicar()
+        self._hilo.start()
+
+    def detener(self, espera=1.0):
+        """
+        Detiene el hilo de física.
+
+        Args:
+            espera (float): Tiempo máximo de espera al hilo (s)
+        """
+        self._detener.set()
+        if self._hilo.is_alive():
+            self._hilo.join(espera)
+
+    def encolar(self, funcion, *args, **kwargs):
+        """
+        Encola una acción para aplicarla en el hilo de física entre dos tics.
+
+        Args:
+            funcion (callable): Acción a ejecutar
+            *args, **kwargs: Argumentos de la acción
+        """
+        self._comandos.put((funcion, args, kwargs))
+
+    def ultima(self):
+        """Última instantánea publicada."""
+        return self._ultima
+
+    def _publicar(self):
+        """Construye y publica una instantánea (una única asignación)."""
+        self._ultima = self.instantanea()
+
+    def _aplicar_comandos(self):
+        """
+        Aplica las acciones pendientes.
+
+        Returns:
+            bool: True si se aplicó alguna acción
+        """
+        aplicado = False
+        while True:
+            try:
+                funcion, args, kwargs = self._comandos.get_nowait()
+            except queue.Empty:
+                return aplicado
+            funcion(*args, **kwargs)
+            aplicado = True
+
+    def _ejecutar(self):
+        """Bucle principal del hilo de física."""
+        periodo = self.dt / self.velocidad  # Segundos reales por tic
+        origen = time.perf_counter()
+        ticks_origen = 0  # Tics desde el origen del reloj
+
+        while not self._detener.is_set():
+            if self._aplicar_comandos():
+                # Reinicios o cambios de parámetros: el reloj se vuelve a anclar
+                origen, ticks_origen = time.perf_counter(), 0
+                self.terminado = False
+                self._publicar()
+
+            if self.terminado or (self.en_marcha is not None and not self.en_marcha()):
+                # En pausa el reloj real no cuenta: se ancla de nuevo al reanudar
+                origen, ticks_origen = time.perf_counter(), 0
+                self._detener.wait(periodo)
+                continue
+
+            objetivo = int((time.perf_counter() - origen) / periodo)
+            pendientes = objetivo - ticks_origen
+            if pendientes > self.max_pasos:
+                self.descartados += pendientes - self.max_pasos
+                ticks_origen = objetivo - self.max_pasos
+                pendientes = self.max_pasos
+
+            for _ in range(pendientes):
+                ticks_origen += 1
+                self.ticks += 1
+                if self.avanzar() is False:
+                    self.terminado = True
+                    break
+            if pendientes > 0:
+                self._publicar()
+
+            siguiente = origen + (ticks_origen + 1) * periodo
+            self._detener.wait(max(0.0, siguiente - time.perf_counter()))
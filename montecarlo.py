@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+"""
+Análisis de Monte Carlo de la robustez de una planificación de pasos.
+
+Perturba con ruido gaussiano la velocidad inicial, los umbrales de cambio de
+apoyo (posiciones en el plano sagital, tiempos en el frontal) y las
+posiciones de los ZMP, y simula todas las muestras a la vez con
+SimuladorLoteLIPM. Las muestras se procesan en lotes cuyo tamaño se calcula
+a partir de un presupuesto de memoria, de modo que N puede ser arbitrario.
+
+Criterio de fallo:
+- Sagital: el CoM cae hacia atrás (detrás del ZMP y sin velocidad hacia
+  delante) o no termina todos los cambios antes de t_max.
+- Frontal: el CoM se aleja del pie de apoyo más de `limite` antes de t_max.
+  Con cambios por tiempo en lazo abierto el error crece en e^(T_s/T_c) por
+  apoyo, así que la tasa de éxito cae rápido con el número de pasos.
+
+Cada muestra se congela en cuanto se decide su resultado, así que las
+trayectorias no divergen numéricamente una vez terminadas.
+
+Resultados: tasa de éxito con intervalo de Wilson y bandas de percentiles de
+la posición del CoM. Las bandas se calculan sobre un reservorio de tamaño
+fijo (muestreo de reservorio, algoritmo R), así que la memoria no crece con N.
+El ruido de cada bloque fijo de BLOQUE_RUIDO muestras sale de su propio flujo
+derivado de la semilla, así que con la misma semilla el resultado es
+reproducible y no depende del presupuesto de memoria.
+
+Ejemplos:
+    python montecarlo.py --muestras 100000 --sigma_v 0.05 --sigma_zmp 0.05
+    python montecarlo.py --plano frontal --pasos 6 --sigma_cambio 0.02 --csv bandas.csv
+"""
+
+import argparse
+import csv
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from lipm_lote import SimuladorLoteLIPM
+
+# Planificación sagital por defecto, la de SimuladorLIPM
+ZMP_SAGITAL = [0, 4, 8, 12, 16, 20, 24]
+CAMBIOS_SAGITAL = [2, 6, 10, 14, 18, 22]
+
+# Floats de estado y temporales por miembro del lote, además de la
+# planificación y las trayectorias muestreadas (estimación para el presupuesto)
+FLOATS_POR_MIEMBRO = 32
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+BLOQUE_RUIDO = 1024  # Muestras por flujo de ruido independiente
+DT = 0.02  # Paso de tiempo por defecto (s)
+
+
+def marcha_frontal(n_pasos=4, ancho=0.4, duracion_paso=0.6, altura=1.2, gravedad=9.8, y_inicial=0.4,
+                   dt=None):
+    """
+    Marcha frontal periódica: pies alternos separados `ancho` y apoyos de
+    duración fija, con el CoM pasando por el punto medio en cada cambio.
+
+    Args:
+        n_pasos (int): Número de apoyos
+        ancho (float): Separación lateral entre pies (m)
+        duracion_paso (float): Duración de cada apoyo (s)
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        y_inicial (float): Posición del primer pie (m)
+        dt (float): Paso de tiempo del lote; si se indica, cada cambio se
+            coloca medio paso antes del paso en el que cae. El lote cambia en
+            el primer paso con t_abs > umbral, así que el cambio ocurre en ese
+            paso sin depender del redondeo de t_abs
+
+    Returns:
+        tuple: (zmp, cambios, y_0_rel, y_dot_0)
+    """
+    T_c = math.sqrt(altura / gravedad)
+    zmp = [y_inicial + ancho * (i % 2) for i in range(n_pasos)]
+    cambios = [duracion_paso * (i + 1) for i in range(n_pasos)]
+    if dt is not None:
+        cambios = [(math.ceil(cambio / dt - 1e-9) - 0.5) * dt for cambio in cambios]
+    # y(T_s) = y_0 con velocidad opuesta: ẏ_0 = -y_0·tanh(T_s/2T_c)/T_c
+    y_0_rel = ancho / 2
+    y_dot_0 = -y_0_rel * math.tanh(duracion_paso / (2 * T_c)) / T_c
+    return zmp, cambios, y_0_rel, y_dot_0
+
+
+def intervalo_wilson(exitos, n, confianza=0.95):
+    """
+    Intervalo de confianza de Wilson para una proporción.
+
+    Args:
+        exitos (int): Número de éxitos
+        n (int): Número de ensayos
+        confianza (float): Nivel de confianza
+
+    Returns:
+        tuple: (inferior, superior)
+    """
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    p = exitos / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return max(centro - margen, 0.0), min(centro + margen, 1.0)
+
+
+class ReservorioTrayectorias:
+    """
+    Muestra uniforme de tamaño fijo de las trayectorias vistas (algoritmo R).
+    """
+
+    def __init__(self, capacidad, n_muestras, rng):
+        """
+        Inicializa el reservorio.
+
+        Args:
+            capacidad (int): Número máximo de trayectorias guardadas
+            n_muestras (int): Instantes por trayectoria
+            rng (Generator): Generador para elegir las trayectorias
+        """
+        self.capacidad = capacidad
+        self.datos = np.empty((capacidad, n_muestras))
+        self.rng = rng
+        self.vistos = 0
+
+    def añadir(self, trayectorias):
+        """
+        Añade un bloque de trayectorias.
+
+        Args:
+            trayectorias (array): Trayectorias (m, n_muestras)
+        """
+        m = len(trayectorias)
+        libres = min(max(self.capacidad - self.vistos, 0), m)
+        self.datos[self.vistos:self.vistos + libres] = trayectorias[:libres]
+
+        if libres < m:
+            # La i-ésima trayectoria vista sustituye a una al azar con probabilidad capacidad/(i+1)
+            indices = np.arange(self.vistos + libres, self.vistos + m)
+            ranuras = self.rng.integers(0, indices + 1)
+            fuentes = np.flatnonzero(ranuras < self.capacidad)
+            ranuras = ranuras[fuentes]
+            # Con ranuras repetidas gana la última, como en el algoritmo secuencial
+            ultimas = len(ranuras) - 1 - np.unique(ranuras[::-1], return_index=True)[1]
+            self.datos[ranuras[ultimas]] = trayectorias[libres + fuentes[ultimas]]
+        self.vistos += m
+
+    def percentiles(self, q):
+        """
+        Percentiles por instante de las trayectorias guardadas.
+
+        Args:
+            q (list): Percentiles (0-100)
+
+        Returns:
+            array: Bandas (len(q), n_muestras); NaN si no se ha visto ninguna
+        """
+        if self.vistos == 0:
+            return np.full((len(q), self.datos.shape[1]), np.nan)
+        return np.percentile(self.datos[:min(self.vistos, self.capacidad)], q, axis=0)
+
+
+def tamaño_lote(memoria_mb, n_zmp, n_cambios, n_muestras):
+    """
+    Miembros por lote que caben en el presupuesto de memoria.
+
+    Args:
+        memoria_mb (float): Presupuesto de memoria (MB)
+        n_zmp (int): Número de ZMP de la planificación
+        n_cambios (int): Número de umbrales de cambio
+        n_muestras (int): Instantes muestreados por trayectoria
+
+    Returns:
+        int: Tamaño del lote (al menos 1)
+    """
+    por_miembro = 8 * (FLOATS_POR_MIEMBRO + n_zmp + n_cambios + n_muestras)
+    return max(1, int(memoria_mb * 2 ** 20) // por_miembro)
+
+
+def _ruido_bloque(semilla, bloque, n_zmp, n_cambios):
+    """
+    Ruido normal estándar de un bloque fijo de BLOQUE_RUIDO muestras.
+
+    Cada bloque usa su propio flujo (hijo `bloque` del primer flujo derivado
+    de la semilla), así que el ruido de una muestra no depende de cómo se
+    agrupen las muestras en lotes.
+
+    Args:
+        semilla (int): Semilla del análisis
+        bloque (int): Índice del bloque
+        n_zmp (int): Número de ZMP de la planificación
+        n_cambios (int): Número de umbrales de cambio
+
+    Returns:
+        tuple: (velocidad (B,), zmp (B, n_zmp - 1), cambios (B, n_cambios))
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(0, bloque)))
+    return (rng.standard_normal(BLOQUE_RUIDO),
+            rng.standard_normal((BLOQUE_RUIDO, n_zmp - 1)),
+            rng.standard_normal((BLOQUE_RUIDO, n_cambios)))
+
+
+def _ruido(semilla, primero, m, n_zmp, n_cambios, cache):
+    """
+    Ruido de las muestras primero..primero+m-1, juntando los bloques que cubren.
+
+    Args:
+        semilla (int): Semilla del análisis
+        primero (int): Índice de la primera muestra
+        m (int): Número de muestras
+        n_zmp (int): Número de ZMP de la planificación
+        n_cambios (int): Número de umbrales de cambio
+        cache (dict): Último bloque generado, para lotes menores que un bloque
+
+    Returns:
+        tuple: (velocidad (m,), zmp (m, n_zmp - 1), cambios (m, n_cambios))
+    """
+    partes = []
+    for bloque in range(primero // BLOQUE_RUIDO, (primero + m - 1) // BLOQUE_RUIDO + 1):
+        if cache.get('bloque') != bloque:
+            cache['bloque'] = bloque
+            cache['ruido'] = _ruido_bloque(semilla, bloque, n_zmp, n_cambios)
+        desde = max(primero - bloque * BLOQUE_RUIDO, 0)
+        hasta = min(primero + m - bloque * BLOQUE_RUIDO, BLOQUE_RUIDO)
+        partes.append([ruido[desde:hasta] for ruido in cache['ruido']])
+    return tuple(np.concatenate(trozos) for trozos in zip(*partes))
+
+
+def _simular_lote(lote, sagital, limite, n_pasos, cada, trayectorias):
+    """
+    Simula un lote hasta decidir el resultado de todos sus miembros.
+
+    Args:
+        lote (SimuladorLoteLIPM): Lote recién creado
+        sagital (bool): Criterio de fallo sagital (True) o frontal (False)
+        limite (float): Distancia máxima CoM-pie en el plano frontal (m)
+        n_pasos (int): Pasos de simulación hasta t_max
+        cada (int): Pasos entre instantes muestreados
+        trayectorias (array): Salida (n_muestras, m) con la posición del CoM
+
+    Returns:
+        array: Éxito de cada miembro
+    """
+    n_cambios = lote.cambios.shape[1]
+    decidido = np.zeros(lote.n, dtype=bool)
+    exito = np.zeros(lote.n, dtype=bool)
+    trayectorias[0] = lote.posicion()
+    muestra = 1
+
+    for i in range(n_pasos):
+        posicion = lote.paso()
+        if sagital:
+            # Sin ZMP restantes el lote desactiva al miembro tras su último cambio
+            agotado = ~lote.activo & ~decidido
+            terminado = ~decidido & ((lote.zmp_idx >= n_cambios) | agotado)
+            cae = ~decidido & ~terminado & (lote.x_t_rel < 0) & (lote.x_dot_t <= 0)
+            exito |= terminado
+            nuevos = terminado | cae
+        else:
+            nuevos = ~decidido & (np.abs(lote.x_t_rel) > limite)
+        if nuevos.any():
+            decidido |= nuevos
+            lote.activo[nuevos] = False
+
+        if (i + 1) % cada == 0:
+            trayectorias[muestra] = posicion
+            muestra += 1
+        if decidido.all():
+            # Todos congelados: el resto de la trayectoria ya no cambia
+            trayectorias[muestra:] = posicion
+            break
+
+    if not sagital:
+        exito = ~decidido
+    return exito
+
+
+def montecarlo(muestras=10000, plano='sagital', zmp=None, cambios=None, x_0_rel=None, x_dot_0=None,
+               sigma_velocidad=0.05, sigma_cambio=0.02, sigma_zmp=0.02, altura=1.2, gravedad=9.8,
+               dt=DT, t_max=None, limite=0.4, memoria_mb=64, reservorio=2000, cada=5,
+               semilla=0, confianza=0.95, percentiles=PERCENTILES):
+    """
+    Estima la probabilidad de éxito de una planificación con ruido.
+
+    Args:
+        muestras (int): Número de muestras
+        plano (str): 'sagital' (cambio por posición) o 'frontal' (por tiempo)
+        zmp (list): Posiciones de los ZMP (por defecto, las de SimuladorLIPM
+            o una marcha frontal periódica)
+        cambios (list): Umbrales de cambio (m en sagital, s en frontal), tal
+            cual; en frontal el lote cambia en el primer paso con t_abs >
+            umbral (la marcha por defecto ya viene ajustada a dt)
+        x_0_rel (float): Posición inicial relativa al primer ZMP (m)
+        x_dot_0 (float): Velocidad inicial nominal (m/s)
+        sigma_velocidad (float): Desviación de la velocidad inicial (m/s)
+        sigma_cambio (float): Desviación de cada umbral de cambio (m o s)
+        sigma_zmp (float): Desviación de cada ZMP salvo el primero (m)
+        altura (float): Altura del CoM (m)
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        dt (float): Paso de tiempo (s)
+        t_max (float): Tiempo máximo (por defecto, 50 s en sagital y el
+            último cambio en frontal)
+        limite (float): Distancia máxima CoM-pie en el plano frontal (m)
+        memoria_mb (float): Presupuesto de memoria por lote (MB)
+        reservorio (int): Trayectorias guardadas para las bandas
+        cada (int): Pasos de simulación entre instantes de las bandas
+        semilla (int): Semilla de los generadores
+        confianza (float): Nivel de confianza del intervalo
+        percentiles (tuple): Percentiles de las bandas
+
+    Returns:
+        dict: 'exitos', 'muestras', 'tasa_exito', 'intervalo', 'tiempo',
+        'percentiles', 'bandas', 'tamaño_lote', 'lotes' y 'tiempo_real'
+    """
+    if plano == 'sagital':
+        zmp = ZMP_SAGITAL if zmp is None else zmp
+        cambios = CAMBIOS_SAGITAL if cambios is None else cambios
+        x_0_rel = 0.0 if x_0_rel is None else x_0_rel
+        x_dot_0 = 0.3 if x_dot_0 is None else x_dot_0
+        t_max = 50.0 if t_max is None else t_max
+    elif plano == 'frontal':
+        periodica = marcha_frontal(altura=altura, gravedad=gravedad, dt=dt)
+        zmp = periodica[0] if zmp is None else zmp
+        cambios = periodica[1] if cambios is None else cambios
+        x_0_rel = periodica[2] if x_0_rel is None else x_0_rel
+        x_dot_0 = periodica[3] if x_dot_0 is None else x_dot_0
+        t_max = cambios[-1] if t_max is None else t_max
+    else:
+        raise ValueError(f"Plano desconocido: {plano}")
+    if muestras < 0:
+        raise ValueError(f"Número de muestras negativo: {muestras}")
+
+    zmp = np.asarray(zmp, dtype=float)
+    cambios = np.asarray(cambios, dtype=float)
+    n_pasos = int(math.ceil(t_max / dt))
+    n_muestras = 1 + n_pasos // cada
+    tamaño = tamaño_lote(memoria_mb, zmp.size, cambios.size, n_muestras)
+
+    # Flujos independientes: el reservorio (hijo 1) no altera el ruido (hijos del 0)
+    rng_reservorio = np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(1,)))
+    bandas = ReservorioTrayectorias(reservorio, n_muestras, rng_reservorio)
+    cache = {}
+    trayectorias = np.empty((n_muestras, min(tamaño, muestras)))
+
+    exitos = 0
+    lotes = 0
+    inicio = time.perf_counter()
+    for primero in range(0, muestras, tamaño):
+        m = min(tamaño, muestras - primero)
+        ruido_v, ruido_zmp, ruido_cambios = _ruido(semilla, primero, m, zmp.size, cambios.size, cache)
+        velocidad = x_dot_0 + sigma_velocidad * ruido_v
+        zmp_lote = np.broadcast_to(zmp, (m, zmp.size)).copy()
+        zmp_lote[:, 1:] += sigma_zmp * ruido_zmp
+        cambios_lote = cambios + sigma_cambio * ruido_cambios
+
+        lote = SimuladorLoteLIPM(altura, np.full(m, x_0_rel), velocidad, zmp_lote, cambios_lote,
+                                 modo='posicion' if plano == 'sagital' else 'tiempo',
+                                 gravedad=gravedad, dt=dt)
+        exito = _simular_lote(lote, plano == 'sagital', limite, n_pasos, cada, trayectorias[:, :m])
+        exitos += int(exito.sum())
+        bandas.añadir(trayectorias[:, :m].T)
+        lotes += 1
+    transcurrido = time.perf_counter() - inicio
+
+    return {
+        'exitos': exitos,
+        'muestras': muestras,
+        'tasa_exito': exitos / muestras if muestras else 0.0,
+        'intervalo': intervalo_wilson(exitos, muestras, confianza),
+        'tiempo': dt * cada * np.arange(n_muestras),
+        'percentiles': tuple(percentiles),
+        'bandas': bandas.percentiles(percentiles),
+        'tamaño_lote': tamaño,
+        'lotes': lotes,
+        'tiempo_real': transcurrido,
+    }
+
+
+def escribir_bandas(ruta, resultado):
+    """
+    Escribe las bandas de percentiles en un CSV (una fila por instante).
+
+    Args:
+        ruta (str): Fichero de salida
+        resultado (dict): Resultado de montecarlo
+    """
+    with open(ruta, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['t'] + [f"p{q:g}" for q in resultado['percentiles']])
+        for t, fila in zip(resultado['tiempo'], resultado['bandas'].T):
+            escritor.writerow([f"{t:.4f}"] + [f"{valor:.6g}" for valor in fila])
+
+
+def _lista_floats(texto):
+    """Convierte '0.4,1,1.8' en [0.4, 1.0, 1.8]."""
+    return [float(valor) for valor in texto.split(',')]
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Análisis de Monte Carlo de una planificación de pasos LIPM')
+    parser.add_argument('--muestras', type=int, default=10000, help='Número de muestras')
+    parser.add_argument('--plano', choices=['sagital', 'frontal'], default='sagital')
+    parser.add_argument('--zmp', type=_lista_floats, help='Posiciones ZMP ("a,b,...")')
+    parser.add_argument('--cambios', type=_lista_floats,
+                        help='Umbrales de cambio ("a,b,...", m o s); en frontal se cambia en el primer '
+                             'paso con t > umbral, sin ajustarlos a dt')
+    parser.add_argument('--pasos', type=int, default=4, help='Apoyos de la marcha frontal por defecto')
+    parser.add_argument('--v0', type=float, help='Velocidad inicial nominal (m/s)')
+    parser.add_argument('--sigma_v', type=float, default=0.05, help='Desviación de la velocidad inicial (m/s)')
+    parser.add_argument('--sigma_cambio', type=float, default=0.02, help='Desviación de los cambios (m o s)')
+    parser.add_argument('--sigma_zmp', type=float, default=0.02, help='Desviación de los ZMP (m)')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del CoM (m)')
+    parser.add_argument('--t_max', type=float, help='Tiempo máximo de simulación (s)')
+    parser.add_argument('--limite', type=float, default=0.4, help='Distancia CoM-pie máxima en frontal (m)')
+    parser.add_argument('--memoria', type=float, default=64, help='Presupuesto de memoria por lote (MB)')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador')
+    parser.add_argument('--confianza', type=float, default=0.95, help='Nivel de confianza del intervalo')
+    parser.add_argument('--csv', help='Fichero donde escribir las bandas de percentiles')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    zmp, cambios, x_0_rel = args.zmp, args.cambios, None
+    if args.plano == 'frontal' and zmp is None and cambios is None:
+        zmp, cambios, x_0_rel, v0 = marcha_frontal(args.pasos, altura=args.altura, dt=DT)
+        args.v0 = v0 if args.v0 is None else args.v0
+
+    resultado = montecarlo(args.muestras, args.plano, zmp, cambios, x_0_rel, args.v0,
+                           args.sigma_v, args.sigma_cambio, args.sigma_zmp, altura=args.altura,
+                           t_max=args.t_max, limite=args.limite, memoria_mb=args.memoria,
+                           semilla=args.semilla, confianza=args.confianza)
+    inferior, superior = resultado['intervalo']
+    print(f"Éxito: {resultado['exitos']}/{resultado['muestras']} = {resultado['tasa_exito']:.4f} "
+          f"(IC {100 * args.confianza:g}% Wilson: [{inferior:.4f}, {superior:.4f}])")
+    print(f"{resultado['lotes']} lotes de hasta {resultado['tamaño_lote']} muestras "
+          f"en {resultado['tiempo_real']:.2f} s")
+    final = resultado['bandas'][:, -1]
+    print("Posición final del CoM por percentil: " +
+          ', '.join(f"p{q:g} {valor:.3f}" for q, valor in zip(resultado['percentiles'], final)))
+    if args.csv:
+        escribir_bandas(args.csv, resultado)
+        print(f"Bandas escritas en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Optimizador automático de la planificación de pasos del plano frontal.
+
+Busca los tiempos de cambio y las posiciones laterales del ZMP que producen
+una oscilación lateral del CoM periódica y acotada con un periodo de paso
+objetivo, en lugar de ajustarlos a mano como en lipm2d_frontal.py.
+
+Cada candidato se evalúa propagando el estado fase a fase con la matriz de
+transición cerrada del LIPM, Φ(d) = [[cosh, T_c·sinh], [sinh/T_c, cosh]], y
+las derivadas de los residuos respecto a duraciones y ZMP se obtienen de
+forma analítica (dΦ/dd = A·Φ), así que no se ejecuta ninguna simulación
+animada. El ajuste es un Levenberg-Marquardt sobre esos residuos. Con los
+valores por defecto (6 pasos) cada evaluación de residuos cuesta unos 30 µs,
+unos 130-180 µs con el jacobiano, y el ajuste completo unas decenas de ms.
+
+LIPMSimulator solo cambia de apoyo en el primer update() posterior al tiempo
+de cambio, así que una duración continua se alargaría hasta el siguiente
+múltiplo de dt y la oscilación acabaría divergiendo. Tras el ajuste libre
+cada duración se redondea a un número entero de pasos, los ZMP se reajustan
+con esas duraciones fijas y cada cambio se coloca medio paso antes del paso
+en el que debe ocurrir, como en Frontal_Mejorado.scale_schedule.
+
+El resultado es un diccionario con las claves `zmp_y`, `zmp_time_change`,
+`y_dot_0` y `dt`, que se pasa tal cual a LIPMSimulator(**planificacion) o se
+guarda en JSON para `Frontal_Mejorado.py --schedule`.
+"""
+
+import argparse
+import json
+import math
+
+import numpy as np
+
+# Pesos de cada familia de residuos
+PESO_PERIODO = 1.0
+PESO_PERIODICIDAD = 10.0
+PESO_ANCHO = 10.0
+PESO_CENTRO = 3.0
+DURACION_MINIMA = 0.05  # s
+
+
+class OptimizadorFrontal:
+    """
+    Ajuste de duraciones de fase y ZMP laterales para una marcha periódica.
+    """
+
+    def __init__(self, altura=1.2, gravedad=9.8, periodo=0.6, ancho=0.4, n_pasos=6,
+                 zmp_inicial=0.4, y_0_rel=0.0, y_dot_0=0.3, dt=0.02):
+        """
+        Inicializa el problema de optimización.
+
+        Args:
+            altura (float): Altura del péndulo (m)
+            gravedad (float): Aceleración de la gravedad (m/s²)
+            periodo (float): Duración objetivo de cada paso (s)
+            ancho (float): Separación lateral objetivo entre pies (m)
+            n_pasos (int): Número de cambios de apoyo a planificar
+            zmp_inicial (float): ZMP del pie de apoyo inicial (fijo)
+            y_0_rel (float): Posición inicial relativa al ZMP inicial (m)
+            y_dot_0 (float): Velocidad lateral inicial (m/s)
+            dt (float): Paso de tiempo del simulador que ejecutará el plan (s)
+        """
+        self.T_c = math.sqrt(altura / gravedad)
+        self.periodo = periodo
+        self.ancho = ancho
+        self.n = n_pasos
+        self.zmp_inicial = zmp_inicial
+        self.y_0_rel = y_0_rel
+        self.y_dot_0 = y_dot_0
+        self.dt = dt
+        # Matriz de la dinámica: d/dt (y, ẏ) = A · (y, ẏ)
+        self.A = np.array([[0.0, 1.0], [1.0 / self.T_c ** 2, 0.0]])
+
+    def transicion(self, d):
+        """Matriz de transición Φ(d) de una fase de apoyo de duración d."""
+        c = math.cosh(d / self.T_c)
+        s = math.sinh(d / self.T_c)
+        return np.array([[c, self.T_c * s], [s / self.T_c, c]])
+
+    def vector_inicial(self):
+        """Punto de partida: pasos alternos de ancho y periodo objetivo."""
+        duraciones = np.full(self.n, self.periodo)
+        duraciones[0] = 0.5 * self.periodo
+        signos = np.where(np.arange(1, self.n + 1) % 2 == 1, 1.0, 0.0)
+        zmp = self.zmp_inicial + self.ancho * signos
+        return np.concatenate([duraciones, zmp])
+
+    def estados(self, theta, con_jacobiano=True):
+        """
+        Propaga el estado absoluto hasta el final de cada fase.
+
+        Args:
+            theta (array): Duraciones d_0..d_{n-1} seguidas de ZMP z_1..z_n
+            con_jacobiano (bool): Calcular también las derivadas analíticas
+
+        Returns:
+            tuple: (Y, V, J_Y, J_V) con la posición y velocidad absolutas al
+                final de cada fase y sus jacobianos (n, 2n), o None si no se piden
+        """
+        n = self.n
+        d, z = theta[:n], np.concatenate([[self.zmp_inicial], theta[n:]])
+        Y, V = np.empty(n), np.empty(n)
+        J_Y = np.zeros((n, 2 * n)) if con_jacobiano else None
+        J_V = np.zeros((n, 2 * n)) if con_jacobiano else None
+
+        y_prev, v_prev = self.zmp_inicial + self.y_0_rel, self.y_dot_0
+        jy_prev, jv_prev = np.zeros(2 * n), np.zeros(2 * n)
+        for k in range(n):
+            # Propagación escalar (sin arrays) de la fase k
+            c = math.cosh(d[k] / self.T_c)
+            s = math.sinh(d[k] / self.T_c)
+            r_y, r_v = y_prev - z[k], v_prev
+            e_y = c * r_y + self.T_c * s * r_v
+            e_v = s / self.T_c * r_y + c * r_v
+            Y[k], V[k] = z[k] + e_y, e_v
+
+            if con_jacobiano:
+                # r_k depende del estado anterior y de -z_k (z_0 es fijo)
+                phi = np.array([[c, self.T_c * s], [s / self.T_c, c]])
+                jr = np.vstack([jy_prev, jv_prev])
+                if k > 0:
+                    jr[0, n + k - 1] -= 1.0
+                je = phi @ jr
+                je[:, k] += self.A @ (e_y, e_v)
+                if k > 0:
+                    je[0, n + k - 1] += 1.0
+                J_Y[k], J_V[k] = je[0], je[1]
+                jy_prev, jv_prev = J_Y[k], J_V[k]
+            y_prev, v_prev = Y[k], V[k]
+        return Y, V, J_Y, J_V
+
+    def residuos(self, theta, con_jacobiano=True):
+        """
+        Residuos ponderados del problema y su jacobiano.
+
+        - Periodo: d_k - periodo (salvo la fase de arranque).
+        - Periodicidad: el estado se repite cada dos fases.
+        - Ancho: los pies alternan a una distancia `ancho`.
+        - Centro: en cada cambio el CoM está entre los dos pies.
+        """
+        n = self.n
+        Y, V, J_Y, J_V = self.estados(theta, con_jacobiano)
+        d, z = theta[:n], np.concatenate([[self.zmp_inicial], theta[n:]])
+        signos = np.where(np.arange(n) % 2 == 0, 1.0, -1.0)
+
+        partes = [
+            math.sqrt(PESO_PERIODO) * (d[1:] - self.periodo),
+            math.sqrt(PESO_PERIODICIDAD) * (Y[2:] - Y[:-2]),
+            math.sqrt(PESO_PERIODICIDAD) * self.T_c * (V[2:] - V[:-2]),
+            math.sqrt(PESO_ANCHO) * (signos * (z[1:] - z[:-1]) - self.ancho),
+            math.sqrt(PESO_CENTRO) * (Y - 0.5 * (z[:-1] + z[1:])),
+        ]
+        r = np.concatenate(partes)
+        if not con_jacobiano:
+            return r, None
+
+        # Derivadas de los términos que dependen directamente de theta
+        I_d = np.zeros((n, 2 * n))
+        I_d[np.arange(n), np.arange(n)] = 1.0
+        I_z = np.zeros((n + 1, 2 * n))
+        I_z[np.arange(1, n + 1), n + np.arange(n)] = 1.0
+        jacobianos = [
+            math.sqrt(PESO_PERIODO) * I_d[1:],
+            math.sqrt(PESO_PERIODICIDAD) * (J_Y[2:] - J_Y[:-2]),
+            math.sqrt(PESO_PERIODICIDAD) * self.T_c * (J_V[2:] - J_V[:-2]),
+            math.sqrt(PESO_ANCHO) * signos[:, None] * (I_z[1:] - I_z[:-1]),
+            math.sqrt(PESO_CENTRO) * (J_Y - 0.5 * (I_z[:-1] + I_z[1:])),
+        ]
+        return r, np.vstack(jacobianos)
+
+    def optimizar(self, theta=None, iteraciones=200, tolerancia=1e-12, solo_zmp=False):
+        """
+        Ajusta la planificación con Levenberg-Marquardt.
+
+        Args:
+            theta (array): Punto de partida (por defecto, vector_inicial)
+            iteraciones (int): Máximo de iteraciones
+            tolerancia (float): Mejora relativa mínima para continuar
+            solo_zmp (bool): Mantener fijas las duraciones de theta
+
+        Returns:
+            tuple: (theta óptimo, coste final)
+        """
+        theta = self.vector_inicial() if theta is None else np.array(theta, dtype=float)
+        libres = slice(self.n, 2 * self.n) if solo_zmp else slice(0, 2 * self.n)
+        r, J = self.residuos(theta)
+        coste = r @ r
+        amortiguamiento = 1e-3
+        for _ in range(iteraciones):
+            J_libre = J[:, libres]
+            JtJ = J_libre.T @ J_libre
+            gradiente = J_libre.T @ r
+            candidato = theta.copy()
+            candidato[libres] += np.linalg.solve(JtJ + amortiguamiento * np.diag(np.diag(JtJ) + 1e-9), -gradiente)
+            if not solo_zmp:
+                candidato[:self.n] = np.maximum(candidato[:self.n], DURACION_MINIMA)
+            r_c, _ = self.residuos(candidato, con_jacobiano=False)
+            coste_c = r_c @ r_c
+            if coste_c < coste:
+                mejora = (coste - coste_c) / max(coste, 1e-300)
+                theta, coste = candidato, coste_c
+                r, J = self.residuos(theta)
+                amortiguamiento = max(amortiguamiento / 3, 1e-12)
+                if mejora < tolerancia:
+                    break
+            else:
+                amortiguamiento *= 4
+                if amortiguamiento > 1e12:
+                    break
+        return theta, coste
+
+    def pasos_de_fase(self, theta):
+        """Número entero de pasos de dt (al menos uno) de cada fase."""
+        return np.maximum(np.rint(theta[:self.n] / self.dt), 1).astype(int)
+
+    def ajustar_a_rejilla(self, theta):
+        """
+        Redondea las duraciones a múltiplos de dt y reajusta los ZMP.
+
+        Args:
+            theta (array): Solución del ajuste con duraciones continuas
+
+        Returns:
+            tuple: (theta con duraciones múltiplos de dt, coste final)
+        """
+        theta = np.array(theta, dtype=float)
+        theta[:self.n] = self.pasos_de_fase(theta) * self.dt
+        return self.optimizar(theta, solo_zmp=True)
+
+    def planificacion(self, theta):
+        """
+        Convierte theta en los argumentos de LIPMSimulator.
+
+        Las duraciones deben ser múltiplos de dt (ver ajustar_a_rejilla).
+        Cada cambio se coloca medio paso antes del paso en el que ocurre. El
+        último tiempo de cambio solo marca el final de la planificación, como
+        en LIPMSimulator (el último ZMP nunca se abandona).
+        """
+        pasos = np.cumsum(self.pasos_de_fase(theta))
+        pasos = np.append(pasos, pasos[-1] + max(round(self.periodo / self.dt), 1))
+        return {
+            'zmp_y': [self.zmp_inicial] + [float(v) for v in theta[self.n:]],
+            'zmp_time_change': [float((paso - 0.5) * self.dt) for paso in pasos],
+            'y_dot_0': self.y_dot_0,
+            'dt': self.dt,
+        }
+
+
+def optimizar_planificacion(**kwargs):
+    """Atajo: optimiza, ajusta a la rejilla de dt y devuelve (planificación, coste)."""
+    optimizador = OptimizadorFrontal(**kwargs)
+    theta, _ = optimizador.optimizar()
+    theta, coste = optimizador.ajustar_a_rejilla(theta)
+    return optimizador.planificacion(theta), coste
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Optimizador de la planificación de pasos frontal')
+    parser.add_argument('--height', type=float, default=1.2, help='Altura del péndulo (m)')
+    parser.add_argument('--g', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--period', type=float, default=0.6, help='Periodo de paso objetivo (s)')
+    parser.add_argument('--width', type=float, default=0.4, help='Separación lateral entre pies (m)')
+    parser.add_argument('--steps', type=int, default=6, help='Número de cambios de apoyo')
+    parser.add_argument('--y_dot_0', type=float, default=0.3, help='Velocidad lateral inicial (m/s)')
+    parser.add_argument('--dt', type=float, default=0.02, help='Paso de tiempo del simulador (s)')
+    parser.add_argument('--output', default=None, help='Fichero JSON donde guardar la planificación')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    planificacion, coste = optimizar_planificacion(
+        altura=args.height, gravedad=args.g, periodo=args.period, ancho=args.width,
+        n_pasos=args.steps, y_dot_0=args.y_dot_0, dt=args.dt
+    )
+    print(f"Coste final: {coste:.3e}")
+    print(f"zmp_y = {[round(v, 4) for v in planificacion['zmp_y']]}")
+    print(f"zmp_time_change = {[round(v, 4) for v in planificacion['zmp_time_change']]}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(planificacion, f, indent=2)
+        print(f"Planificación guardada en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
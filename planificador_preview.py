@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""
+Planificador de la trayectoria del CoM por control con previsión del ZMP.
+
+Los simuladores solo reproducen una lista fija de ZMP con cambios
+instantáneos. Este planificador toma una referencia de ZMP arbitraria
+(una muestra por dt, tan larga como se quiera) y calcula la trayectoria del
+CoM que la sigue, con el control con previsión de Kajita sobre el modelo
+carro-mesa del LIPM:
+
+    x(k+1) = A·x(k) + B·u(k),   x = [posición, velocidad, aceleración], u = jerk
+    zmp(k) = C·x(k),            C = [1, 0, -T_c²]
+
+El control minimiza el error de ZMP integrado más el jerk, y mira `horizonte`
+segundos hacia delante en la referencia:
+
+    u(k) = -G_i·Σe(i) - G_x·x(k) - Σ_j G_d(j)·zmp_ref(k+j)
+
+Las ganancias salen de la ecuación de Riccati discreta del sistema aumentado
+con el error integrado, resuelta con el algoritmo de doblado (convergencia
+cuadrática, solo numpy). Se calculan una vez por (T_c, dt, horizonte, pesos)
+y quedan en caché; planificar es después lineal en la longitud de la
+referencia: el término de previsión de todos los instantes es una sola
+correlación y el bucle solo hace aritmética escalar.
+"""
+
+import argparse
+import functools
+import time
+from collections import namedtuple
+
+import numpy as np
+
+HORIZONTE = 1.6  # Ventana de previsión (s)
+PESO_ERROR = 1.0  # Peso del error de ZMP integrado
+PESO_JERK = 1e-6  # Peso del jerk
+REPOSO = 2.0  # Tiempo quieto sobre el primer ZMP antes de la referencia (s)
+
+# Trayectoria planificada de un eje: una muestra por dt
+TrayectoriaCoM = namedtuple('TrayectoriaCoM', ['t', 'posicion', 'velocidad', 'aceleracion', 'zmp'])
+
+
+def resolver_riccati(A, B, Q, r, tolerancia=1e-12, max_iteraciones=100):
+    """
+    Solución estabilizante de la ecuación de Riccati discreta
+
+        P = Q + AᵀPA - AᵀPB (r + BᵀPB)⁻¹ BᵀPA
+
+    por el algoritmo de doblado (structure-preserving doubling).
+
+    Args:
+        A (array): Matriz de estado (n, n)
+        B (array): Matriz de entrada (n, 1)
+        Q (array): Peso del estado (n, n)
+        r (float): Peso de la entrada
+        tolerancia (float): Cambio relativo de P para dar por convergido
+        max_iteraciones (int): Máximo de iteraciones de doblado
+
+    Returns:
+        array: P (n, n)
+    """
+    identidad = np.eye(A.shape[0])
+    A_k, G_k, H_k = A.copy(), B @ B.T / r, Q.copy()
+    for _ in range(max_iteraciones):
+        W = np.linalg.inv(identidad + G_k @ H_k)
+        A_W = A_k @ W
+        A_k, G_k, H_nueva = A_W @ A_k, G_k + A_W @ G_k @ A_k.T, H_k + A_k.T @ H_k @ W @ A_k
+        if np.linalg.norm(H_nueva - H_k) <= tolerancia * np.linalg.norm(H_nueva):
+            return H_nueva
+        H_k = H_nueva
+    raise RuntimeError("La ecuación de Riccati no converge")
+
+
+@functools.lru_cache(maxsize=32)
+def ganancias_preview(T_c, dt, n_prevision, peso_error=PESO_ERROR, peso_jerk=PESO_JERK):
+    """
+    Ganancias del control con previsión (cacheadas por argumentos).
+
+    Args:
+        T_c (float): Constante de tiempo del LIPM, sqrt(altura/gravedad)
+        dt (float): Periodo de control (s)
+        n_prevision (int): Muestras de previsión
+        peso_error (float): Peso del error de ZMP integrado
+        peso_jerk (float): Peso del jerk
+
+    Returns:
+        tuple: (G_i, G_x (3,), G_d (n_prevision,)), arrays de solo lectura
+    """
+    A = np.array([[1.0, dt, dt * dt / 2], [0.0, 1.0, dt], [0.0, 0.0, 1.0]])
+    B = np.array([[dt ** 3 / 6], [dt * dt / 2], [dt]])
+    C = np.array([[1.0, 0.0, -T_c ** 2]])
+
+    # Sistema aumentado con el error integrado: estado [e, Δx]
+    A_a = np.block([[np.eye(1), C @ A], [np.zeros((3, 1)), A]])
+    B_a = np.vstack([C @ B, B])
+    Q_a = np.zeros((4, 4))
+    Q_a[0, 0] = peso_error
+    P = resolver_riccati(A_a, B_a, Q_a, peso_jerk)
+
+    S = peso_jerk + float((B_a.T @ P @ B_a)[0, 0])
+    K = (B_a.T @ P @ A_a) / S
+    G_i, G_x = float(K[0, 0]), K[0, 1:].copy()
+
+    # Ganancias de previsión: G_d(j+1) = S⁻¹·Bᵀ·X_j,  X_{j+1} = A_cᵀ·X_j
+    A_c = A_a - B_a @ K
+    X = -A_c.T @ P[:, :1]
+    G_d = np.empty(n_prevision)
+    G_d[0] = -G_i
+    for j in range(1, n_prevision):
+        G_d[j] = float((B_a.T @ X)[0, 0]) / S
+        X = A_c.T @ X
+
+    G_x.setflags(write=False)
+    G_d.setflags(write=False)
+    return G_i, G_x, G_d
+
+
+def referencia_escalonada(zmp, tiempos_cambio, dt, t_max, reposo=0.0):
+    """
+    Referencia de ZMP con cambios instantáneos, como la que recorren los
+    simuladores: zmp[i] hasta tiempos_cambio[i] y el último después.
+
+    Args:
+        zmp (list): Posiciones de ZMP
+        tiempos_cambio (list): Instantes de cambio (s), crecientes
+        dt (float): Periodo de muestreo (s)
+        t_max (float): Duración (s), sin contar el reposo
+        reposo (float): Tiempo quieto sobre zmp[0] añadido al principio (s);
+            los cambios y t_max se retrasan lo mismo
+
+    Returns:
+        array: Una muestra de ZMP por dt
+    """
+    t = np.arange(int(round((t_max + reposo) / dt))) * dt
+    indices = np.searchsorted(np.asarray(tiempos_cambio, dtype=float) + reposo, t, side='left')
+    return np.asarray(zmp, dtype=float)[np.minimum(indices, len(zmp) - 1)]
+
+
+class PlanificadorPreview:
+    """
+    Planificador de la trayectoria del CoM que sigue una referencia de ZMP.
+    """
+
+    def __init__(self, modelo, dt=0.02, horizonte=HORIZONTE, peso_error=PESO_ERROR, peso_jerk=PESO_JERK):
+        """
+        Inicializa el planificador (las ganancias se calculan en el primer uso).
+
+        Args:
+            modelo (ModeloLIPM): Modelo con la altura y la gravedad
+            dt (float): Periodo de control (s)
+            horizonte (float): Ventana de previsión (s)
+            peso_error (float): Peso del error de ZMP integrado
+            peso_jerk (float): Peso del jerk
+        """
+        self.modelo = modelo
+        self.dt = dt
+        self.n_prevision = max(1, int(round(horizonte / dt)))
+        self.peso_error = peso_error
+        self.peso_jerk = peso_jerk
+
+    def ganancias(self):
+        """Ganancias para los parámetros actuales del modelo (de la caché si ya existen)."""
+        return ganancias_preview(self.modelo.T_c, self.dt, self.n_prevision,
+                                 self.peso_error, self.peso_jerk)
+
+    def planificar(self, zmp_ref, posicion_0=None, velocidad_0=0.0, aceleracion_0=0.0):
+        """
+        Calcula la trayectoria del CoM de un eje.
+
+        Args:
+            zmp_ref (array): Referencia de ZMP, una muestra por dt; pasado el
+                final se mantiene el último valor
+            posicion_0 (float): Posición inicial del CoM (por defecto, sobre
+                el primer ZMP)
+            velocidad_0 (float): Velocidad inicial (m/s)
+            aceleracion_0 (float): Aceleración inicial (m/s²)
+
+        Returns:
+            TrayectoriaCoM: Trayectoria planificada y ZMP resultante
+        """
+        G_i, G_x, G_d = self.ganancias()
+        ref = np.asarray(zmp_ref, dtype=float)
+        n, n_prevision = len(ref), len(G_d)
+
+        # Término de previsión de todos los instantes: Σ_j G_d(j)·ref(k+1+j)
+        extendida = np.concatenate([ref[1:], np.full(n_prevision, ref[-1])])
+        prevision = np.correlate(extendida, G_d, mode='valid')[:n].tolist()
+
+        dt = self.dt
+        dt2, dt3 = dt * dt / 2, dt ** 3 / 6
+        T_c2 = self.modelo.T_c ** 2
+        g_i = G_i
+        g_x0, g_x1, g_x2 = (float(g) for g in G_x)
+
+        x = ref[0] if posicion_0 is None else posicion_0
+        v, a = velocidad_0, aceleracion_0
+        suma_error = 0.0
+        posiciones, velocidades, aceleraciones, zmps = [], [], [], []
+        for zmp_k, prevision_k in zip(ref.tolist(), prevision):
+            zmp = x - T_c2 * a
+            posiciones.append(x)
+            velocidades.append(v)
+            aceleraciones.append(a)
+            zmps.append(zmp)
+
+            suma_error += zmp - zmp_k
+            u = -g_i * suma_error - (g_x0 * x + g_x1 * v + g_x2 * a) - prevision_k
+            x, v, a = x + dt * v + dt2 * a + dt3 * u, v + dt * a + dt2 * u, a + dt * u
+
+        return TrayectoriaCoM(np.arange(n) * dt, np.array(posiciones), np.array(velocidades),
+                              np.array(aceleraciones), np.array(zmps))
+
+    def planificar_xy(self, zmp_ref_x, zmp_ref_y, **iniciales):
+        """
+        Planifica los dos ejes horizontales (son independientes en el LIPM).
+
+        Args:
+            zmp_ref_x (array): Referencia de ZMP sagital
+            zmp_ref_y (array): Referencia de ZMP lateral
+            **iniciales: Estado inicial común a los dos ejes (ver planificar)
+
+        Returns:
+            tuple: (TrayectoriaCoM en x, TrayectoriaCoM en y)
+        """
+        return self.planificar(zmp_ref_x, **iniciales), self.planificar(zmp_ref_y, **iniciales)
+
+
+def _lista_floats(texto):
+    """Convierte "a,b,c" en una lista de floats."""
+    return [float(valor) for valor in texto.split(',') if valor]
+
+
+def parse_arguments():
+    """Parsea argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Planificador del CoM por control con previsión del ZMP')
+    parser.add_argument('--altura', type=float, default=1.2, help='Altura del centro de masa (m)')
+    parser.add_argument('--g', type=float, default=9.8, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--dt', type=float, default=0.02, help='Periodo de control (s)')
+    parser.add_argument('--horizonte', type=float, default=HORIZONTE, help='Ventana de previsión (s)')
+    parser.add_argument('--t_max', type=float, default=10.0, help='Duración de la referencia (s)')
+    parser.add_argument('--zmp', type=_lista_floats, default=[0.4, 0.8, 0.4, 0.8, 0.4, 0.8, 0.4],
+                        help='Posiciones de ZMP ("a,b,...")')
+    parser.add_argument('--tiempos', type=_lista_floats, default=[0.4, 1, 2, 3.5, 4, 7.4, 10.0],
+                        help='Tiempos de cambio de ZMP ("a,b,...")')
+    parser.add_argument('--reposo', type=float, default=REPOSO,
+                        help='Tiempo quieto sobre el primer ZMP antes de la referencia (s)')
+    parser.add_argument('--grafica', action='store_true', help='Dibujar referencia, ZMP y CoM')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    from Sagital_Mejorado import ModeloLIPM
+
+    args = parse_arguments()
+    planificador = PlanificadorPreview(ModeloLIPM(args.altura, args.g), dt=args.dt,
+                                       horizonte=args.horizonte)
+    # Sin reposo la previsión ve el primer cambio (a 0.4 s) cuando el CoM aún
+    # está parado, y el ZMP se aleja metros para acelerarlo a tiempo
+    referencia = referencia_escalonada(args.zmp, args.tiempos, args.dt, args.t_max, args.reposo)
+
+    inicio = time.perf_counter()
+    planificador.ganancias()
+    t_ganancias = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    trayectoria = planificador.planificar(referencia)
+    t_plan = time.perf_counter() - inicio
+
+    # El error restante está en los escalones: el ZMP del carro-mesa no salta
+    error = np.abs(trayectoria.zmp - referencia)
+    print(f"Ganancias: {1e3 * t_ganancias:.2f} ms (una vez por altura, dt y horizonte)")
+    print(f"Planificación de {len(referencia)} muestras ({args.t_max + args.reposo:.1f} s): "
+          f"{1e3 * t_plan:.2f} ms")
+    print(f"Error de ZMP: medio {error.mean():.4f} m, máximo {error.max():.4f} m")
+
+    if args.grafica:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(10, 4))
+        ax.plot(trayectoria.t, referencia, 'k--', label='ZMP referencia')
+        ax.plot(trayectoria.t, trayectoria.zmp, 'g-', label='ZMP resultante')
+        ax.plot(trayectoria.t, trayectoria.posicion, 'b-', label='CoM')
+        ax.set_xlabel('Tiempo (s)')
+        ax.set_ylabel('Posición (m)')
+        ax.set_title('Control con previsión del ZMP')
+        ax.grid(True)
+        ax.legend()
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
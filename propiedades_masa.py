@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+"""
+Propiedades de masa de Boby a partir de sus piezas STL.
+
+HEIGHT = 1.2 en los simuladores sale del apellido del autor (ver el README),
+no del robot. Este script calcula el volumen, el centro de masas y el tensor
+de inercia de cada pieza de Boby/STLs, los coloca según la pose de montaje
+(ángulos de las dos caderas) y devuelve la altura del CoM sobre el suelo y
+su T_c = sqrt(h / g), listos para ModeloLIPM y LIPMSimulator.
+
+Integrales de volumen: cada triángulo forma con el origen un tetraedro con
+volumen con signo det[a, b, c] / 6. Sumando sobre la malla cerrada, el
+volumen, el primer momento ∫p dV = Σ det·(a+b+c)/24 y el segundo momento
+∫p·pᵀ dV = Σ det·(aaᵀ + bbᵀ + ccᵀ + ssᵀ)/120 (s = a+b+c) salen de unas pocas
+operaciones vectorizadas sobre todos los triángulos a la vez. Las integrales
+de cada malla se guardan en la caché de stl_malla (por hash del STL) y se
+trasladan a la pose de montaje de forma analítica, sin tocar los vértices.
+
+Masa de cada pieza: densidad del material × fracción maciza efectiva
+(relleno y perímetros de la impresión) × volumen. Los dos servos 9g se
+añaden como masas puntuales; la placa y la alimentación van fuera del robot.
+
+Ejes del montaje: X hacia delante, Y hacia la izquierda, Z hacia arriba,
+origen en el suelo bajo el centro de la pelvis. Las medidas de los STL
+están en mm; los resultados, en unidades SI.
+
+Ejemplo:
+    python propiedades_masa.py --relleno Pelvis=0.3 --caderas 10 -10
+"""
+
+import argparse
+import functools
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from stl_malla import cargar_pieza, directorio_cache
+
+MM = 1e-3  # Metros por unidad de los STL
+DENSIDAD_PLA = 1240.0  # kg/m³
+G = 9.8  # m/s²
+
+# Fracción maciza efectiva por pieza: las piezas finas son casi solo perímetro
+RELLENO = {'Pelvis': 0.8, 'Tapa': 1.0, 'Pierna': 0.9, 'Pie': 0.6}
+
+MASA_SERVO = 0.009  # kg, servo micro 9g (Boby/MaterialesMontaje.txt)
+
+# Puntos de montaje en el sistema de cada STL (mm)
+CADERA_PELVIS = (32.5, 4.0, 8.0)  # Eje del servo en el lateral de la pelvis (estimado de las fotos)
+TOBILLO_PIE = (-9.0, 0.0, 8.86)  # Eje del tobillo en la cara de la orejeta del pie que apoya en la pierna
+SERVO_PELVIS = (19.0, -2.0, 8.0)  # Centro del cuerpo del servo izquierdo
+
+# Integrales de volumen: volumen, primer momento (3) y segundo momento (3x3)
+Integrales = namedtuple('Integrales', ['volumen', 'primer_momento', 'segundo_momento'])
+
+# Resultado: masa (kg), CoM (m), inercia respecto al CoM (kg·m²) y volumen (m³)
+PropiedadesMasa = namedtuple('PropiedadesMasa', ['masa', 'centro_masas', 'inercia', 'volumen'])
+
+# Pieza colocada: world = rotacion @ p + traslacion (p en mm del STL, world en m)
+Componente = namedtuple('Componente', ['nombre', 'pieza', 'rotacion', 'traslacion'])
+
+# Memoria de integrales por clave de caché de la malla
+_INTEGRALES = {}
+
+
+def integrales_triangulos(triangulos):
+    """
+    Integrales de volumen de una malla cerrada con sumas de tetraedros con signo.
+
+    Args:
+        triangulos (np.ndarray): Vértices de cada cara (F, 3, 3), antihorarios
+            vistos desde fuera
+
+    Returns:
+        Integrales: Volumen, ∫p dV y ∫p·pᵀ dV en las unidades de la malla
+    """
+    # Una fila contigua por coordenada: las operaciones van sobre vectores de F elementos
+    coordenadas = np.ascontiguousarray(np.reshape(triangulos, (-1, 9)).T, dtype=float)
+    a, b, c = coordenadas[0:3], coordenadas[3:6], coordenadas[6:9]
+    det = (a[0] * (b[1] * c[2] - b[2] * c[1]) + a[1] * (b[2] * c[0] - b[0] * c[2])
+           + a[2] * (b[0] * c[1] - b[1] * c[0]))
+    s = a + b + c
+
+    segundo = np.empty((3, 3))
+    for i in range(3):
+        for j in range(i, 3):
+            segundo[i, j] = segundo[j, i] = det @ (a[i] * a[j] + b[i] * b[j] + c[i] * c[j] + s[i] * s[j])
+    return Integrales(det.sum() / 6, s @ det / 24, segundo / 120)
+
+
+def integrales_malla(malla):
+    """
+    Integrales de volumen de una MallaSTL, en caché por hash del STL.
+
+    Args:
+        malla (MallaSTL): Malla cerrada
+
+    Returns:
+        Integrales: En mm, mm⁴ y mm⁵
+    """
+    if malla.clave is None:
+        return integrales_triangulos(malla.triangulos)
+    if malla.clave in _INTEGRALES:
+        return _INTEGRALES[malla.clave]
+
+    fichero = os.path.join(directorio_cache(), f'{malla.clave}-masa.npy')
+    try:
+        valores = np.load(fichero)
+        integrales = Integrales(valores[0], valores[1:4], valores[4:].reshape(3, 3))
+    except (OSError, ValueError):
+        integrales = integrales_triangulos(malla.triangulos)
+        try:
+            np.save(fichero, np.concatenate([[integrales.volumen], integrales.primer_momento,
+                                             integrales.segundo_momento.ravel()]))
+        except OSError:
+            pass
+    _INTEGRALES[malla.clave] = integrales
+    return integrales
+
+
+def transformar_integrales(integrales, rotacion, traslacion, escala=MM):
+    """
+    Integrales de la pieza colocada en world = rotacion @ (escala·p) + traslacion.
+
+    Válido para cualquier rotación ortogonal, también con reflexión (piezas
+    en espejo): el volumen no cambia y los momentos se transforman como
+    ∫q dV = R·m₁ + V·t y ∫q·qᵀ dV = R·M₂·Rᵀ + (R·m₁)·tᵀ + t·(R·m₁)ᵀ + V·t·tᵀ.
+
+    Args:
+        integrales (Integrales): Integrales en el sistema del STL
+        rotacion (np.ndarray): Matriz ortogonal 3x3
+        traslacion (np.ndarray): Traslación (m)
+        escala (float): Metros por unidad del STL
+
+    Returns:
+        Integrales: En m³, m⁴ y m⁵
+    """
+    volumen = integrales.volumen * escala ** 3
+    primer = rotacion @ integrales.primer_momento * escala ** 4
+    segundo = rotacion @ integrales.segundo_momento @ rotacion.T * escala ** 5
+    t = np.asarray(traslacion, dtype=float)
+    segundo = segundo + np.outer(primer, t) + np.outer(t, primer) + volumen * np.outer(t, t)
+    return Integrales(volumen, primer + volumen * t, segundo)
+
+
+def propiedades(integrales, densidad):
+    """
+    Masa, CoM e inercia de un sólido homogéneo a partir de sus integrales.
+
+    Args:
+        integrales (Integrales): Integrales en unidades SI
+        densidad (float): kg/m³
+
+    Returns:
+        PropiedadesMasa: Inercia respecto al CoM
+    """
+    masa = densidad * integrales.volumen
+    centro = integrales.primer_momento / integrales.volumen
+    covarianza = densidad * integrales.segundo_momento - masa * np.outer(centro, centro)
+    inercia = np.trace(covarianza) * np.eye(3) - covarianza
+    return PropiedadesMasa(masa, centro, inercia, integrales.volumen)
+
+
+def combinar(partes):
+    """
+    Propiedades del conjunto de varias partes (teorema de Steiner).
+
+    Args:
+        partes (list): PropiedadesMasa de cada parte, en el mismo sistema
+
+    Returns:
+        PropiedadesMasa: Propiedades del conjunto
+    """
+    masas = np.array([p.masa for p in partes])
+    centros = np.array([p.centro_masas for p in partes])
+    masa = masas.sum()
+    centro = masas @ centros / masa
+    d = centros - centro
+    traslado = np.einsum('n,ni,ni->', masas, d, d) * np.eye(3) - np.einsum('n,ni,nj->ij', masas, d, d)
+    inercia = sum(p.inercia for p in partes) + traslado
+    return PropiedadesMasa(masa, centro, inercia, sum(p.volumen for p in partes))
+
+
+def masa_puntual(masa, posicion):
+    """PropiedadesMasa de una masa puntual (kg, m)."""
+    return PropiedadesMasa(masa, np.asarray(posicion, dtype=float), np.zeros((3, 3)), 0.0)
+
+
+def longitud_pierna():
+    """
+    Distancia entre los ejes de cadera y tobillo medida en Pierna.stl (m).
+
+    La pierna es una barra a lo largo de -Y con los extremos redondeados
+    (radio igual a medio ancho) centrados en los dos agujeros.
+    """
+    (x_min, y_min, _), (x_max, y_max, _) = cargar_pieza('Pierna').limites.astype(float)
+    return ((y_max - y_min) - (x_max - x_min)) * MM
+
+
+def grosor_pierna():
+    """Grosor de la barra de la pierna en Pierna.stl (m)."""
+    limites = cargar_pieza('Pierna').limites.astype(float)
+    return (limites[1, 2] - limites[0, 2]) * MM
+
+
+def rotacion_cabeceo(angulo):
+    """
+    Rotación alrededor del eje Y del montaje.
+
+    Args:
+        angulo (float): Grados; positivo con la cadera por delante del tobillo
+            (pie hacia atrás), como θ en boby_tabla.py
+
+    Returns:
+        np.ndarray: Matriz 3x3
+    """
+    a = math.radians(angulo)
+    return np.array([[math.cos(a), 0.0, math.sin(a)],
+                     [0.0, 1.0, 0.0],
+                     [-math.sin(a), 0.0, math.cos(a)]])
+
+
+# Orientación de cada STL en el montaje (lado izquierdo, de pie)
+ROTACION_PELVIS = np.array([[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])  # Tapa hacia delante
+ROTACION_PIERNA = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 0.0]])  # -Y del STL hacia abajo
+ROTACION_PIE = np.array([[0.0, 1.0, 0.0], [-1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])  # Planta hacia dentro
+ESPEJO = np.diag([1.0, -1.0, 1.0])  # Lado izquierdo -> derecho
+
+
+def montaje_boby(caderas=(0.0, 0.0)):
+    """
+    Piezas y servos de Boby colocados para unos ángulos de cadera.
+
+    Los pies giran libres en el tobillo y se mantienen planos; la altura de
+    la cadera se ajusta para que la planta más baja toque el suelo (Z = 0).
+
+    Args:
+        caderas (tuple): Ángulos de las piernas izquierda y derecha respecto
+            a la vertical (grados, positivo con la cadera por delante del tobillo)
+
+    Returns:
+        tuple: (componentes, servos) con una lista de Componente y una lista
+               de posiciones (m) de los servos
+    """
+    longitud = longitud_pierna()
+    tobillo_pie = np.array(TOBILLO_PIE) * MM
+    cadera_pelvis = np.array(CADERA_PELVIS) * MM
+    altura_cadera = tobillo_pie[2] + longitud * max(math.cos(math.radians(a)) for a in caderas)
+
+    # Pelvis y tapa: el eje del servo izquierdo cae en (0, Y_cadera, altura_cadera)
+    cadera = np.array([0.0, cadera_pelvis[0], altura_cadera])
+    traslacion_pelvis = cadera - ROTACION_PELVIS @ cadera_pelvis
+    componentes = [Componente('Pelvis', 'Pelvis', ROTACION_PELVIS, traslacion_pelvis),
+                   Componente('Tapa', 'Tapa', ROTACION_PELVIS, traslacion_pelvis)]
+    servo = ROTACION_PELVIS @ (np.array(SERVO_PELVIS) * MM) + traslacion_pelvis
+    servos = [servo, ESPEJO @ servo]
+
+    lados = (('izquierda', 'izquierdo', caderas[0], np.eye(3)), ('derecha', 'derecho', caderas[1], ESPEJO))
+    for pierna, pie, angulo, espejo in lados:
+        cabeceo = rotacion_cabeceo(angulo)
+        tobillo = cadera + cabeceo @ np.array([0.0, 0.0, -longitud])
+        # La orejeta del pie apoya en la cara exterior de la pierna
+        tobillo[1] += grosor_pierna()
+        componentes.append(Componente(f'Pierna {pierna}', 'Pierna', espejo @ cabeceo @ ROTACION_PIERNA,
+                                      espejo @ cadera))
+        componentes.append(Componente(f'Pie {pie}', 'Pie', espejo @ ROTACION_PIE,
+                                      espejo @ (tobillo - ROTACION_PIE @ tobillo_pie)))
+    return componentes, servos
+
+
+@functools.lru_cache(maxsize=64)
+def desglose_boby(caderas=(0.0, 0.0), rellenos=(), densidad=DENSIDAD_PLA, masa_servo=MASA_SERVO):
+    """
+    Propiedades de masa de cada componente de Boby (en caché por argumentos).
+
+    Args:
+        caderas (tuple): Ángulos de cadera izquierdo y derecho (grados)
+        rellenos (tuple): Pares (pieza, fracción maciza) que sustituyen a RELLENO
+        densidad (float): Densidad del material (kg/m³)
+        masa_servo (float): Masa de cada servo (kg)
+
+    Returns:
+        dict: PropiedadesMasa por nombre de componente
+    """
+    relleno = dict(RELLENO, **dict(rellenos))
+    componentes, servos = montaje_boby(caderas)
+    partes = {}
+    for componente in componentes:
+        integrales = transformar_integrales(integrales_malla(cargar_pieza(componente.pieza)),
+                                            componente.rotacion, componente.traslacion)
+        partes[componente.nombre] = propiedades(integrales, densidad * relleno[componente.pieza])
+    if masa_servo > 0:
+        partes['Servo izquierdo'] = masa_puntual(masa_servo, servos[0])
+        partes['Servo derecho'] = masa_puntual(masa_servo, servos[1])
+    return partes
+
+
+def propiedades_boby(caderas=(0.0, 0.0), rellenos=(), densidad=DENSIDAD_PLA, masa_servo=MASA_SERVO):
+    """
+    Propiedades de masa de Boby completo en una pose.
+
+    Args:
+        caderas (tuple): Ángulos de cadera izquierdo y derecho (grados)
+        rellenos (tuple): Pares (pieza, fracción maciza) que sustituyen a RELLENO
+        densidad (float): Densidad del material (kg/m³)
+        masa_servo (float): Masa de cada servo (kg)
+
+    Returns:
+        PropiedadesMasa: CoM en el sistema del montaje (Z sobre el suelo)
+    """
+    caderas = tuple(float(a) for a in caderas)
+    rellenos = tuple(sorted(dict(rellenos).items()))
+    return combinar(list(desglose_boby(caderas, rellenos, densidad, masa_servo).values()))
+
+
+def parametros_lipm(gravedad=G, **kwargs):
+    """
+    Altura del CoM de Boby y su T_c para el LIPM.
+
+    Args:
+        gravedad (float): Aceleración de la gravedad (m/s²)
+        **kwargs: Argumentos de propiedades_boby (pose, rellenos, ...)
+
+    Returns:
+        tuple: (altura (m), T_c (s))
+    """
+    altura = float(propiedades_boby(**kwargs).centro_masas[2])
+    return altura, math.sqrt(altura / gravedad)
+
+
+def modelo_boby(gravedad=G, **kwargs):
+    """ModeloLIPM sagital con la altura del CoM de Boby."""
+    from Sagital_Mejorado import ModeloLIPM
+
+    altura, _ = parametros_lipm(gravedad, **kwargs)
+    return ModeloLIPM(altura=altura, gravedad=gravedad)
+
+
+def simulador_frontal_boby(g=G, caderas=(0.0, 0.0), **kwargs):
+    """LIPMSimulator frontal con la altura del CoM de Boby; kwargs van al simulador."""
+    from Frontal_Mejorado import LIPMSimulator
+
+    altura, _ = parametros_lipm(g, caderas=caderas)
+    return LIPMSimulator(height=altura, g=g, **kwargs)
+
+
+def malla_esfera(triangulos, radio=1.0):
+    """
+    Esfera triangulada (latitud-longitud) con unos `triangulos` aproximados.
+
+    Sirve para medir el coste del cálculo con mallas grandes y comprobarlo
+    con los valores exactos (V = 4/3·π·r³, I = 2/5·m·r²).
+
+    Returns:
+        np.ndarray: Vértices de cada cara (F, 3, 3), orientados hacia fuera
+    """
+    n = max(int(math.sqrt(triangulos / 2)), 3)
+    theta = np.linspace(0, np.pi, n + 1)
+    phi = np.linspace(0, 2 * np.pi, n + 1)
+    th, ph = np.meshgrid(theta, phi, indexing='ij')
+    p = radio * np.stack([np.sin(th) * np.cos(ph), np.sin(th) * np.sin(ph), np.cos(th)], axis=-1)
+    a, b, c, d = p[:-1, :-1], p[1:, :-1], p[1:, 1:], p[:-1, 1:]
+    return np.concatenate([np.stack([a, b, c], axis=-2).reshape(-1, 3, 3),
+                           np.stack([a, c, d], axis=-2).reshape(-1, 3, 3)])
+
+
+def _relleno(texto):
+    """Convierte "Pieza=fracción" en un par (pieza, fracción)."""
+    pieza, _, fraccion = texto.partition('=')
+    if pieza not in RELLENO:
+        raise argparse.ArgumentTypeError(f"pieza desconocida '{pieza}' ({', '.join(RELLENO)})")
+    return pieza, float(fraccion)
+
+
+def parse_arguments():
+    """Parsea los argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Propiedades de masa de Boby a partir de sus STL')
+    parser.add_argument('--caderas', type=float, nargs=2, default=(0.0, 0.0), metavar=('IZQ', 'DER'),
+                        help='Ángulos de las piernas respecto a la vertical (grados, + con el pie atrás)')
+    parser.add_argument('--densidad', type=float, default=DENSIDAD_PLA, help='Densidad del material (kg/m³)')
+    parser.add_argument('--relleno', type=_relleno, action='append', default=[],
+                        help='Fracción maciza de una pieza, p. ej. Pelvis=0.3 (repetible)')
+    parser.add_argument('--masa_servo', type=float, default=MASA_SERVO, help='Masa de cada servo (kg)')
+    parser.add_argument('--gravedad', type=float, default=G, help='Aceleración de la gravedad (m/s²)')
+    parser.add_argument('--esfera', type=int, default=100000,
+                        help='Triángulos de la esfera de prueba de rendimiento (0 para omitirla)')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    import time
+
+    args = parse_arguments()
+    opciones = dict(caderas=tuple(args.caderas), rellenos=tuple(args.relleno),
+                    densidad=args.densidad, masa_servo=args.masa_servo)
+
+    inicio = time.perf_counter()
+    total = propiedades_boby(**opciones)
+    duracion = (time.perf_counter() - inicio) * 1000
+    partes = desglose_boby(opciones['caderas'], tuple(sorted(dict(args.relleno).items())),
+                           args.densidad, args.masa_servo)
+
+    print(f"{'componente':<16} {'masa (g)':>9}   CoM (mm)")
+    for nombre, parte in partes.items():
+        print(f"{nombre:<16} {parte.masa * 1000:>9.2f}   {np.round(parte.centro_masas * 1000, 1).tolist()}")
+    print(f"{'Boby':<16} {total.masa * 1000:>9.2f}   {np.round(total.centro_masas * 1000, 1).tolist()}")
+    print(f"Inercia respecto al CoM (g·cm²):\n{np.round(total.inercia * 1e7, 1)}")
+
+    altura, T_c = parametros_lipm(args.gravedad, **opciones)
+    print(f"Longitud de pierna (STL): {longitud_pierna() * 1000:.1f} mm")
+    print(f"Altura del CoM: {altura * 1000:.1f} mm, T_c = {T_c * 1000:.1f} ms "
+          f"(primer cálculo {duracion:.1f} ms)")
+
+    if args.esfera:
+        triangulos = malla_esfera(args.esfera)
+        integrales_triangulos(triangulos)  # Calentamiento
+        inicio = time.perf_counter()
+        integrales = integrales_triangulos(triangulos)
+        duracion = (time.perf_counter() - inicio) * 1000
+        esfera = propiedades(integrales, 1.0)
+        print(f"Esfera de {len(triangulos)} triángulos: {duracion:.1f} ms, volumen "
+              f"{integrales.volumen / (4 / 3 * math.pi) - 1:+.1e} e inercia "
+              f"{esfera.inercia[0, 0] / (0.4 * esfera.masa) - 1:+.1e} respecto a los valores exactos")
+
+
+if __name__ == "__main__":
+    main()
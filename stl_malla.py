@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+"""
+Lectura de las mallas STL de Boby (Boby/STLs) para el resto de herramientas.
+
+Los STL binarios se proyectan en memoria con np.memmap y sus registros de
+50 bytes (normal, tres vértices y atributo) se ven como un array estructurado
+de NumPy sin copiarlos. Si el fichero es STL ASCII se usa un analizador de
+texto que devuelve el mismo array estructurado.
+
+MallaSTL guarda la malla indexada: vértices sin duplicar, caras como índices
+a esos vértices y normales por cara. Para dibujar ofrece un contorno
+diezmado en cualquiera de los planos principales (envolvente convexa de la
+proyección, simplificada a un número máximo de puntos).
+
+La malla procesada se guarda en disco en un .npz cuyo nombre es el hash del
+fichero STL, de modo que un STL modificado se vuelve a procesar solo, y se
+mantiene además en memoria durante el proceso. El directorio de la caché es
+~/.cache/lipm/stl o el indicado en la variable de entorno LIPM_CACHE.
+
+Las coordenadas se devuelven en las unidades del STL (mm en los de Boby).
+
+Ejemplo:
+    python stl_malla.py Boby/STLs/*.stl --plano xz --puntos 24
+"""
+
+import argparse
+import hashlib
+import os
+import time
+import zipfile
+
+import numpy as np
+
+# Cabecera de 80 bytes + número de triángulos (u32) y registros de 50 bytes
+CABECERA_STL = 80
+DTYPE_TRIANGULO = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('atributo', '<u2'),
+])
+
+# Carpeta con las piezas de Boby
+DIRECTORIO_STL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Boby', 'STLs')
+
+# Cambiar al modificar el contenido de los .npz de la caché
+VERSION_CACHE = 1
+
+# Ejes de cada plano de proyección
+PLANOS = {'xy': (0, 1), 'xz': (0, 2), 'yz': (1, 2)}
+
+# Mallas ya cargadas en este proceso, por hash del fichero
+_MALLAS = {}
+
+
+def ruta_pieza(nombre):
+    """Ruta del STL de una pieza de Boby ('Pie', 'Pierna', 'Pelvis' o 'Tapa')."""
+    return os.path.join(DIRECTORIO_STL, f'{nombre}.stl')
+
+
+def es_binario(ruta):
+    """
+    Indica si un STL es binario.
+
+    Algunos exportadores escriben "solid" al principio de la cabecera binaria,
+    así que la decisión se toma por el tamaño: un STL binario mide exactamente
+    84 + 50 * n bytes, con n el contador de la cabecera.
+
+    Args:
+        ruta (str): Ruta del fichero STL
+
+    Returns:
+        bool: True si es binario, False si es ASCII
+    """
+    tamaño = os.path.getsize(ruta)
+    if tamaño < CABECERA_STL + 4:
+        return False
+    with open(ruta, 'rb') as f:
+        f.seek(CABECERA_STL)
+        n = int(np.frombuffer(f.read(4), '<u4')[0])
+    return tamaño == CABECERA_STL + 4 + n * DTYPE_TRIANGULO.itemsize
+
+
+def leer_binario(ruta):
+    """
+    Proyecta un STL binario en memoria como array estructurado (sin copia).
+
+    Args:
+        ruta (str): Ruta del fichero STL binario
+
+    Returns:
+        np.ndarray: Registros DTYPE_TRIANGULO (np.memmap de solo lectura)
+    """
+    with open(ruta, 'rb') as f:
+        f.seek(CABECERA_STL)
+        n = int(np.frombuffer(f.read(4), '<u4')[0])
+    if n == 0:
+        # mmap no admite proyecciones vacías
+        return np.empty(0, dtype=DTYPE_TRIANGULO)
+    return np.memmap(ruta, dtype=DTYPE_TRIANGULO, mode='r', offset=CABECERA_STL + 4, shape=(n,))
+
+
+def leer_ascii(ruta):
+    """
+    Lee un STL ASCII al mismo array estructurado que leer_binario.
+
+    Args:
+        ruta (str): Ruta del fichero STL ASCII
+
+    Returns:
+        np.ndarray: Registros DTYPE_TRIANGULO
+    """
+    with open(ruta, 'rb') as f:
+        palabras = np.array(f.read().lower().split())
+
+    # Los tres números que siguen a cada "normal" y a cada "vertex"
+    siguientes = np.arange(1, 4)
+    normales = palabras[np.flatnonzero(palabras == b'normal')[:, None] + siguientes].astype(np.float32)
+    vertices = palabras[np.flatnonzero(palabras == b'vertex')[:, None] + siguientes].astype(np.float32)
+    if len(vertices) != 3 * len(normales):
+        raise ValueError(f"{ruta}: STL ASCII con {len(normales)} facetas y {len(vertices)} vértices")
+
+    triangulos = np.zeros(len(normales), dtype=DTYPE_TRIANGULO)
+    triangulos['normal'] = normales
+    triangulos['vertices'] = vertices.reshape(-1, 3, 3)
+    return triangulos
+
+
+def leer_stl(ruta):
+    """
+    Lee los triángulos de un STL binario o ASCII.
+
+    Args:
+        ruta (str): Ruta del fichero STL
+
+    Returns:
+        np.ndarray: Registros DTYPE_TRIANGULO
+    """
+    return leer_binario(ruta) if es_binario(ruta) else leer_ascii(ruta)
+
+
+def hash_fichero(ruta, bloque=1 << 20):
+    """Hash SHA-1 del contenido de un fichero (hexadecimal)."""
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(bloque), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def directorio_cache():
+    """Directorio de la caché de mallas procesadas."""
+    base = os.environ.get('LIPM_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'lipm'))
+    return os.path.join(base, 'stl')
+
+
+def envolvente_convexa(puntos):
+    """
+    Envolvente convexa de puntos 2D (cadena monótona de Andrew).
+
+    Args:
+        puntos (np.ndarray): Puntos (n, 2)
+
+    Returns:
+        np.ndarray: Vértices de la envolvente (k, 2) en sentido antihorario
+    """
+    puntos = np.unique(np.asarray(puntos, dtype=float), axis=0)  # Ordenados por x y luego y
+    if len(puntos) < 3:
+        return puntos
+
+    def cadena(ordenados):
+        resultado = []
+        for p in ordenados:
+            while len(resultado) >= 2:
+                (ax, ay), (bx, by) = resultado[-2], resultado[-1]
+                if (bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax) > 0:
+                    break
+                resultado.pop()
+            resultado.append(p)
+        return resultado[:-1]
+
+    lista = puntos.tolist()
+    return np.array(cadena(lista) + cadena(lista[::-1]))
+
+
+def diezmar_contorno(contorno, max_puntos):
+    """
+    Simplifica un contorno cerrado quitando los vértices que menos área aportan.
+
+    Es el criterio de Visvalingam: en cada iteración se elimina el vértice
+    cuyo triángulo con sus dos vecinos tiene menor área.
+
+    Args:
+        contorno (np.ndarray): Vértices del contorno cerrado (k, 2)
+        max_puntos (int): Número máximo de vértices del resultado (>= 3)
+
+    Returns:
+        np.ndarray: Contorno simplificado (min(k, max_puntos), 2)
+    """
+    contorno = np.asarray(contorno, dtype=float)
+    max_puntos = max(int(max_puntos), 3)
+    while len(contorno) > max_puntos:
+        anterior = np.roll(contorno, 1, axis=0)
+        siguiente = np.roll(contorno, -1, axis=0)
+        areas = np.abs((contorno[:, 0] - anterior[:, 0]) * (siguiente[:, 1] - anterior[:, 1])
+                       - (contorno[:, 1] - anterior[:, 1]) * (siguiente[:, 0] - anterior[:, 0]))
+        contorno = np.delete(contorno, np.argmin(areas), axis=0)
+    return contorno
+
+
+def deduplicar_vertices(puntos):
+    """
+    Elimina los vértices repetidos de una lista de esquinas.
+
+    Ordena con np.lexsort por columnas y marca los cambios entre filas
+    consecutivas; es unas diez veces más rápido que np.unique(axis=0), que
+    compara filas enteras como bytes.
+
+    Args:
+        puntos (np.ndarray): Esquinas (n, 3)
+
+    Returns:
+        tuple: (vertices (V, 3) ordenados, indices (n,) int32 con
+               puntos == vertices[indices])
+    """
+    if len(puntos) == 0:
+        return puntos[:0].copy(), np.empty(0, dtype=np.int32)
+    orden = np.lexsort(puntos.T[::-1])
+    ordenados = puntos[orden]
+    nuevo = np.empty(len(puntos), dtype=bool)
+    nuevo[0] = True
+    np.any(ordenados[1:] != ordenados[:-1], axis=1, out=nuevo[1:])
+    indices = np.empty(len(puntos), dtype=np.int32)
+    indices[orden] = np.cumsum(nuevo) - 1
+    return ordenados[nuevo], indices
+
+
+class MallaSTL:
+    """Malla triangular indexada leída de un STL."""
+
+    def __init__(self, vertices, caras, normales, nombre=''):
+        """
+        Inicializa la malla.
+
+        Args:
+            vertices (np.ndarray): Vértices sin duplicar (V, 3)
+            caras (np.ndarray): Índices de los tres vértices de cada cara (F, 3)
+            normales (np.ndarray): Normal de cada cara según el STL (F, 3)
+            nombre (str): Nombre de la pieza
+        """
+        self.vertices = vertices
+        self.caras = caras
+        self.normales = normales
+        self.nombre = nombre
+        self.clave = None  # Clave de la caché (hash del STL) si se cargó con cargar_malla
+        self._contornos = {}
+
+    @classmethod
+    def desde_triangulos(cls, triangulos, nombre=''):
+        """
+        Construye la malla indexada a partir de registros DTYPE_TRIANGULO.
+
+        Los vértices se deduplican por igualdad exacta: los exportadores
+        escriben con los mismos bits un vértice compartido por varias caras.
+
+        Args:
+            triangulos (np.ndarray): Registros DTYPE_TRIANGULO
+            nombre (str): Nombre de la pieza
+
+        Returns:
+            MallaSTL: Malla indexada
+        """
+        vertices, indices = deduplicar_vertices(np.asarray(triangulos['vertices']).reshape(-1, 3))
+        caras = indices.reshape(-1, 3)
+        normales = np.array(triangulos['normal'], dtype=np.float32)
+        return cls(vertices, caras, normales, nombre)
+
+    @property
+    def triangulos(self):
+        """Coordenadas de los vértices de cada cara (F, 3, 3)."""
+        return self.vertices[self.caras]
+
+    @property
+    def limites(self):
+        """Esquinas mínima y máxima de la caja envolvente (2, 3)."""
+        return np.array([self.vertices.min(axis=0), self.vertices.max(axis=0)])
+
+    def contorno(self, plano='xz', max_puntos=32):
+        """
+        Contorno diezmado de la proyección de la malla sobre un plano.
+
+        Args:
+            plano (str): 'xy', 'xz' o 'yz'
+            max_puntos (int): Número máximo de vértices del contorno
+
+        Returns:
+            np.ndarray: Vértices del contorno cerrado (k, 2), antihorario
+        """
+        clave = (plano, max_puntos)
+        if clave not in self._contornos:
+            if plano not in self._contornos:
+                self._contornos[plano] = envolvente_convexa(self.vertices[:, PLANOS[plano]])
+            self._contornos[clave] = diezmar_contorno(self._contornos[plano], max_puntos)
+        return self._contornos[clave]
+
+
+def cargar_malla(ruta, cache=True):
+    """
+    Carga un STL como MallaSTL, usando la caché en memoria y en disco.
+
+    Args:
+        ruta (str): Ruta del fichero STL
+        cache (bool): Si es False, siempre se lee y procesa el STL
+
+    Returns:
+        MallaSTL: Malla indexada
+    """
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    if not cache:
+        return MallaSTL.desde_triangulos(leer_stl(ruta), nombre)
+
+    clave = f'{hash_fichero(ruta)}-v{VERSION_CACHE}'
+    if clave in _MALLAS:
+        return _MALLAS[clave]
+
+    fichero = os.path.join(directorio_cache(), f'{clave}.npz')
+    try:
+        with np.load(fichero) as datos:
+            malla = MallaSTL(datos['vertices'], datos['caras'], datos['normales'], nombre)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        malla = MallaSTL.desde_triangulos(leer_stl(ruta), nombre)
+        try:
+            os.makedirs(os.path.dirname(fichero), exist_ok=True)
+            temporal = f'{fichero}.{os.getpid()}.npz'
+            np.savez(temporal, vertices=malla.vertices, caras=malla.caras, normales=malla.normales)
+            os.replace(temporal, fichero)  # Atómico: otro proceso nunca ve un .npz a medias
+        except OSError:
+            pass  # Sin caché en disco (directorio de solo lectura): se procesa cada vez
+    malla.clave = clave
+    _MALLAS[clave] = malla
+    return malla
+
+
+def cargar_pieza(nombre, cache=True):
+    """Carga una pieza de Boby por nombre ('Pie', 'Pierna', 'Pelvis' o 'Tapa')."""
+    return cargar_malla(ruta_pieza(nombre), cache)
+
+
+def parse_arguments():
+    """Parsea los argumentos de línea de comando."""
+    parser = argparse.ArgumentParser(description='Lectura y caché de las mallas STL de Boby')
+    parser.add_argument('stl', nargs='*',
+                        help='Ficheros STL (por defecto, todas las piezas de Boby/STLs)')
+    parser.add_argument('--plano', choices=sorted(PLANOS), default='xz',
+                        help='Plano del contorno diezmado')
+    parser.add_argument('--puntos', type=int, default=32,
+                        help='Número máximo de vértices del contorno')
+    parser.add_argument('--sin_cache', action='store_true',
+                        help='Procesa los STL sin leer ni escribir la caché')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal."""
+    args = parse_arguments()
+    rutas = args.stl or sorted(os.path.join(DIRECTORIO_STL, f) for f in os.listdir(DIRECTORIO_STL)
+                               if f.lower().endswith('.stl'))
+
+    print(f"{'pieza':<10} {'formato':>7} {'caras':>8} {'vértices':>9} {'contorno':>9} "
+          f"{'lectura (ms)':>13}  caja envolvente")
+    for ruta in rutas:
+        inicio = time.perf_counter()
+        malla = cargar_malla(ruta, cache=not args.sin_cache)
+        contorno = malla.contorno(args.plano, args.puntos)
+        duracion = (time.perf_counter() - inicio) * 1000
+        minimo, maximo = malla.limites.astype(float)
+        print(f"{malla.nombre:<10} {'binario' if es_binario(ruta) else 'ASCII':>7} "
+              f"{len(malla.caras):>8} {len(malla.vertices):>9} {len(contorno):>9} {duracion:>13.2f}  "
+              f"{np.round(minimo, 2).tolist()} .. {np.round(maximo, 2).tolist()}")
+
+    if not args.sin_cache:
+        print(f"Caché: {directorio_cache()}")
+
+
+if __name__ == "__main__":
+    main()
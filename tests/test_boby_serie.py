@@ -0,0 +1,69 @@
+"""CRC y analizador de tramas del protocolo serie de Boby (boby_serie.py)."""
+
+import struct
+
+import numpy as np
+import pytest
+
+from boby_serie import (MAX_CONSIGNAS, RESPUESTA, SINCRONISMO, AnalizadorRespuestas, AnalizadorTramas,
+                        codificar_trama, crc16)
+
+
+def _consignas(n, base=0):
+    """n consignas (izq, der) en cuartos de grado, distintas para cada base."""
+    return (300 + 3 * np.arange(2 * n).reshape(n, 2) + base % 97).astype('<u2')
+
+
+def test_crc16_valor_de_referencia():
+    # Valor de comprobación estándar de CRC-16/MCRF4XX
+    assert crc16(b'123456789') == 0x6F91
+    assert crc16(b'') == 0xFFFF
+    # Encadenar trozos equivale a calcularla de una vez, como _crc_ccitt_update
+    assert crc16(b'6789', crc16(b'12345')) == 0x6F91
+
+
+def test_codificar_limites():
+    with pytest.raises(ValueError):
+        codificar_trama(0, 20, np.empty((0, 2)))
+    with pytest.raises(ValueError):
+        codificar_trama(0, 20, _consignas(MAX_CONSIGNAS + 1))
+
+
+def test_ida_y_vuelta_byte_a_byte():
+    tramas = [codificar_trama(seq, 20, _consignas(n, seq)) for seq, n in ((0, 1), (1, 5), (65535, MAX_CONSIGNAS))]
+    analizador = AnalizadorTramas()
+    recibidas = []
+    for byte in b''.join(tramas):
+        recibidas += analizador.alimentar(bytes([byte]))
+    assert [(seq, periodo) for seq, periodo, _ in recibidas] == [(0, 20), (1, 20), (65535, 20)]
+    for (_, _, consignas), n, seq in zip(recibidas, (1, 5, MAX_CONSIGNAS), (0, 1, 65535)):
+        np.testing.assert_array_equal(consignas, _consignas(n, seq))
+    assert analizador.errores_crc == 0 and analizador.bytes_descartados == 0
+
+
+def test_basura_y_cabecera_imposible():
+    trama = codificar_trama(7, 10, _consignas(2))
+    basura = b'\x00\xa5\x13' + SINCRONISMO + struct.pack('<HBB', 1, 10, 0) + b'\xa5'
+    analizador = AnalizadorTramas()
+    recibidas = analizador.alimentar(basura + trama)
+    assert [seq for seq, _, _ in recibidas] == [7]
+    assert analizador.bytes_descartados == len(basura)
+
+
+def test_crc_erronea_no_pierde_la_trama_siguiente():
+    buena = codificar_trama(2, 20, _consignas(3))
+    # Trama corrupta que anuncia MAX_CONSIGNAS consignas y queda cortada: la
+    # trama buena empieza dentro de la longitud que declara
+    corrupta = bytearray(codificar_trama(1, 20, _consignas(MAX_CONSIGNAS)))[:20]
+    corrupta[6] ^= 0xFF
+    analizador = AnalizadorTramas()
+    recibidas = analizador.alimentar(bytes(corrupta) + buena + bytes(64))
+    assert [seq for seq, _, _ in recibidas] == [2]
+    assert analizador.errores_crc == 1
+
+
+def test_respuestas():
+    respuesta = struct.pack('<BHBB', RESPUESTA, 513, 1, 40)
+    analizador = AnalizadorRespuestas()
+    assert analizador.alimentar(b'\x00' + respuesta[:3]) == []
+    assert analizador.alimentar(respuesta[3:] + respuesta) == [(513, 1, 40), (513, 1, 40)]
@@ -0,0 +1,57 @@
+"""HistorialLIPM y VentanaMinMax frente a implementaciones de fuerza bruta."""
+
+import numpy as np
+import pytest
+
+from lipm_historial import HistorialLIPM, VentanaMinMax
+
+
+@pytest.mark.parametrize('circular', [False, True])
+@pytest.mark.parametrize('capacidad', [1, 3, 8])
+def test_historial_igual_que_lista(circular, capacidad):
+    historial = HistorialLIPM(('t', 'x'), capacidad=capacidad, circular=circular)
+    referencia = []
+    for i in range(25):
+        historial.agregar(i * 0.1, i * i)
+        referencia.append((i * 0.1, i * i))
+        esperado = referencia[-capacidad:] if circular else referencia
+        assert len(historial) == len(esperado)
+        np.testing.assert_array_equal(historial['t'], [t for t, _ in esperado])
+        np.testing.assert_array_equal(historial['x'], [x for _, x in esperado])
+        assert historial.ultimo('x') == i * i
+
+
+def test_historial_vacio_y_limpiar():
+    historial = HistorialLIPM(('t',), capacidad=4, circular=True)
+    assert len(historial) == 0 and historial['t'].size == 0
+    with pytest.raises(IndexError):
+        historial.ultimo('t')
+    historial.agregar(1.0)
+    historial.limpiar()
+    assert len(historial) == 0 and historial['t'].size == 0
+    with pytest.raises(ValueError):
+        HistorialLIPM(('t',), capacidad=0)
+
+
+def test_vista_circular_sin_copia():
+    historial = HistorialLIPM(('t',), capacidad=4, circular=True)
+    for i in range(10):
+        historial.agregar(i)
+    assert np.shares_memory(historial['t'], historial._datos)
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_ventana_min_max_igual_que_fuerza_bruta(semilla):
+    rng = np.random.default_rng(semilla)
+    tiempos = np.cumsum(rng.uniform(0.0, 0.2, 400))  # Admite tiempos repetidos (incremento 0 posible)
+    valores = rng.integers(-5, 5, 400).astype(float)  # Muchos empates
+    anchura = 2.0
+    ventana = VentanaMinMax()
+    for i, (t, valor) in enumerate(zip(tiempos, valores)):
+        ventana.agregar(t, valor)
+        ventana.expirar(t - anchura)
+        dentro = valores[:i + 1][tiempos[:i + 1] >= t - anchura]
+        assert ventana.minimo() == dentro.min()
+        assert ventana.maximo() == dentro.max()
+    ventana.limpiar()
+    assert len(ventana) == 0
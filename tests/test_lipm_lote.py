@@ -0,0 +1,60 @@
+"""SimuladorLoteLIPM frente a los simuladores escalares."""
+
+import contextlib
+import io
+
+import numpy as np
+
+from Frontal_Mejorado import LIPMSimulator
+from lipm_lote import SimuladorLoteLIPM
+from Sagital_Mejorado import ModeloLIPM, SimuladorLIPM
+
+ZMP_X = [0, 4, 8, 12, 16, 20, 24]
+CAMBIOS_X = [2, 6, 10, 14, 18, 22]
+ZMP_Y = [0.4, 0.8, 0.4, 0.8, 0.4, 0.8, 0.4]
+CAMBIOS_Y = [0.4, 1, 2, 3.5, 4, 7.4, 10.0]
+
+
+def test_lote_sagital_igual_que_simulador_escalar():
+    alturas = np.array([0.8, 1.0, 1.2, 1.5])
+    velocidades = np.array([0.3, 0.5, 0.8, 1.2])
+    n_pasos = 250
+    lote = SimuladorLoteLIPM(alturas, 0.0, velocidades, ZMP_X, CAMBIOS_X)
+    trayectorias = lote.simular(n_pasos, registrar=True)
+
+    for i, (altura, velocidad) in enumerate(zip(alturas, velocidades)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulador = SimuladorLIPM(ModeloLIPM(altura), x_dot_0=velocidad, capacidad_historial=n_pasos,
+                                      zmp_x=ZMP_X, zmp_x_change=CAMBIOS_X)
+            posiciones = [simulador.paso()[0] for _ in range(n_pasos)]
+        np.testing.assert_allclose(trayectorias['posicion'][:, i], posiciones, rtol=1e-9, atol=1e-9)
+        assert lote.zmp_idx[i] == simulador.zmp_idx
+
+
+def test_lote_frontal_igual_que_simulador_escalar():
+    alturas = np.array([1.0, 1.2, 1.4])
+    velocidades = np.array([0.2, 0.3, 0.4])
+    n_pasos = 150
+    lote = SimuladorLoteLIPM(alturas, 0.0, velocidades, ZMP_Y, CAMBIOS_Y, modo='tiempo')
+    trayectorias = lote.simular(n_pasos, registrar=True)
+
+    for i, (altura, velocidad) in enumerate(zip(alturas, velocidades)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulador = LIPMSimulator(height=altura, y_dot_0=velocidad, zmp_y=ZMP_Y, zmp_time_change=CAMBIOS_Y)
+            posiciones = []
+            for _ in range(n_pasos):
+                simulador.update()
+                posiciones.append(simulador.y_abs)
+        np.testing.assert_allclose(trayectorias['posicion'][:, i], posiciones, rtol=1e-9, atol=1e-9)
+        assert lote.zmp_idx[i] == simulador.zmp_idx
+
+
+def test_miembros_agotados_se_detienen():
+    # Dos umbrales y solo dos ZMP: el segundo cambio agota la planificación
+    lote = SimuladorLoteLIPM([1.2, 1.2], 0.0, [0.3, -0.3], [0, 1], [0.5, 1.5])
+    lote.simular(200)
+    congelado = lote.posicion()
+    lote.simular(10)
+    assert list(lote.activo) == [False, True]
+    assert lote.zmp_idx[0] == 1 and lote.posicion()[0] == congelado[0]
+    assert lote.posicion()[1] != congelado[1]
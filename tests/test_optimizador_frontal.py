@@ -0,0 +1,32 @@
+"""Planificaciones del optimizador frontal ejecutadas paso a paso."""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from Frontal_Mejorado import LIPMSimulator
+from optimizador_frontal import OptimizadorFrontal, optimizar_planificacion
+
+
+@pytest.mark.parametrize('dt', [0.02, 0.013, 0.005])
+def test_planificacion_acotada_con_update(dt):
+    planificacion, _ = optimizar_planificacion(dt=dt)
+    fin = planificacion['zmp_time_change'][-1]
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador = LIPMSimulator(**planificacion)
+        posiciones = []
+        while simulador.t_abs < fin:
+            simulador.update()
+            posiciones.append(simulador.y_abs)
+    assert simulador.zmp_idx == len(planificacion['zmp_y']) - 1
+    assert 0.35 < min(posiciones) and max(posiciones) < 0.65
+
+
+def test_cambios_en_la_rejilla_de_dt():
+    optimizador = OptimizadorFrontal(dt=0.02)
+    theta, _ = optimizador.ajustar_a_rejilla(optimizador.optimizar()[0])
+    np.testing.assert_allclose(theta[:optimizador.n] / 0.02, optimizador.pasos_de_fase(theta), atol=1e-12)
+    cambios = np.array(optimizador.planificacion(theta)['zmp_time_change'])
+    np.testing.assert_allclose(cambios / 0.02 % 1, 0.5, atol=1e-9)
@@ -0,0 +1,96 @@
+"""Ida y vuelta del formato de trayectoria (trayectoria.py)."""
+
+import numpy as np
+import pytest
+
+from trayectoria import COLUMNAS_PLANO, EscritorTrayectoria, LectorTrayectoria, leer_trayectoria
+
+NOMBRES = [nombre for nombre, _ in COLUMNAS_PLANO]
+
+
+def _filas(inicio, fin):
+    """Filas de prueba con tiempos crecientes (una tupla por fila)."""
+    return [(0.02 * i, np.sin(i), np.cos(i), -np.sin(i), float(i // 7), i % 2, 0.5 * i)
+            for i in range(inicio, fin)]
+
+
+def _comprobar(ruta, filas, parametros=None):
+    """El fichero contiene exactamente `filas`, leído entero y con mmap."""
+    cabecera, columnas = leer_trayectoria(ruta)
+    esperado = {nombre: np.array([fila[j] for fila in filas]) for j, nombre in enumerate(NOMBRES)}
+    if parametros is not None:
+        assert cabecera['parametros'] == parametros
+    with LectorTrayectoria(ruta) as lector:
+        assert len(lector) == len(filas)
+        for nombre in NOMBRES:
+            np.testing.assert_array_equal(columnas[nombre], esperado[nombre].astype(columnas[nombre].dtype))
+            np.testing.assert_array_equal(lector.columna(nombre), columnas[nombre])
+        if filas:
+            assert lector.t_min == filas[0][0] and lector.t_max == filas[-1][0]
+            assert lector.fila(len(filas) - 1)['posicion'] == filas[-1][1]
+
+
+def test_ida_y_vuelta_con_varios_bloques(tmp_path):
+    ruta = str(tmp_path / 'tray.lipm')
+    filas = _filas(0, 23)
+    parametros = {'altura': 1.2, 'zmp': [0, 4, 8]}
+    with EscritorTrayectoria(ruta, parametros, filas_bloque=5) as escritor:
+        for fila in filas[:12]:
+            escritor.agregar(*fila)
+        columnas = {nombre: [fila[j] for fila in filas[12:]] for j, nombre in enumerate(NOMBRES)}
+        escritor.agregar_columnas(**columnas)
+        assert escritor.filas == 23
+    _comprobar(ruta, filas, parametros)
+
+    with LectorTrayectoria(ruta) as lector:
+        for t in (0.0, 0.05, 0.1, 0.2, 0.44, 1.0):
+            esperado = int(np.searchsorted(lector.columna('t'), t))
+            assert lector.indice_tiempo(t) == esperado
+        ventana = lector.ventana(0.09, 0.21, ['t'])
+        np.testing.assert_array_equal(ventana['t'], [f[0] for f in filas if 0.09 <= f[0] <= 0.21])
+
+
+@pytest.mark.parametrize('corte', [3, 5, 10, 13])
+def test_modo_anadir_continua_el_bloque_parcial(tmp_path, corte):
+    ruta = str(tmp_path / 'tray.lipm')
+    filas = _filas(0, 21)
+    with EscritorTrayectoria(ruta, {'dt': 0.02}, filas_bloque=5) as escritor:
+        for fila in filas[:corte]:
+            escritor.agregar(*fila)
+    with EscritorTrayectoria(ruta, {'ignorado': True}, modo='a') as escritor:
+        assert escritor.filas == corte
+        for fila in filas[corte:]:
+            escritor.agregar(*fila)
+    _comprobar(ruta, filas, {'dt': 0.02})
+
+
+def test_modo_anadir_crea_el_fichero(tmp_path):
+    ruta = str(tmp_path / 'nuevo.lipm')
+    with EscritorTrayectoria(ruta, {'dt': 0.02}, filas_bloque=4, modo='a') as escritor:
+        for fila in _filas(0, 6):
+            escritor.agregar(*fila)
+    _comprobar(ruta, _filas(0, 6))
+
+
+def test_grabacion_vacia(tmp_path):
+    ruta = str(tmp_path / 'vacia.lipm')
+    EscritorTrayectoria(ruta, {'dt': 0.02}).cerrar()
+    _comprobar(ruta, [], {'dt': 0.02})
+    with LectorTrayectoria(ruta) as lector:
+        assert lector.indice_tiempo(1.0) == 0
+        assert lector.ventana(0.0, 1.0)['t'].size == 0
+        with pytest.raises(ValueError):
+            lector.t_min
+        with pytest.raises(ValueError):
+            lector.t_max
+    # Una grabación vacía también se puede continuar
+    with EscritorTrayectoria(ruta, modo='a') as escritor:
+        escritor.agregar(*_filas(0, 1)[0])
+    _comprobar(ruta, _filas(0, 1))
+
+
+def test_fichero_ajeno(tmp_path):
+    ruta = tmp_path / 'otro.bin'
+    ruta.write_bytes(b'no es una trayectoria')
+    with pytest.raises(ValueError):
+        LectorTrayectoria(str(ruta))
@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+"""
+Formato binario columnar por bloques para guardar trayectorias LIPM.
+
+Estructura del fichero:
+
+    b'LIPMTRJ1'                       identificador y versión
+    uint32 longitud + JSON            cabecera: columnas, filas por bloque y
+                                      parámetros (modelo, dt, planificación)
+    bloque 0, bloque 1, ...           todos del mismo tamaño en bytes
+
+Cada bloque empieza con un uint32 con el número de filas válidas, seguido de
+cada columna completa (`filas_bloque` valores en little-endian, rellenando
+con ceros si el bloque no está lleno). Como todos los bloques ocupan lo
+mismo, el bloque k empieza en una posición calculable y el fichero se puede
+leer con mmap sin recorrerlo.
+
+EscritorTrayectoria acumula filas en memoria y escribe un bloque cada vez
+que se llena. Al vaciar (o cerrar) se escribe también el bloque parcial,
+que se sobrescribe en su sitio en la siguiente escritura, de modo que el
+fichero es legible en cualquier momento y se puede reabrir con modo='a' para
+seguir añadiendo filas a mitad de una ejecución.
+
+LectorTrayectoria abre el fichero con mmap y solo toca las páginas de las
+filas que se piden: el instante buscado se localiza por búsqueda binaria
+sobre el primer tiempo de cada bloque y después dentro del bloque.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIA = b'LIPMTRJ1'
+FILAS_BLOQUE = 4096
+
+# Valores de la columna 'pie'
+PIES = {'LF': 0, 'RF': 1}
+SIN_PIE = -1
+
+# Columnas de un plano (sagital o frontal)
+COLUMNAS_PLANO = (
+    ('t', '<f8'),
+    ('posicion', '<f8'),
+    ('velocidad', '<f8'),
+    ('aceleracion', '<f8'),
+    ('zmp', '<f8'),
+    ('pie', '<i1'),
+    ('energia_orbital', '<f8'),
+)
+
+# Columnas del motor 3D (lipm3d.py)
+COLUMNAS_3D = (
+    ('t', '<f8'),
+    ('x', '<f8'),
+    ('x_dot', '<f8'),
+    ('x_ddot', '<f8'),
+    ('zmp_x', '<f8'),
+    ('y', '<f8'),
+    ('y_dot', '<f8'),
+    ('y_ddot', '<f8'),
+    ('zmp_y', '<f8'),
+    ('pie', '<i1'),
+)
+
+
+def codigo_pie(pie):
+    """Convierte 'LF'/'RF' (o None) en el entero guardado en la columna 'pie'."""
+    return PIES.get(pie, SIN_PIE)
+
+
+def energia_orbital(altura, gravedad, x_rel, x_dot):
+    """Energía orbital E = ẋ²/2 - (g/2h)·x² (constante dentro de cada fase)."""
+    return 0.5 * x_dot ** 2 - (gravedad / (2 * altura)) * x_rel ** 2
+
+
+def _tamano_bloque(dtypes, filas_bloque):
+    """Bytes que ocupa un bloque completo."""
+    return 4 + filas_bloque * sum(dtype.itemsize for dtype in dtypes)
+
+
+def leer_cabecera(f):
+    """
+    Lee la cabecera de un fichero de trayectoria abierto en binario.
+
+    Args:
+        f (file): Fichero posicionado al inicio
+
+    Returns:
+        tuple: (cabecera como diccionario, posición del primer bloque)
+    """
+    magia = f.read(len(MAGIA))
+    if magia != MAGIA:
+        raise ValueError("No es un fichero de trayectoria LIPM")
+    (longitud,) = struct.unpack('<I', f.read(4))
+    cabecera = json.loads(f.read(longitud).decode('utf-8'))
+    return cabecera, len(MAGIA) + 4 + longitud
+
+
+class EscritorTrayectoria:
+    """
+    Escritor en streaming de trayectorias en formato columnar por bloques.
+    """
+
+    def __init__(self, ruta, parametros=None, columnas=COLUMNAS_PLANO,
+                 filas_bloque=FILAS_BLOQUE, modo='w'):
+        """
+        Abre (o crea) un fichero de trayectoria.
+
+        Args:
+            ruta (str): Fichero de salida
+            parametros (dict): Parámetros guardados en la cabecera (altura,
+                gravedad, dt, planificación...); se ignora con modo='a'
+            columnas (sequence): Pares (nombre, dtype) de cada columna
+            filas_bloque (int): Filas por bloque
+            modo (str): 'w' para crear el fichero, 'a' para seguir añadiendo
+                filas a uno existente (si no existe, se crea)
+        """
+        if modo not in ('w', 'a'):
+            raise ValueError(f"Modo desconocido: {modo}")
+        self.ruta = ruta
+
+        if modo == 'a' and os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            self._f = open(ruta, 'r+b')
+            self.cabecera, self._inicio = leer_cabecera(self._f)
+            self._preparar_columnas()
+            self._reabrir()
+        else:
+            self.cabecera = {
+                'version': 1,
+                'filas_bloque': int(filas_bloque),
+                'columnas': [[nombre, np.dtype(dtype).str] for nombre, dtype in columnas],
+                'parametros': parametros or {},
+            }
+            texto = json.dumps(self.cabecera).encode('utf-8')
+            self._f = open(ruta, 'w+b')
+            self._f.write(MAGIA + struct.pack('<I', len(texto)) + texto)
+            self._inicio = self._f.tell()
+            self._preparar_columnas()
+            self.bloques_completos = 0
+            self.n = 0
+
+    def _preparar_columnas(self):
+        """Reserva los buffers de un bloque a partir de la cabecera."""
+        self.filas_bloque = self.cabecera['filas_bloque']
+        self.nombres = [nombre for nombre, _ in self.cabecera['columnas']]
+        self.dtypes = [np.dtype(dtype) for _, dtype in self.cabecera['columnas']]
+        self.buffers = {nombre: np.zeros(self.filas_bloque, dtype=dtype)
+                        for nombre, dtype in zip(self.nombres, self.dtypes)}
+        self.tamano_bloque = _tamano_bloque(self.dtypes, self.filas_bloque)
+
+    def _reabrir(self):
+        """Carga el último bloque parcial de un fichero existente para continuarlo."""
+        self._f.seek(0, os.SEEK_END)
+        bloques = (self._f.tell() - self._inicio) // self.tamano_bloque
+        self.bloques_completos = bloques
+        self.n = 0
+        if bloques == 0:
+            return
+        self._f.seek(self._inicio + (bloques - 1) * self.tamano_bloque)
+        (filas,) = struct.unpack('<I', self._f.read(4))
+        if filas < self.filas_bloque:
+            # El bloque parcial vuelve a memoria y se reescribirá en su sitio
+            for nombre, dtype in zip(self.nombres, self.dtypes):
+                datos = self._f.read(self.filas_bloque * dtype.itemsize)
+                self.buffers[nombre][:] = np.frombuffer(datos, dtype=dtype)
+            self.bloques_completos = bloques - 1
+            self.n = filas
+
+    @property
+    def filas(self):
+        """Número total de filas escritas o pendientes de escribir."""
+        return self.bloques_completos * self.filas_bloque + self.n
+
+    def agregar(self, *valores):
+        """
+        Añade una fila con un valor por columna, en el orden de la cabecera.
+
+        Args:
+            *valores: Valores de la fila
+        """
+        for buffer, valor in zip(self.buffers.values(), valores):
+            buffer[self.n] = valor
+        self.n += 1
+        if self.n == self.filas_bloque:
+            self._escribir_bloque()
+            self.bloques_completos += 1
+            self.n = 0
+
+    def agregar_columnas(self, **columnas):
+        """
+        Añade muchas filas de golpe a partir de arrays por columna.
+
+        Args:
+            **columnas (array): Un array por columna, todos de la misma longitud
+        """
+        total = len(columnas[self.nombres[0]])
+        hecho = 0
+        while hecho < total:
+            cuantas = min(self.filas_bloque - self.n, total - hecho)
+            for nombre in self.nombres:
+                self.buffers[nombre][self.n:self.n + cuantas] = columnas[nombre][hecho:hecho + cuantas]
+            self.n += cuantas
+            hecho += cuantas
+            if self.n == self.filas_bloque:
+                self._escribir_bloque()
+                self.bloques_completos += 1
+                self.n = 0
+
+    def _escribir_bloque(self):
+        """Escribe el bloque en curso (completo o parcial) en su posición."""
+        self._f.seek(self._inicio + self.bloques_completos * self.tamano_bloque)
+        self._f.write(struct.pack('<I', self.n))
+        for buffer in self.buffers.values():
+            self._f.write(buffer.tobytes())
+
+    def vaciar(self):
+        """Escribe el bloque parcial para que el fichero sea legible ya."""
+        if self.n:
+            self._escribir_bloque()
+        self._f.flush()
+
+    def cerrar(self):
+        """Vacía los datos pendientes y cierra el fichero."""
+        if not self._f.closed:
+            self.vaciar()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def leer_trayectoria(ruta):
+    """
+    Lee un fichero de trayectoria completo.
+
+    Args:
+        ruta (str): Fichero de trayectoria
+
+    Returns:
+        tuple: (cabecera, diccionario de arrays por columna)
+    """
+    with open(ruta, 'rb') as f:
+        cabecera, inicio = leer_cabecera(f)
+        filas_bloque = cabecera['filas_bloque']
+        nombres = [nombre for nombre, _ in cabecera['columnas']]
+        dtypes = [np.dtype(dtype) for _, dtype in cabecera['columnas']]
+        tamano = _tamano_bloque(dtypes, filas_bloque)
+        datos = f.read()
+
+    n_bloques = len(datos) // tamano
+    partes = {nombre: [] for nombre in nombres}
+    for k in range(n_bloques):
+        base = k * tamano
+        (filas,) = struct.unpack_from('<I', datos, base)
+        desplazamiento = base + 4
+        for nombre, dtype in zip(nombres, dtypes):
+            columna = np.frombuffer(datos, dtype=dtype, count=filas_bloque, offset=desplazamiento)
+            partes[nombre].append(columna[:filas])
+            desplazamiento += filas_bloque * dtype.itemsize
+    columnas = {nombre: np.concatenate(partes[nombre]) if partes[nombre] else np.empty(0, dtype)
+                for nombre, dtype in zip(nombres, dtypes)}
+    return cabecera, columnas
+
+
+class LectorTrayectoria:
+    """
+    Acceso aleatorio a un fichero de trayectoria mediante mmap.
+
+    Abrir el fichero solo lee la cabecera y el número de filas del último
+    bloque; las columnas se devuelven como vistas sobre el mapa de memoria
+    (o como una copia pequeña si el rango pedido cruza bloques).
+    """
+
+    def __init__(self, ruta):
+        """
+        Abre un fichero de trayectoria.
+
+        Args:
+            ruta (str): Fichero de trayectoria
+        """
+        self.ruta = ruta
+        self._f = open(ruta, 'rb')
+        self.cabecera, self._inicio = leer_cabecera(self._f)
+        self.parametros = self.cabecera['parametros']
+        self.filas_bloque = self.cabecera['filas_bloque']
+        self.nombres = [nombre for nombre, _ in self.cabecera['columnas']]
+        self.dtypes = {nombre: np.dtype(dtype) for nombre, dtype in self.cabecera['columnas']}
+        self.tamano_bloque = _tamano_bloque(self.dtypes.values(), self.filas_bloque)
+
+        # Desplazamiento de cada columna dentro de un bloque
+        self._desplazamientos = {}
+        desplazamiento = 4
+        for nombre in self.nombres:
+            self._desplazamientos[nombre] = desplazamiento
+            desplazamiento += self.filas_bloque * self.dtypes[nombre].itemsize
+
+        tamano = os.fstat(self._f.fileno()).st_size
+        self.n_bloques = (tamano - self._inicio) // self.tamano_bloque
+        self._mapa = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if tamano else None
+
+        # Solo el último bloque puede estar incompleto
+        self.filas = 0
+        if self.n_bloques:
+            (ultimo,) = struct.unpack_from('<I', self._mapa, self._inicio + (self.n_bloques - 1) * self.tamano_bloque)
+            self.filas = (self.n_bloques - 1) * self.filas_bloque + ultimo
+
+    def __len__(self):
+        return self.filas
+
+    def cerrar(self):
+        """Cierra el fichero; el mapa se libera cuando no quedan vistas sobre él."""
+        self._mapa = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _vista_bloque(self, nombre, bloque, inicio, fin):
+        """Vista sin copia de las filas [inicio, fin) de un bloque."""
+        dtype = self.dtypes[nombre]
+        desplazamiento = (self._inicio + bloque * self.tamano_bloque + self._desplazamientos[nombre]
+                          + inicio * dtype.itemsize)
+        return np.frombuffer(self._mapa, dtype=dtype, count=fin - inicio, offset=desplazamiento)
+
+    def columna(self, nombre, inicio=0, fin=None):
+        """
+        Devuelve las filas [inicio, fin) de una columna.
+
+        Args:
+            nombre (str): Columna
+            inicio (int): Primera fila
+            fin (int): Fila final (exclusiva); por defecto, la última
+
+        Returns:
+            np.ndarray: Vista de solo lectura si el rango cae en un bloque
+        """
+        fin = self.filas if fin is None else min(fin, self.filas)
+        inicio = max(0, min(inicio, fin))
+        partes = []
+        fila = inicio
+        while fila < fin:
+            bloque, dentro = divmod(fila, self.filas_bloque)
+            cuantas = min(self.filas_bloque - dentro, fin - fila)
+            partes.append(self._vista_bloque(nombre, bloque, dentro, dentro + cuantas))
+            fila += cuantas
+        if not partes:
+            return np.empty(0, dtype=self.dtypes[nombre])
+        return partes[0] if len(partes) == 1 else np.concatenate(partes)
+
+    def valor(self, nombre, fila):
+        """Valor de una columna en una fila."""
+        bloque, dentro = divmod(fila, self.filas_bloque)
+        return self._vista_bloque(nombre, bloque, dentro, dentro + 1)[0]
+
+    def fila(self, i):
+        """Diccionario con todos los valores de una fila."""
+        return {nombre: self.valor(nombre, i) for nombre in self.nombres}
+
+    def indice_tiempo(self, t, lado='left'):
+        """
+        Busca por bisección la fila de un instante (los tiempos son crecientes).
+
+        Primero se localiza el bloque comparando con su primer tiempo y
+        después se busca dentro de ese bloque, así que solo se tocan
+        O(log n) páginas del fichero.
+
+        Args:
+            t (float): Instante buscado
+            lado (str): 'left' o 'right', como en np.searchsorted
+
+        Returns:
+            int: Índice de inserción de t en la columna de tiempos
+        """
+        if not self.filas:
+            return 0
+        bajo, alto = 0, self.n_bloques
+        while alto - bajo > 1:
+            medio = (bajo + alto) // 2
+            primero = self.valor('t', medio * self.filas_bloque)
+            if primero < t or (lado == 'right' and primero == t):
+                bajo = medio
+            else:
+                alto = medio
+        inicio = bajo * self.filas_bloque
+        tiempos = self.columna('t', inicio, inicio + self.filas_bloque)
+        return inicio + int(np.searchsorted(tiempos, t, side=lado))
+
+    @property
+    def t_min(self):
+        """Primer instante grabado (ValueError si la grabación está vacía)."""
+        if not self.filas:
+            raise ValueError("La grabación no tiene muestras")
+        return float(self.valor('t', 0))
+
+    @property
+    def t_max(self):
+        """Último instante grabado (ValueError si la grabación está vacía)."""
+        if not self.filas:
+            raise ValueError("La grabación no tiene muestras")
+        return float(self.valor('t', self.filas - 1))
+
+    def ventana(self, t_inicio, t_fin, nombres=None):
+        """
+        Columnas de las filas con t_inicio <= t <= t_fin.
+
+        Args:
+            t_inicio (float): Inicio de la ventana
+            t_fin (float): Fin de la ventana
+            nombres (sequence): Columnas a devolver (por defecto, todas)
+
+        Returns:
+            dict: Array por columna
+        """
+        inicio = self.indice_tiempo(t_inicio, 'left')
+        fin = self.indice_tiempo(t_fin, 'right')
+        return {nombre: self.columna(nombre, inicio, fin) for nombre in (nombres or self.nombres)}